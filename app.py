@@ -1,112 +1,293 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, g, jsonify, send_from_directory
-from werkzeug.security import check_password_hash, generate_password_hash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, g, jsonify, send_from_directory, send_file, Response, stream_with_context
+from flask import before_render_template, template_rendered, has_app_context
+from markupsafe import Markup, escape
 from functools import wraps
 import sqlite3
 import uuid
 import os
-import math
-from datetime import datetime
-import pandas as pd
-import io
-from flask_weasyprint import HTML, render_pdf
-from flask_mail import Mail, Message
-from flask_socketio import SocketIO, emit
-
-from collections import defaultdict
+import json
+import hashlib
+import hmac
+import time
+from datetime import datetime, timezone
+import tempfile
+from jinja2 import FileSystemBytecodeCache
+import atexit
+from flask_mail import Message
+from flask_socketio import SocketIO, join_room
 
 # --- Importaciones Locales ---
 from config import config_dict, CATEGORIAS, PRIORIDADES, ESTADOS, PER_PAGE
-from database_setup import crear_tablas
 
-from domain.models import User, Ticket, Equipment, TicketStatus, TicketPriority, UserRole, TicketReadModel
-from infrastructure.persistence.repository import SQLiteRepository
+from domain.models import User, Ticket, Equipment, TicketStatus, TicketPriority, UserRole, OutboxEmail
+from infrastructure.persistence.repository import HIGHLIGHT_START, HIGHLIGHT_END, decode_cursor
+from infrastructure.persistence.instrumentation import QueryTracer, InstrumentedRepository, connection_factory
+from infrastructure.persistence.connection_pool import ConnectionPool, enable_foreign_keys
+from infrastructure.persistence.storage_profile import StorageProfile
+from infrastructure.persistence.wal_checkpoint import WalCheckpointManager
+from infrastructure.mail.outbox_worker import EmailOutboxWorker
+from infrastructure.mail.mail_transport import MailTransport
+from infrastructure.cache import LRUCache
+from infrastructure.identity_cache import IdentityCache
+from infrastructure.fragment_cache import FragmentCache, FragmentCacheExtension
+from infrastructure.metrics import MetricsRegistry, COUNT_BUCKETS, begin_request_stats, current_request_stats, end_request_stats
+from infrastructure.export.ticket_export import iter_csv, write_xlsx
+from infrastructure.realtime.ticket_events import TicketEventBroadcaster, room_for_role, user_room
+from infrastructure.audit.audit_log import AuditLogWriter
 from application.services.ticket_service import TicketService
+from application.services.report_service import ReportService
+from application.services.auth_service import AuthService, AuthBusyError
 from uuid import UUID
 
-repo = SQLiteRepository('soportes_v2.db')
-ticket_service = TicketService(repo)
-
 # --- Configuración ---
 config = config_dict['development']
 
+storage_profile = StorageProfile.from_config(config)
+
+# Checkpoints WAL en segundo plano (fuera de las escrituras de tickets). Con el
+# checkpointer en marcha las conexiones del pool no hacen auto-checkpoint;
+# DB_WAL_AUTOCHECKPOINT solo aplica como respaldo cuando no corre (otro journal_mode).
+wal_checkpointer = WalCheckpointManager(
+    'soportes_v2.db',
+    interval=config.DB_WAL_CHECKPOINT_INTERVAL,
+    truncate_threshold=config.DB_WAL_TRUNCATE_BYTES,
+    busy_timeout=config.DB_BUSY_TIMEOUT
+)
+if storage_profile.journal_mode == 'WAL':
+    storage_profile.wal_autocheckpoint = 0
+    wal_checkpointer.start()
+
+# Métricas: tiempos por petición, por método del repositorio y por consulta SQL
+# (expuestas en /admin/metrics). Las consultas lentas se registran con su plan.
+metrics = MetricsRegistry()
+query_tracer = QueryTracer(metrics, slow_threshold=config.SLOW_QUERY_MS / 1000)
+# Las conexiones se toman solo alrededor de cada llamada al repositorio (las
+# llamadas anidadas comparten la misma), nunca por petición: una petición que
+# espera (hash, SMTP, streaming) no retiene ninguna mientras tanto.
+pool = ConnectionPool(
+    'soportes_v2.db',
+    max_size=config.DB_POOL_SIZE,
+    timeout=config.DB_POOL_TIMEOUT,
+    health_check_interval=config.DB_POOL_HEALTH_CHECK_INTERVAL,
+    setup=[enable_foreign_keys, storage_profile.apply],
+    factory=connection_factory(query_tracer)
+)
+repo = InstrumentedRepository('soportes_v2.db', pool=pool, tracer=query_tracer)
+repo.init_schema()
+ticket_service = TicketService(repo)
+
+# Usuarios y lista de técnicos: memo por petición (g) + caché del proceso con TTL,
+# invalidada por la versión 'usuarios' que suben create/update/delete_user
+def _memo_identidades():
+    return g.setdefault('identidades', {}) if has_app_context() else None
+
+identidades = IdentityCache(repo, maxsize=config.IDENTITY_CACHE_SIZE, ttl=config.IDENTITY_CACHE_TTL,
+                            request_memo=_memo_identidades)
+
+# Reportes PDF: WeasyPrint corre en procesos aparte para no bloquear al worker eventlet
+report_service = ReportService(
+    repo, config.REPORTS_DIR, config.TEMPLATES_FOLDER,
+    workers=config.REPORT_WORKERS,
+    max_bytes=config.REPORT_CACHE_MAX_MB * 1024 * 1024,
+    timeout=config.REPORT_TIMEOUT,
+    ttl=config.REPORT_CACHE_TTL
+)
+
+# Hash de contraseñas en hilos nativos: un scrypt en línea congela todo el worker eventlet
+auth_service = AuthService(
+    workers=config.AUTH_HASH_WORKERS,
+    max_pending=config.AUTH_MAX_PENDING,
+    admission_timeout=config.AUTH_ADMISSION_TIMEOUT
+)
+
+# Auditoría: las rutas solo encolan en memoria; un hilo escribe en lotes y archiva por mes
+audit_log = AuditLogWriter(
+    repo,
+    capacity=config.AUDIT_BUFFER_SIZE,
+    batch_size=config.AUDIT_BATCH_SIZE,
+    flush_interval=config.AUDIT_FLUSH_INTERVAL,
+    retention_days=config.AUDIT_RETENTION_DAYS,
+    archive_dir=config.AUDIT_ARCHIVE_DIR
+)
+audit_log.start()
+atexit.register(audit_log.stop)
+
 app = Flask(__name__)
 app.config.from_object(config)
 app.secret_key = 'clave-secreta-cambiar-en-produccion' # O usa config.SECRET_KEY
 
-# Inicializar Mail y SocketIO
-mail = Mail(app)
+# Plantillas: bytecode compilado en disco (los workers arrancan sin recompilar) y
+# {% cache %} para fragmentos pesados, invalidados por las versiones de datos del repositorio.
+# Debe configurarse antes del primer uso de app.jinja_env.
+os.makedirs(config.JINJA_BYTECODE_DIR, exist_ok=True)
+app.jinja_options = {
+    **app.jinja_options,
+    'bytecode_cache': FileSystemBytecodeCache(config.JINJA_BYTECODE_DIR),
+    'extensions': [FragmentCacheExtension],
+}
+fragmentos = FragmentCache(repo, maxsize=config.FRAGMENT_CACHE_SIZE, ttl=config.FRAGMENT_CACHE_TTL)
+app.jinja_env.fragment_cache = fragmentos
+
+# Inicializar SocketIO (la configuración de correo vive en MailTransport)
 socketio = SocketIO(app, cors_allowed_origins="*")
+# Cambios de tickets agrupados por ventana y enviados por sala (admins, tecnicos, user:<id>)
+ticket_events = TicketEventBroadcaster(socketio, window=config.SOCKETIO_COALESCE_WINDOW)
 
 # --- RUTA FAVICON ---
 @app.route('/favicon.ico')
 def favicon():
     return send_from_directory(os.path.join(app.root_path, 'static'), 'favicon.ico', mimetype='image/vnd.microsoft.icon')
 
-# --- Base de Datos ---
-def get_db():
-    if 'db' not in g:
-        g.db = sqlite3.connect(app.config['DB_FILE'])
-        g.db.row_factory = sqlite3.Row
-        g.db.execute("PRAGMA foreign_keys = ON")
-    return g.db
+# --- Métricas por petición ---
+http_duracion = metrics.histogram('http_request_duration_seconds', 'Duración de la petición',
+                                  ('endpoint', 'method', 'status'))
+http_consultas = metrics.histogram('http_request_queries', 'Consultas SQL por petición',
+                                   ('endpoint',), buckets=COUNT_BUCKETS)
+plantilla_duracion = metrics.histogram('template_render_duration_seconds', 'Renderizado de plantillas', ('template',))
 
-@app.teardown_appcontext
-def close_db(exception):
-    db = g.pop('db', None)
-    if db is not None:
-        db.close()
+@app.before_request
+def iniciar_metricas():
+    g.metricas_inicio = time.perf_counter()
+    begin_request_stats()
+
+@app.after_request
+def registrar_metricas(response):
+    inicio = g.pop('metricas_inicio', None)
+    stats = end_request_stats()
+    if inicio is None or stats is None:
+        return response
+    total = time.perf_counter() - inicio
+    endpoint = request.endpoint or 'sin_ruta'
+    http_duracion.observe(total, endpoint=endpoint, method=request.method, status=response.status_code)
+    http_consultas.observe(stats.queries, endpoint=endpoint)
+    # Visible en la pestaña Network del navegador (Timing)
+    response.headers['Server-Timing'] = (
+        f'sql;desc="{stats.queries} consultas, {stats.connections} conexiones";dur={stats.sql_seconds * 1000:.1f}, '
+        f'tpl;dur={stats.template_seconds * 1000:.1f}, total;dur={total * 1000:.1f}'
+    )
+    return response
+
+def _plantilla_inicio(sender, template, context, **extra):
+    g.plantilla_inicio = time.perf_counter()
+
+def _plantilla_fin(sender, template, context, **extra):
+    inicio = g.pop('plantilla_inicio', None)
+    if inicio is None:
+        return
+    duracion = time.perf_counter() - inicio
+    plantilla_duracion.observe(duracion, template=template.name)
+    stats = current_request_stats()
+    if stats is not None:
+        stats.templates += 1
+        stats.template_seconds += duracion
+
+before_render_template.connect(_plantilla_inicio, app)
+template_rendered.connect(_plantilla_fin, app)
 
 
 # --- FUNCION DE CORREO UNIFICADA (LA QUE SI FUNCIONA) ---
-def send_email(to, subject, template, **kwargs):
+# La configuración SMTP (DB con respaldo en .env) se cachea por versión: solo se
+# relee cuando admin_config_email guarda cambios, y cada worker reutiliza su sesión SMTP.
+mail_transport = MailTransport(
+    repo,
+    {clave: valor for clave, valor in app.config.items() if clave.startswith('MAIL_')},
+    debug=app.debug,
+    testing=app.testing,
+    idle_timeout=config.MAIL_CONNECTION_IDLE_TIMEOUT
+)
+mail_transport.init_app(app)
+
+def _mensaje_outbox(correo):
+    if correo.copia_oculta:
+        # Lista de distribución: un solo mensaje dirigido al remitente, destinatarios ocultos entre sí
+        msg = Message(correo.asunto, sender=mail_transport.sender, recipients=[mail_transport.sender],
+                      bcc=correo.destinatarios)
+    else:
+        msg = Message(correo.asunto, sender=mail_transport.sender, recipients=correo.destinatarios)
+    msg.html = correo.cuerpo_html
+    return msg
+
+correo_lote_duracion = metrics.histogram('email_batch_duration_seconds', 'Entrega de un lote del outbox por SMTP')
+correo_envios = metrics.counter('email_deliveries_total', 'Correos entregados o fallidos', ('result',))
+correo_encolado_duracion = metrics.histogram('email_enqueue_duration_seconds', 'Renderizado y encolado en send_email')
+
+def _entregar_correos(correos):
+    """Entrega un lote reclamado del outbox por una sola sesión SMTP. Devuelve [(correo, error)] de los que fallaron."""
+    inicio = time.perf_counter()
+    with app.app_context():
+        mensajes = [_mensaje_outbox(correo) for correo in correos]
+        errores = {id(msg): e for msg, e in mail_transport.send_batch(mensajes)}
+    fallidos = []
+    for correo, msg in zip(correos, mensajes):
+        error = errores.get(id(msg))
+        if error is None:
+            print(f"✅ Correo enviado a {correo.destinatarios} | Asunto: {correo.asunto}")
+        else:
+            print(f"⚠️ Error enviando correo #{correo.id} (intento {correo.intentos}): {error}")
+            fallidos.append((correo, error))
+    correo_lote_duracion.observe(time.perf_counter() - inicio)
+    correo_envios.inc(len(correos) - len(fallidos), result='enviado')
+    if fallidos:
+        correo_envios.inc(len(fallidos), result='fallido')
+    return fallidos
+
+outbox_worker = EmailOutboxWorker(
+    repo, _entregar_correos,
+    workers=config.MAIL_WORKERS,
+    batch_size=config.MAIL_OUTBOX_BATCH,
+    poll_interval=config.MAIL_OUTBOX_POLL_INTERVAL,
+    max_retries=config.MAIL_MAX_RETRIES,
+    backoff_base=config.MAIL_RETRY_BACKOFF,
+    stale_after=config.MAIL_OUTBOX_STALE_SECONDS
+)
+outbox_worker.start()
+
+def send_email(to, subject, template, copia_oculta=None, **kwargs):
+    """
+    Renderiza el correo una vez y lo encola; los workers del outbox lo envían fuera de la petición.
+    Con copia_oculta (por defecto a partir de MAIL_BCC_MIN_RECIPIENTS destinatarios) se envía un
+    único mensaje en CCO en lugar de uno por destinatario.
+    """
     if not to: return
 
-    # Cargamos configuración de la DB
-    config_dict_db = repo.get_config_by_prefix('MAIL_')
+    # Soportar múltiples correos (coma o punto y coma)
+    raw_recipients = to.replace(';', ',').split(',')
+    recipients = [email.strip() for email in raw_recipients if email.strip()]
     
-    # Actualizamos la app con lo que haya en la DB
-    if config_dict_db:
-        # Limpieza básica de espacios
-        for key, val in config_dict_db.items():
-            if isinstance(val, str):
-                config_dict_db[key] = val.strip()
-        
-        app.config.update(config_dict_db)
-        
-        # Ajuste de tipos
-        if 'MAIL_PORT' in app.config:
-            app.config['MAIL_PORT'] = int(app.config['MAIL_PORT'])
-        if 'MAIL_USE_TLS' in app.config:
-            app.config['MAIL_USE_TLS'] = str(app.config['MAIL_USE_TLS']).lower() == 'true'
-            
-        # IMPORTANTE: Re-inicializar mail con la nueva config
-        mail_instance = Mail(app)
-    else:
-        mail_instance = mail # Usar config por defecto (.env)
+    if not recipients:
+        print("⚠️ No hay destinatarios válidos.")
+        return
 
     try:
-        # Soportar múltiples correos (coma o punto y coma)
-        raw_recipients = to.replace(';', ',').split(',')
-        recipients = [email.strip() for email in raw_recipients if email.strip()]
-        
-        if not recipients:
-            print("⚠️ No hay destinatarios válidos.")
-            return
-
-        print(f"📧 Intentando enviar correo a: {recipients}")
-        
-        # Enviamos individualmente para mayor robustez y mejor debugging
-        for recipient in recipients:
-            msg = Message(subject, sender=app.config.get('MAIL_USERNAME'), recipients=[recipient])
-            msg.html = render_template(template, **kwargs)
-            mail_instance.send(msg)
-            print(f"✅ Correo enviado a {recipient} | Asunto: {subject}")
-            
+        inicio = time.perf_counter()
+        html = render_template(template, **kwargs)
+        if copia_oculta is None:
+            copia_oculta = len(recipients) >= config.MAIL_BCC_MIN_RECIPIENTS
+        if copia_oculta:
+            repo.enqueue_emails([OutboxEmail(destinatarios=recipients, asunto=subject, cuerpo_html=html, copia_oculta=True)])
+        else:
+            # Un registro por destinatario para que los reintentos no dupliquen envíos
+            repo.enqueue_emails([OutboxEmail(destinatarios=[r], asunto=subject, cuerpo_html=html) for r in recipients])
+        outbox_worker.wake()
+        correo_encolado_duracion.observe(time.perf_counter() - inicio)
+        print(f"📧 Correo encolado para: {recipients}")
     except Exception as e:
         print(f"⚠️ Error crítico en send_email: {e}")
         import traceback
         traceback.print_exc()
 
+# --- Filtros de plantilla ---
+@app.template_filter('resaltar')
+def resaltar(texto):
+    """Convierte los marcadores de coincidencia de la búsqueda en <mark>, escapando el resto."""
+    if not texto:
+        return ''
+    return Markup(str(escape(texto)).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>'))
+
+@app.template_test('con_coincidencias')
+def con_coincidencias(texto):
+    return bool(texto) and HIGHLIGHT_START in texto
+
 # --- Decoradores ---
 def login_required(f):
     @wraps(f)
@@ -117,6 +298,10 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def auditar(accion, **detalles):
+    """Registra una acción del usuario en sesión (sin escribir en la base durante la petición)."""
+    audit_log.record(accion, session.get('user_id'), **detalles)
+
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -126,21 +311,57 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# --- Tiempo real (Socket.IO) ---
+@socketio.on('connect')
+def socket_conectar(auth=None):
+    # Sin sesión no hay salas: se rechaza la conexión
+    if 'user_id' not in session:
+        return False
+    join_room(user_room(session['user_id']))
+    sala = room_for_role(session.get('role'))
+    if sala:
+        join_room(sala)
+
+def _ticket_a_evento(fila):
+    """Datos de la fila de lista_soportes para que el cliente la pinte sin recargar."""
+    return {
+        'id': str(fila.id),
+        'numero_ticket': fila.numero_ticket,
+        'fecha_creacion': str(fila.fecha_creacion),
+        'usuario_id': str(fila.usuario_id),
+        'nombre_usuario': fila.nombre_usuario,
+        'problema': fila.problema,
+        'categoria': fila.categoria,
+        'prioridad': fila.prioridad.value,
+        'estado': fila.estado.value,
+        'nombre_tecnico': fila.nombre_tecnico
+    }
+
+def _publicar_ticket(tipo, ticket_id):
+    fila = repo.get_ticket_row(ticket_id)
+    if fila:
+        ticket_events.publish(tipo, _ticket_a_evento(fila))
+
 # --- Rutas de Autenticación ---
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        db = get_db()
-        user = db.execute("SELECT * FROM usuarios WHERE username = ?", (username,)).fetchone()
-        if user and check_password_hash(user['password_hash'], password):
+        # La conexión vuelve al pool al terminar la consulta: el hash (hasta cientos de ms
+        # en tpool) no debe retener una conexión mientras otras peticiones esperan.
+        user = repo.get_user_by_username(username)
+        try:
+            valido = user is not None and auth_service.verify_password(user.password_hash, password)
+        except AuthBusyError:
+            flash('El servidor está ocupado, intenta de nuevo en unos segundos.', 'warning')
+            return render_template('login.html'), 503
+        if valido:
             session.clear()
-            session['user_id'] = user['id']
-            session['username'] = user['username']
-            session['role'] = user['role']
-            db.execute("INSERT INTO auditoria_logs (usuario_id, accion) VALUES (?, 'LOGIN')", (user['id'],))
-            db.commit()
+            session['user_id'] = str(user.id)
+            session['username'] = user.username
+            session['role'] = user.role.value
+            auditar('LOGIN', ip=request.remote_addr)
             return redirect(url_for('dashboard'))
         flash('Usuario o contraseña incorrectos.', 'danger')
     return render_template('login.html')
@@ -150,6 +371,10 @@ def logout():
     session.clear()
     return redirect(url_for('login'))
 
+def _alcance_rol():
+    """Clave de visibilidad para cachear fragmentos: el staff ve lo mismo, cada usuario ve lo suyo."""
+    return str(session['user_id']) if session.get('role') == 'user' else 'todos'
+
 # --- DASHBOARD ---
 @app.route('/')
 @app.route('/dashboard')
@@ -157,55 +382,222 @@ def logout():
 def dashboard():
     role = session.get('role')
     user_id = UUID(str(session['user_id']))
-    
-    kpis = repo.get_dashboard_kpis(role, user_id)
-    grafico_estado = repo.get_status_distribution(role, user_id)
-    grafico_cat = repo.get_category_distribution(role, user_id)
-    
-    return render_template('dashboard.html', kpis=kpis, g_estado=grafico_estado, g_cat=grafico_cat)
+
+    # Consultas diferidas: solo corren si el fragmento no está en caché
+    return render_template(
+        'dashboard.html', alcance=_alcance_rol(),
+        cargar_kpis=lambda: repo.get_dashboard_kpis(role, user_id),
+        cargar_graficos=lambda: (repo.get_status_distribution(role, user_id),
+                                 repo.get_category_distribution(role, user_id))
+    )
 
 # --- TICKETS ---
-@app.route('/soportes')
-@login_required
-def lista_soportes():
-    db = get_db()
-    
-    # Filtros de búsqueda
+def _filtros_soportes():
+    """Filtros de la lista de tickets a partir de la query string, con la visibilidad del rol."""
     f_estado = request.args.get('estado')
-    
+
     # Construir filtros para el repositorio
     filters = {}
     if f_estado and f_estado != 'Todos':
         filters['estado'] = f_estado
-    
+
     # RESTRICCIÓN DE VISIBILIDAD: Solo los usuarios estándar ven solo sus propios tickets
     # Administradores y Técnicos ven todo.
     if session.get('role') == 'user':
         filters['usuario_id'] = session['user_id']
-    
-    # Obtener tickets usando el servicio con los filtros aplicados
-    tickets = ticket_service.repository.list_tickets(filters=filters)
+    return filters
+
+def _ticket_a_dict(t):
+    return {
+        'id': str(t.id),
+        'numero_ticket': t.numero_ticket,
+        'usuario_id': str(t.usuario_id),
+        'nombre_usuario': t.nombre_usuario,
+        'problema': t.problema,
+        'categoria': t.categoria,
+        'prioridad': t.prioridad.value,
+        'estado': t.estado.value,
+        'nombre_tecnico': t.nombre_tecnico,
+        'nombre_equipo': t.nombre_equipo,
+        'fecha_creacion': str(t.fecha_creacion) if t.fecha_creacion else None,
+        'fecha_finalizacion': str(t.fecha_finalizacion) if t.fecha_finalizacion else None
+    }
+
+@app.route('/soportes')
+@login_required
+def lista_soportes():
+    filters = _filtros_soportes()
+    busqueda = (request.args.get('q') or '').strip()
+
+    if busqueda:
+        # Búsqueda de texto completo (FTS5): resultados por relevancia, paginados por número
+        pagina_busqueda = request.args.get('page', 1, type=int)
+
+        def cargar_listado():
+            return repo.search_tickets(busqueda, filters=filters, page=pagina_busqueda, per_page=PER_PAGE)
+    else:
+        # Paginación por cursor (fecha_creacion, id): solo se carga la página visible.
+        # El cursor se valida aquí; la consulta se difiere al fragmento cacheado.
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except ValueError:
+                return redirect(url_for('lista_soportes', estado=request.args.get('estado')))
+
+        def cargar_listado():
+            return ticket_service.repository.list_tickets_page(filters=filters, limit=PER_PAGE, cursor=cursor)
     
     # Calcular estadísticas para el banner (también respetando la visibilidad)
+    # en una sola consulta agregada; diferida, el banner se cachea por alcance.
     stats_filters = {}
     if session.get('role') == 'user':
         stats_filters['usuario_id'] = session['user_id']
-        
-    stats = {
-        'total': len(ticket_service.repository.list_tickets(stats_filters)),
-        'abiertos': len(ticket_service.repository.list_tickets({**stats_filters, 'estado': 'Abierto'})),
-        'en_proceso': len(ticket_service.repository.list_tickets({**stats_filters, 'estado': 'En Proceso'})),
-        'resueltos': len(ticket_service.repository.list_tickets({**stats_filters, 'estado': 'Resuelto'}))
-    }
+
+    def cargar_stats():
+        conteo = ticket_service.repository.count_tickets_by_status(stats_filters)
+        return {
+            'total': sum(conteo.values()),
+            'abiertos': conteo.get('Abierto', 0),
+            'en_proceso': conteo.get('En Proceso', 0),
+            'resueltos': conteo.get('Resuelto', 0)
+        }
     
-    tecnicos = repo.list_users(filters={'roles': ['admin', 'tecnico']})
+    tecnicos = identidades.list_staff()
     
-    return render_template('lista_soportes.html', soportes=tickets, tecnicos=tecnicos, stats=stats, categorias=CATEGORIAS, prioridades=PRIORIDADES, estados=ESTADOS)
+    return render_template('lista_soportes.html', cargar_listado=cargar_listado, busqueda=busqueda, tecnicos=tecnicos, cargar_stats=cargar_stats, alcance=_alcance_rol(), categorias=CATEGORIAS, prioridades=PRIORIDADES, estados=ESTADOS)
+
+@app.route('/api/soportes')
+@login_required
+def api_soportes():
+    """Una página de tickets en JSON; el cliente sigue `next_cursor` hasta que sea null."""
+    limit = min(request.args.get('limit', PER_PAGE, type=int), 500)
+    try:
+        pagina = repo.list_tickets_page(filters=_filtros_soportes(), limit=max(limit, 1),
+                                        cursor=request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'items': [_ticket_a_dict(t) for t in pagina.items], 'next_cursor': pagina.next_cursor})
+
+@app.route('/api/soportes/stream')
+@login_required
+def api_soportes_stream():
+    """Todas las páginas visibles como NDJSON (una página por línea), sin cargar la tabla en memoria."""
+    filters = _filtros_soportes()
+    limit = min(request.args.get('limit', 500, type=int), 500)
+
+    def generar():
+        cursor = None
+        while True:
+            pagina = repo.list_tickets_page(filters=filters, limit=max(limit, 1), cursor=cursor)
+            yield json.dumps({'items': [_ticket_a_dict(t) for t in pagina.items],
+                              'next_cursor': pagina.next_cursor}) + '\n'
+            if not pagina.has_more:
+                break
+            cursor = pagina.next_cursor
+
+    return Response(stream_with_context(generar()), mimetype='application/x-ndjson')
+
+def _cediendo(tickets, cada=250):
+    """Cede el turno cada `cada` filas (time.sleep está parcheado por eventlet en el worker)."""
+    for i, ticket in enumerate(tickets, 1):
+        if i % cada == 0:
+            time.sleep(0)
+        yield ticket
+
+@app.route('/soportes/export')
+@login_required
+def exportar_soportes():
+    """Exporta los tickets visibles (mismos filtros que la lista) sin cargarlos todos en memoria."""
+    formato = request.args.get('format', 'csv')
+    filters = _filtros_soportes()
+    nombre = f"soportes_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}"
+
+    if formato == 'csv':
+        # Sin Content-Length: el servidor lo envía con chunked transfer a medida que se genera.
+        # iter_tickets lee por páginas y devuelve la conexión entre una y otra, así una
+        # descarga lenta no retiene una conexión del pool ni un snapshot del WAL.
+        return Response(stream_with_context(iter_csv(repo.iter_tickets(filters=filters))), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename={nombre}.csv'})
+    if formato == 'xlsx':
+        # openpyxl es Python puro (un hilo no lo sacaría del GIL): se limita el tamaño y se
+        # cede el worker entre páginas para no congelar las demás peticiones.
+        conteo = repo.count_tickets_by_status(filters)
+        total = conteo.get(filters['estado'], 0) if 'estado' in filters else sum(conteo.values())
+        if total > config.EXPORT_XLSX_MAX_ROWS:
+            flash(f'La exportación a Excel admite hasta {config.EXPORT_XLSX_MAX_ROWS} tickets ({total} con estos '
+                  'filtros). Usa CSV o filtra por estado.', 'warning')
+            filtros_lista = {clave: valor for clave, valor in request.args.items() if clave != 'format'}
+            return redirect(url_for('lista_soportes', **filtros_lista))
+        # openpyxl en modo write-only vuelca las filas a disco; se sirve el archivo temporal
+        archivo = tempfile.TemporaryFile()
+        write_xlsx(_cediendo(repo.iter_tickets(filters=filters, batch_size=500)), archivo)
+        archivo.seek(0)
+        return send_file(archivo, as_attachment=True, download_name=f"{nombre}.xlsx",
+                         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    return jsonify({'error': 'Formato no soportado (usa csv o xlsx)'}), 400
+
+# --- Reportes PDF (asíncronos) ---
+def _filtros_reporte():
+    """Filtros del panel de la lista (fechas y categoría) sobre la visibilidad de _filtros_soportes()."""
+    filters = _filtros_soportes()
+    for campo in ('fecha_inicio', 'fecha_fin'):
+        valor = request.args.get(campo)
+        if valor:
+            datetime.strptime(valor, '%Y-%m-%d')
+            filters[campo] = valor
+    categoria = request.args.get('categoria')
+    if categoria and categoria != 'Todos':
+        filters['categoria'] = categoria
+    return filters
+
+def _reporte_visible(job_id):
+    job = report_service.get_job(job_id)
+    if job and session.get('role') == 'user' and job.filters.get('usuario_id') != session['user_id']:
+        return None
+    return job
+
+def _reporte_a_dict(job):
+    datos = {'id': job.id, 'estado': job.estado, 'estado_url': url_for('estado_reporte', job_id=job.id)}
+    if job.estado == 'Listo':
+        datos['filas'] = job.filas
+        datos['pdf_url'] = url_for('descargar_reporte', job_id=job.id)
+    elif job.estado == 'Error':
+        datos['error'] = job.error
+    return datos
+
+@app.route('/reportes/pdf', methods=['POST'])
+@login_required
+def solicitar_reporte_pdf():
+    """Encola el reporte (o devuelve el ya cacheado); el cliente consulta estado_url hasta que esté listo."""
+    try:
+        filters = _filtros_reporte()
+    except ValueError:
+        return jsonify({'error': 'Fecha inválida'}), 400
+    job = report_service.request_report(filters)
+    return jsonify(_reporte_a_dict(job)), 202 if job.estado == 'Pendiente' else 200
+
+@app.route('/reportes/<job_id>')
+@login_required
+def estado_reporte(job_id):
+    job = _reporte_visible(job_id)
+    if not job:
+        return jsonify({'error': 'Reporte no encontrado'}), 404
+    return jsonify(_reporte_a_dict(job))
+
+@app.route('/reportes/<job_id>/pdf')
+@login_required
+def descargar_reporte(job_id):
+    job = _reporte_visible(job_id)
+    if not job or job.estado != 'Listo':
+        flash('El reporte no está disponible.', 'warning')
+        return redirect(url_for('lista_soportes'))
+    return send_file(job.path, mimetype='application/pdf', as_attachment=True,
+                     download_name=f"reporte_soportes_{datetime.now().strftime('%Y-%m-%d')}.pdf")
 
 @app.route('/agregar', methods=['GET', 'POST'])
 @login_required
 def agregar():
-    db = get_db()
     if request.method == 'POST':
         usuario_reporta_id = UUID(request.form.get('usuario_id'))
         
@@ -218,7 +610,7 @@ def agregar():
         
         ticket = repo.create_ticket(nuevo_ticket)
         
-        usuario_reporta = repo.get_user_by_id(usuario_reporta_id)
+        usuario_reporta = identidades.get_user(usuario_reporta_id)
         
         if usuario_reporta and usuario_reporta.email:
             # Enviamos al usuario y al administrador de TI
@@ -244,18 +636,14 @@ def agregar():
             )
             flash(f'✅ Ticket #{ticket.numero_ticket} creado.', 'success')
             
+        auditar('TICKET_CREADO', ticket_id=str(ticket.id), numero=ticket.numero_ticket)
         # Emitir evento en tiempo real (para todos los casos)
-        socketio.emit('new_ticket', {
-            'id': str(ticket.id),
-            'numero': ticket.numero_ticket,
-            'titulo': ticket.problema[:50] + '...',
-            'prioridad': ticket.prioridad.value
-        })
+        _publicar_ticket('creado', ticket.id)
         
         return redirect(url_for('lista_soportes'))
     
     if session['role'] in ['admin', 'tecnico']:
-        usuarios = repo.list_users()
+        usuarios = identidades.list_users()
     else:
         usuarios = [{"id": session['user_id'], "username": session['username']}]
     return render_template('agregar.html', categorias=CATEGORIAS, prioridades=PRIORIDADES, usuarios=usuarios)
@@ -267,7 +655,6 @@ def editar(ticket_id):
     if not ticket or (session['role'] == 'user' and ticket.usuario_id != session['user_id']):
         return redirect(url_for('lista_soportes'))
 
-    db = get_db()
     if request.method == 'POST':
         if session['role'] == 'user':
             if ticket.estado != TicketStatus.ABIERTO:
@@ -278,6 +665,7 @@ def editar(ticket_id):
             ticket.prioridad = TicketPriority(request.form['prioridad'])
             
             repo.update_ticket(ticket)
+            auditar('TICKET_EDITADO', ticket_id=ticket_id, numero=ticket.numero_ticket)
             flash('Ticket actualizado.', 'success')
         else:
             estado_anterior = ticket.estado
@@ -287,7 +675,7 @@ def editar(ticket_id):
             
             if estado_nuevo_str in ['Resuelto', 'Cerrado'] and not solucion:
                 flash('⚠️ Para cerrar el ticket, debes documentar la solución.', 'warning')
-                tecnicos = repo.list_users(filters={'roles': ['admin', 'tecnico']})
+                tecnicos = identidades.list_staff()
                 return render_template('editar.html', ticket=ticket, tecnicos=tecnicos, estados=ESTADOS, categorias=CATEGORIAS, prioridades=PRIORIDADES)
             
             ticket.estado = TicketStatus(estado_nuevo_str)
@@ -296,10 +684,13 @@ def editar(ticket_id):
             ticket.fecha_finalizacion = datetime.now().strftime("%Y-%m-%d %H:%M:%S") if ticket.estado in [TicketStatus.RESUELTO, TicketStatus.CERRADO] else None
             
             repo.update_ticket(ticket)
+            auditar('TICKET_GESTIONADO', ticket_id=ticket_id, numero=ticket.numero_ticket,
+                    estado_anterior=estado_anterior.value, estado=ticket.estado.value,
+                    tecnico_id=tecnico_id_str or None)
             
             # --- NOTIFICACIONES POR CAMBIO DE ESTADO ---
             if ticket.estado != estado_anterior:
-                usuario_dueno = repo.get_user_by_id(ticket.usuario_id)
+                usuario_dueno = identidades.get_user(ticket.usuario_id)
                 
                 if usuario_dueno and usuario_dueno.email:
                     # Si ya está resuelto/cerrado, usamos la plantilla de cierre detallada
@@ -329,15 +720,20 @@ def editar(ticket_id):
             else:
                 flash('Gestión actualizada.', 'success')
 
+        _publicar_ticket('actualizado', ticket.id)
         return redirect(url_for('lista_soportes'))
 
-    tecnicos = db.execute("SELECT id, username FROM usuarios WHERE role IN ('admin', 'tecnico')").fetchall()
+    tecnicos = identidades.list_staff()
     return render_template('editar.html', ticket=ticket, tecnicos=tecnicos, estados=ESTADOS, categorias=CATEGORIAS, prioridades=PRIORIDADES)
 
 @app.route('/soportes/eliminar/<ticket_id>', methods=['POST'])
 @admin_required
 def eliminar_soporte(ticket_id):
-    repo.delete_ticket(UUID(ticket_id))
+    ticket = repo.get_ticket_by_id(UUID(ticket_id))
+    if ticket and repo.delete_ticket(ticket.id):
+        auditar('TICKET_ELIMINADO', ticket_id=ticket_id, numero=ticket.numero_ticket)
+        ticket_events.publish('eliminado', {'id': str(ticket.id), 'usuario_id': str(ticket.usuario_id),
+                                            'numero_ticket': ticket.numero_ticket})
     flash('Ticket eliminado.', 'warning')
     return redirect(url_for('lista_soportes'))
 
@@ -345,35 +741,17 @@ def eliminar_soporte(ticket_id):
 @app.route('/equipos')
 @login_required
 def lista_equipos():
-    db = get_db() # Still need DB for users list and types
-    equipos = repo.list_equipos()
-    
-    # Adding username manually for now or via a ReadModel if preferred
-    equipos = repo.list_equipos()
-    # Enriquecemos con los nombres de usuario
-    for e in equipos:
-        if e.usuario_asignado_id:
-            user = repo.get_user_by_id(e.usuario_asignado_id)
-            setattr(e, 'usuario_asignado', user.username if user else None)
-        else:
-            setattr(e, 'usuario_asignado', None)
-
-    tipos = list(set([e.tipo for e in equipos if e.tipo]))
-    return render_template('lista_equipos.html', equipos=equipos, tipos=tipos)
+    # Una sola consulta (equipos con el usuario asignado ya unido), diferida: si la
+    # tabla está en caché para la versión actual de equipos/usuarios no se ejecuta
+    return render_template('lista_equipos.html', cargar_equipos=repo.list_equipment_read_models)
 
 @app.route('/equipos/ver/<equipo_id>')
 @login_required
 def ver_equipo(equipo_id):
-    equipo = repo.get_equipment_by_id(UUID(equipo_id))
+    equipo = repo.get_equipment_read_model(UUID(equipo_id))
     if not equipo:
         flash('Equipo no encontrado.', 'danger')
         return redirect(url_for('lista_equipos'))
-    
-    if equipo.usuario_asignado_id:
-        user = repo.get_user_by_id(equipo.usuario_asignado_id)
-        if user:
-            setattr(equipo, 'usuario_asignado', user.username)
-            setattr(equipo, 'departamento', user.departamento)
 
     historial = repo.list_mantenimientos(filters={'equipo_id': equipo_id})
     return render_template('ver_equipo.html', equipo=equipo, historial=historial)
@@ -383,7 +761,6 @@ def ver_equipo(equipo_id):
 @admin_required
 def gestion_equipo(equipo_id=None):
     equipo = repo.get_equipment_by_id(UUID(equipo_id)) if equipo_id else None
-    db = get_db()
 
     if request.method == 'POST':
         try:
@@ -402,6 +779,7 @@ def gestion_equipo(equipo_id=None):
                 equipo.usuario_asignado_id = UUID(request.form.get('usuario_asignado_id')) if request.form.get('usuario_asignado_id') else None
                 
                 repo.update_equipment(equipo)
+                auditar('EQUIPO_EDITADO', equipo_id=str(equipo.id), nombre=equipo.nombre_equipo)
                 flash('Equipo actualizado correctamente.', 'success')
             else:
                 nuevo_equipo = Equipment(
@@ -419,6 +797,7 @@ def gestion_equipo(equipo_id=None):
                     usuario_asignado_id=UUID(request.form.get('usuario_asignado_id')) if request.form.get('usuario_asignado_id') else None
                 )
                 repo.create_equipment(nuevo_equipo)
+                auditar('EQUIPO_CREADO', equipo_id=str(nuevo_equipo.id), nombre=nuevo_equipo.nombre_equipo)
                 flash('Equipo registrado correctamente.', 'success')
             
             return redirect(url_for('lista_equipos'))
@@ -426,13 +805,14 @@ def gestion_equipo(equipo_id=None):
         except sqlite3.IntegrityError:
             flash('Error: El nombre del equipo o serie ya existe.', 'danger')
 
-    usuarios = repo.list_users()
+    usuarios = identidades.list_users()
     return render_template('formulario_equipo.html', equipo=equipo, usuarios=usuarios)
 
 @app.route('/equipos/eliminar/<equipo_id>', methods=['POST'])
 @admin_required
 def eliminar_equipo(equipo_id):
-    repo.delete_equipment(UUID(equipo_id))
+    if repo.delete_equipment(UUID(equipo_id)):
+        auditar('EQUIPO_ELIMINADO', equipo_id=equipo_id)
     return redirect(url_for('lista_equipos'))
 
 # --- MANTENIMIENTOS (USANDO SEND_EMAIL UNIFICADO) ---
@@ -461,30 +841,60 @@ def lista_mantenimientos():
 def ver_calendario():
     return render_template('calendario.html')
 
+# Respuestas del calendario por ventana visible. La clave incluye las versiones de
+# mantenimientos y equipos, así que cualquier escritura deja obsoletas las entradas previas.
+eventos_cache = LRUCache(maxsize=config.EVENTOS_CACHE_SIZE)
+
+def _fecha_ventana(valor):
+    # FullCalendar envía start/end en ISO 8601 con hora y zona; basta la fecha
+    fecha = (valor or '')[:10]
+    if fecha:
+        datetime.strptime(fecha, '%Y-%m-%d')
+    return fecha
+
 @app.route('/api/eventos')
 @login_required
 def api_eventos():
-    eventos_db = repo.list_mantenimientos()
-    eventos = []
-    for ev in eventos_db:
-        color = '#ffc107' if ev['estado'] == 'Pendiente' else '#198754'
-        text_color = '#000000' if ev['estado'] == 'Pendiente' else '#ffffff'
-        eventos.append({
-            'id': str(ev['id']), 
-            'title': f"{ev['nombre_equipo']}: {ev['titulo']}", 
-            'start': ev['fecha_programada'], 
-            'color': color, 
-            'textColor': text_color, 
-            'url': url_for('lista_mantenimientos') + f"?id={ev['id']}"
-        })
-    return jsonify(eventos)
+    try:
+        inicio = _fecha_ventana(request.args.get('start'))
+        fin = _fecha_ventana(request.args.get('end'))
+    except ValueError:
+        return jsonify({'error': 'Rango de fechas inválido'}), 400
+
+    clave = (inicio, fin, repo.data_version('mantenimientos'), repo.data_version('equipos'))
+    entrada = eventos_cache.get(clave)
+    if entrada is None:
+        filtros = {'fecha_inicio': inicio, 'fecha_fin': fin} if inicio and fin else None
+        eventos = []
+        for ev in repo.list_mantenimientos(filters=filtros):
+            color = '#ffc107' if ev['estado'] == 'Pendiente' else '#198754'
+            text_color = '#000000' if ev['estado'] == 'Pendiente' else '#ffffff'
+            eventos.append({
+                'id': str(ev['id']), 
+                'title': f"{ev['nombre_equipo']}: {ev['titulo']}", 
+                'start': ev['fecha_programada'], 
+                'color': color, 
+                'textColor': text_color, 
+                'url': url_for('lista_mantenimientos') + f"?id={ev['id']}"
+            })
+        cuerpo = json.dumps(eventos).encode('utf-8')
+        entrada = (cuerpo, hashlib.sha1(cuerpo).hexdigest(), datetime.now(timezone.utc).replace(microsecond=0))
+        eventos_cache.set(clave, entrada)
+
+    cuerpo, etag, modificado = entrada
+    response = Response(cuerpo, mimetype='application/json')
+    response.set_etag(etag)
+    response.last_modified = modificado
+    # Privada (requiere sesión) y siempre revalidada: el navegador reusa su copia con un 304
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/mantenimientos/programar', methods=['GET', 'POST'])
 @login_required
 def programar_mantenimiento():
     if session['role'] == 'user': return redirect(url_for('dashboard'))
     
-    db = get_db()
     # Pre-fill date from calendar if provided
     fecha_predefinida = request.args.get('fecha')
     
@@ -495,11 +905,12 @@ def programar_mantenimiento():
         mant_id = str(uuid.uuid4())
         
         repo.create_maintenance(mant_id, equipo_id, titulo, fecha)
+        auditar('MANTENIMIENTO_PROGRAMADO', mantenimiento_id=mant_id, equipo_id=equipo_id, fecha=fecha)
         
         # Notificar usando send_email
         equipo = repo.get_equipment_by_id(UUID(equipo_id))
         if equipo and equipo.usuario_asignado_id:
-            user = repo.get_user_by_id(equipo.usuario_asignado_id)
+            user = identidades.get_user(equipo.usuario_asignado_id)
             if user and user.email:
                 send_email(
                     to=user.email,
@@ -530,15 +941,15 @@ def reprogramar_mantenimiento(mant_id):
     motivo = request.form['motivo']
     
     repo.update_maintenance(mant_id, {'fecha_programada': nova_fecha, 'motivo_reprogramacion': motivo})
+    auditar('MANTENIMIENTO_REPROGRAMADO', mantenimiento_id=mant_id, fecha=nova_fecha, motivo=motivo)
     
     # Notificar
-    mantenimientos = repo.list_mantenimientos()
-    datos = next((m for m in mantenimientos if str(m['id']) == str(mant_id)), None)
+    datos = repo.get_maintenance_by_id(mant_id)
     
     if datos:
-        equipo = repo.get_equipment_by_id(UUID(datos['equipo_id']))
+        equipo = repo.get_equipment_by_id(datos.equipo_id)
         if equipo and equipo.usuario_asignado_id:
-            user = repo.get_user_by_id(equipo.usuario_asignado_id)
+            user = identidades.get_user(equipo.usuario_asignado_id)
             if user and user.email:
                 send_email(
                     to=user.email,
@@ -546,7 +957,7 @@ def reprogramar_mantenimiento(mant_id):
                     template='email_mantenimiento_cambio.html',
                     usuario=user.username, 
                     equipo=equipo.nombre_equipo, 
-                    tarea=datos['titulo'], 
+                    tarea=datos.titulo, 
                     nueva_fecha=nova_fecha,
                     motivo=motivo
                 )
@@ -569,15 +980,15 @@ def mover_mantenimiento():
     motivo = data.get('motivo')
     
     repo.update_maintenance(mant_id, {'fecha_programada': nueva_fecha, 'motivo_reprogramacion': motivo})
+    auditar('MANTENIMIENTO_REPROGRAMADO', mantenimiento_id=mant_id, fecha=nueva_fecha, motivo=motivo)
     
     # Notificar usando send_email
-    mantenimientos = repo.list_mantenimientos()
-    datos = next((m for m in mantenimientos if str(m['id']) == str(mant_id)), None)
+    datos = repo.get_maintenance_by_id(mant_id)
     
     if datos:
-        equipo = repo.get_equipment_by_id(UUID(datos['equipo_id']))
+        equipo = repo.get_equipment_by_id(datos.equipo_id)
         if equipo and equipo.usuario_asignado_id:
-            user = repo.get_user_by_id(equipo.usuario_asignado_id)
+            user = identidades.get_user(equipo.usuario_asignado_id)
             if user and user.email:
                 send_email(
                     to=user.email,
@@ -585,7 +996,7 @@ def mover_mantenimiento():
                     template='email_mantenimiento_cambio.html',
                     usuario=user.username, 
                     equipo=equipo.nombre_equipo, 
-                    tarea=datos['titulo'], 
+                    tarea=datos.titulo, 
                     nueva_fecha=nueva_fecha,
                     motivo=motivo
                 )
@@ -604,16 +1015,16 @@ def completar_mantenimiento(mant_id):
         'tecnico_asignado_id': str(session['user_id']), 
         'comentarios': comentarios
     })
+    auditar('MANTENIMIENTO_COMPLETADO', mantenimiento_id=mant_id)
     
     # Notificar al dueño del equipo
-    mantenimientos = repo.list_mantenimientos()
-    datos = next((m for m in mantenimientos if str(m['id']) == str(mant_id)), None)
+    datos = repo.get_maintenance_by_id(mant_id)
     
     if datos:
-        equipo = repo.get_equipment_by_id(UUID(datos['equipo_id']))
+        equipo = repo.get_equipment_by_id(datos.equipo_id)
         if equipo and equipo.usuario_asignado_id:
-            user = repo.get_user_by_id(equipo.usuario_asignado_id)
-            tecnico = repo.get_user_by_id(UUID(str(session['user_id'])))
+            user = identidades.get_user(equipo.usuario_asignado_id)
+            tecnico = identidades.get_user(session['user_id'])
             if user and user.email:
                 send_email(
                     to=user.email,
@@ -621,7 +1032,7 @@ def completar_mantenimiento(mant_id):
                     template='email_mantenimiento_completado.html',
                     usuario=user.username, 
                     equipo=equipo.nombre_equipo, 
-                    tarea=datos['titulo'], 
+                    tarea=datos.titulo, 
                     tecnico=tecnico.username if tecnico else "Técnico",
                     comentarios=comentarios
                 )
@@ -639,6 +1050,7 @@ def completar_mantenimiento(mant_id):
 @admin_required
 def eliminar_mantenimiento(mant_id):
     repo.delete_maintenance(mant_id)
+    auditar('MANTENIMIENTO_ELIMINADO', mantenimiento_id=mant_id)
     return redirect(url_for('lista_mantenimientos'))
 
 # --- CONFIGURACIÓN ---
@@ -655,6 +1067,8 @@ def admin_config_email():
             config_to_save[campo] = valor
         
         repo.save_config(config_to_save)
+        # Sin valores: la contraseña SMTP no debe quedar en la auditoría
+        auditar('CONFIG_EMAIL', campos=sorted(config_to_save))
         flash('⚙️ Configuración guardada.', 'success')
         return redirect(url_for('admin_config_email'))
         
@@ -664,7 +1078,7 @@ def admin_config_email():
 @app.route('/admin/usuarios')
 @admin_required
 def admin_usuarios():
-    return render_template('admin_usuarios.html', usuarios=repo.list_users())
+    return render_template('admin_usuarios.html', usuarios=identidades.list_users())
 
 @app.route('/admin/usuarios/crear', methods=['GET', 'POST'])
 @admin_required
@@ -674,11 +1088,13 @@ def admin_crear_usuario():
             nuevo_usuario = User(
                 username=request.form['username'],
                 email=request.form.get('email'),
-                password_hash=generate_password_hash(request.form['password']),
+                password_hash=auth_service.hash_password(request.form['password']),
                 role=UserRole(request.form.get('role', 'user')),
                 departamento=request.form.get('departamento')
             )
             repo.create_user(nuevo_usuario)
+            auditar('USUARIO_CREADO', afectado_id=str(nuevo_usuario.id), username=nuevo_usuario.username,
+                    role=nuevo_usuario.role.value)
             flash('Usuario creado correctamente.', 'success')
             return redirect(url_for('admin_usuarios'))
         except Exception as e:
@@ -700,9 +1116,11 @@ def admin_editar_usuario(user_id):
             usuario.departamento = request.form.get('departamento')
             
             if request.form.get('password'):
-                usuario.password_hash = generate_password_hash(request.form['password'])
+                usuario.password_hash = auth_service.hash_password(request.form['password'])
             
             repo.update_user(usuario)
+            auditar('USUARIO_EDITADO', afectado_id=user_id, username=usuario.username, role=usuario.role.value,
+                    cambio_password=bool(request.form.get('password')))
             flash('Usuario actualizado correctamente.', 'success')
             return redirect(url_for('admin_usuarios'))
         except Exception as e:
@@ -715,7 +1133,8 @@ def admin_editar_usuario(user_id):
 def admin_eliminar_usuario(user_id):
     try:
         if str(user_id) != str(session['user_id']):
-            repo.delete_user(UUID(user_id))
+            if repo.delete_user(UUID(user_id)):
+                auditar('USUARIO_ELIMINADO', afectado_id=user_id)
             flash('Usuario eliminado.', 'warning')
         else:
             flash('No puedes eliminarte a ti mismo.', 'danger')
@@ -724,6 +1143,22 @@ def admin_eliminar_usuario(user_id):
     return redirect(url_for('admin_usuarios'))
 
 
+# --- Métricas (formato Prometheus) ---
+for _prefijo, _fuente in (('db_pool', pool), ('wal_checkpoint', wal_checkpointer), ('email_outbox', outbox_worker),
+                          ('mail_transport', mail_transport), ('eventos_cache', eventos_cache),
+                          ('reports', report_service), ('auth', auth_service), ('ticket_events', ticket_events),
+                          ('audit', audit_log), ('identity_cache', identidades),
+                          ('fragment_cache', fragmentos)):
+    metrics.register_collector(_prefijo, _fuente.stats)
+
+@app.route('/admin/metrics')
+def admin_metrics():
+    # Sesión de admin desde el navegador, o 'Authorization: Bearer <METRICS_TOKEN>' para el scraper
+    token = request.headers.get('Authorization', '')
+    por_token = bool(config.METRICS_TOKEN) and hmac.compare_digest(token, f"Bearer {config.METRICS_TOKEN}")
+    if not por_token and session.get('role') != 'admin':
+        return Response('Acceso denegado\n', status=403, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,99 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class AuthBusyError(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+def _eventlet_patched() -> bool:
+    # Only look at eventlet if something already imported it (gunicorn's eventlet worker does).
+    patcher = sys.modules.get('eventlet.patcher')
+    return patcher is not None and patcher.is_monkey_patched('thread')
+
+
+class AuthService:
+    """
+    Runs password hashing (scrypt/pbkdf2) outside the request's green thread.
+
+    Under eventlet a hash computed inline freezes every request and Socket.IO
+    connection in the worker, so calls are handed to real OS threads:
+    ``eventlet.tpool`` when the process is monkey-patched, a native
+    ``ThreadPoolExecutor`` otherwise. hashlib releases the GIL while hashing.
+
+    At most ``workers`` hashes run at once and at most ``max_pending`` may be
+    waiting; a caller that cannot get a slot within ``admission_timeout``
+    seconds gets ``AuthBusyError`` instead of piling up behind the others.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 32, admission_timeout: float = 5.0):
+        self.workers = workers
+        self.admission_timeout = admission_timeout
+        self._admission = threading.BoundedSemaphore(workers + max_pending)
+        self._slots = threading.BoundedSemaphore(workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {'verified': 0, 'failed': 0, 'hashed': 0, 'rejected': 0,
+                       'in_flight': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+
+    def verify_password(self, password_hash: str, password: str) -> bool:
+        ok = self._run(check_password_hash, password_hash, password)
+        with self._lock:
+            self._stats['verified' if ok else 'failed'] += 1
+        return ok
+
+    def hash_password(self, password: str) -> str:
+        hashed = self._run(generate_password_hash, password)
+        with self._lock:
+            self._stats['hashed'] += 1
+        return hashed
+
+    def _run(self, fn: Callable, *args):
+        if not self._admission.acquire(timeout=self.admission_timeout):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise AuthBusyError("Demasiadas autenticaciones en curso")
+        try:
+            with self._slots:
+                with self._lock:
+                    self._stats['in_flight'] += 1
+                start = time.perf_counter()
+                try:
+                    return self._offload(fn, *args)
+                finally:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with self._lock:
+                        self._stats['in_flight'] -= 1
+                        self._stats['total_ms'] += elapsed
+                        self._stats['max_ms'] = max(self._stats['max_ms'], elapsed)
+        finally:
+            self._admission.release()
+
+    def _offload(self, fn: Callable, *args):
+        if _eventlet_patched():
+            from eventlet import tpool
+            return tpool.execute(fn, *args)
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='auth')
+        return self._executor.submit(fn, *args).result()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+        calls = s['verified'] + s['failed'] + s['hashed']
+        s['avg_ms'] = round(s['total_ms'] / calls, 2) if calls else 0.0
+        s['total_ms'] = round(s['total_ms'], 2)
+        s['max_ms'] = round(s['max_ms'], 2)
+        s['mode'] = 'tpool' if _eventlet_patched() else 'threads'
+        return s
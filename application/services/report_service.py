@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def render_report(db_path: str, template_dir: str, filters: dict, output_path: str) -> int:
+    """
+    Renders templates/reporte_pdf.html to ``output_path`` and returns the row count.
+
+    Runs inside a worker process: it opens its own repository, renders Jinja and
+    lets WeasyPrint do the CPU-heavy layout, so the web process never blocks.
+    """
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+    from weasyprint import HTML
+    from infrastructure.persistence.repository import SQLiteRepository
+
+    repo = SQLiteRepository(db_path)
+    try:
+        soportes = repo.list_report_tickets(filters)
+    finally:
+        repo.pool.close()
+    env = Environment(loader=FileSystemLoader(template_dir), autoescape=select_autoescape(['html']))
+    html = env.get_template('reporte_pdf.html').render(
+        soportes=soportes,
+        start_date=filters.get('fecha_inicio'),
+        end_date=filters.get('fecha_fin'),
+        selected_category=filters.get('categoria', 'todas')
+    )
+    tmp_path = output_path + '.tmp'
+    HTML(string=html, base_url=template_dir).write_pdf(tmp_path)
+    os.replace(tmp_path, output_path)
+    return len(soportes)
+
+
+def render_in_subprocess(db_path: str, template_dir: str, filters: dict, output_path: str,
+                         timeout: Optional[float] = None) -> int:
+    """
+    Runs ``render_report`` in a fresh interpreter (``python -m application.services.report_service``).
+
+    A child started this way never re-imports the caller's ``__main__`` (``python app.py``
+    would otherwise boot a second copy of the app) nor inherits its sockets, pool or
+    green-thread hub.
+    """
+    payload = json.dumps({'db_path': db_path, 'template_dir': template_dir,
+                          'filters': filters, 'output_path': output_path})
+    proc = subprocess.run([sys.executable, '-m', 'application.services.report_service'],
+                          input=payload, capture_output=True, text=True, cwd=PROJECT_ROOT, timeout=timeout)
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"renderer exited with {proc.returncode}")
+    return int(proc.stdout.strip() or 0)
+
+
+@dataclass
+class ReportJob:
+    id: str
+    filters: dict
+    estado: str = "Pendiente"  # Pendiente | Listo | Error
+    path: Optional[str] = None
+    filas: int = 0
+    error: Optional[str] = None
+    last_used: float = 0.0  # time.monotonic() of the last request/poll/finish
+
+
+class ReportService:
+    """
+    Generates ticket PDF reports in worker processes and caches them on disk.
+
+    At most ``workers`` renders run at once; each one is a separate interpreter
+    driven from a small thread pool, so the request thread only enqueues work.
+
+    A report is identified by its filters plus the ``soportes``/``usuarios``
+    data versions, so any write produces a new key while unchanged data is
+    served from cache. Finished files are evicted least-recently-used once
+    they exceed ``max_bytes``. Data versions are per process, so the cache
+    directory is emptied on start-up.
+
+    Finished and failed jobs unused for ``ttl`` seconds are dropped, and so is
+    a finished job once a newer data version of the same filters is
+    requested. Only pending jobs are kept unconditionally, so ``_jobs`` stays
+    bounded in a long-running worker.
+    """
+
+    def __init__(self, repository, cache_dir: str, template_dir: str, workers: int = 2,
+                 max_bytes: int = 200 * 1024 * 1024, timeout: Optional[float] = 300,
+                 ttl: float = 3600, renderer: Callable = render_in_subprocess):
+        self.repository = repository
+        self.cache_dir = cache_dir
+        self.template_dir = template_dir
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.ttl = ttl
+        self.renderer = renderer
+
+        os.makedirs(cache_dir, exist_ok=True)
+        for name in os.listdir(cache_dir):
+            if name.endswith(('.pdf', '.pdf.tmp')):
+                os.remove(os.path.join(cache_dir, name))
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report')
+        self._jobs = {}
+        self._files = OrderedDict()  # job id -> size, least recently used first
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'renders': 0, 'errors': 0, 'evictions': 0, 'pruned': 0}
+
+    def cache_key(self, filters: dict) -> str:
+        versions = (self.repository.data_version('soportes'), self.repository.data_version('usuarios'))
+        raw = json.dumps([filters, versions], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def request_report(self, filters: dict) -> ReportJob:
+        """Returns the cached or in-flight job for ``filters``, submitting a render if needed."""
+        key = self.cache_key(filters)
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            job = self._jobs.get(key)
+            if job is not None and job.estado != 'Error':
+                job.last_used = now
+                if job.estado == 'Listo':
+                    self._files.move_to_end(key)
+                    self._stats['hits'] += 1
+                return job
+            # Older data versions of the same report will not be requested again.
+            for old in [j for j in self._jobs.values() if j.filters == filters and j.estado != 'Pendiente']:
+                self._discard(old.id)
+                self._stats['pruned'] += 1
+            job = ReportJob(id=key, filters=filters, path=os.path.join(self.cache_dir, f"{key}.pdf"),
+                            last_used=now)
+            self._jobs[key] = job
+            self._stats['renders'] += 1
+
+        future = self._executor.submit(self.renderer, self.repository.db_path, self.template_dir,
+                                       filters, job.path, self.timeout)
+        future.add_done_callback(lambda f, job=job: self._finished(job, f))
+        return job
+
+    def get_job(self, job_id: str) -> Optional[ReportJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.last_used = time.monotonic()
+                if job.estado == 'Listo':
+                    self._files.move_to_end(job_id)
+            return job
+
+    def _finished(self, job: ReportJob, future) -> None:
+        error = future.exception()
+        now = time.monotonic()
+        with self._lock:
+            job.last_used = now
+            if error is not None:
+                job.estado, job.error = 'Error', str(error)
+                self._stats['errors'] += 1
+            else:
+                job.filas = future.result()
+                job.estado = 'Listo'
+                self._files[job.id] = os.path.getsize(job.path)
+                self._evict()
+            self._prune(now)
+
+    def _discard(self, job_id: str) -> None:
+        # Caller must hold self._lock.
+        job = self._jobs.pop(job_id, None)
+        self._files.pop(job_id, None)
+        if job is not None and job.estado == 'Listo':
+            try:
+                os.remove(job.path)
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        total = sum(self._files.values())
+        while total > self.max_bytes and len(self._files) > 1:
+            job_id, size = next(iter(self._files.items()))
+            self._discard(job_id)
+            total -= size
+            self._stats['evictions'] += 1
+
+    def _prune(self, now: float) -> None:
+        expired = [job.id for job in self._jobs.values()
+                   if job.estado != 'Pendiente' and now - job.last_used > self.ttl]
+        for job_id in expired:
+            self._discard(job_id)
+            self._stats['pruned'] += 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            s['cached_files'] = len(self._files)
+            s['cached_bytes'] = sum(self._files.values())
+            s['pending'] = sum(1 for j in self._jobs.values() if j.estado == 'Pendiente')
+            s['jobs'] = len(self._jobs)
+        return s
+
+
+if __name__ == '__main__':
+    args = json.load(sys.stdin)
+    print(render_report(args['db_path'], args['template_dir'], args['filters'], args['output_path']))
@@ -0,0 +1,96 @@
+"""
+Compara dos corridas de benchmarks.run y marca regresiones.
+
+Un caso es regresión cuando su p50 o su p95 empeora más que el umbral
+relativo y además más que un mínimo absoluto (para que el ruido en casos de
+microsegundos no dispare falsos positivos). También avisa si las dos corridas
+usaron datos distintos, porque entonces los tiempos no son comparables.
+Sale con código 1 si hay regresiones, para poder usarlo en CI.
+
+Uso: python -m benchmarks.compare base.json nuevo.json [--umbral 0.10] [--minimo-ms 0.05]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+METRICAS = ('p50_ms', 'p95_ms')
+
+
+def _cambio(antes, despues):
+    return (despues - antes) / antes if antes else 0.0
+
+
+def comparar(base, nuevo, umbral=0.10, minimo_ms=0.05):
+    """Devuelve (filas, avisos): una fila por caso presente en ambas corridas."""
+    avisos = []
+    datos_base, datos_nuevo = base['meta'].get('datos'), nuevo['meta'].get('datos')
+    if datos_base != datos_nuevo:
+        avisos.append(f"Las corridas usan datos distintos: {datos_base} vs {datos_nuevo}")
+    for clave in ('python', 'sqlite'):
+        if base['meta'].get(clave) != nuevo['meta'].get(clave):
+            avisos.append(f"Versión de {clave} distinta: {base['meta'].get(clave)} vs {nuevo['meta'].get(clave)}")
+
+    faltantes = [nombre for nombre in base['results'] if nombre not in nuevo['results']]
+    if faltantes:
+        avisos.append(f"{len(faltantes)} caso(s) de la base no están en la corrida nueva: {', '.join(faltantes)}")
+
+    filas = []
+    for nombre, antes in base['results'].items():
+        despues = nuevo['results'].get(nombre)
+        if despues is None:
+            continue
+        fila = {'caso': nombre, 'regresion': False, 'mejora': False}
+        for metrica in METRICAS:
+            cambio = _cambio(antes[metrica], despues[metrica])
+            delta = despues[metrica] - antes[metrica]
+            fila[metrica] = (antes[metrica], despues[metrica], cambio)
+            if cambio > umbral and delta > minimo_ms:
+                fila['regresion'] = True
+            elif cambio < -umbral and -delta > minimo_ms:
+                fila['mejora'] = True
+        fila['mejora'] = fila['mejora'] and not fila['regresion']
+        fila['alloc_peak_kib_p50'] = (antes.get('alloc_peak_kib_p50', 0.0), despues.get('alloc_peak_kib_p50', 0.0))
+        filas.append(fila)
+    for nombre in nuevo['results']:
+        if nombre not in base['results']:
+            avisos.append(f"{nombre}: caso nuevo, sin base para comparar")
+    return filas, avisos
+
+
+def imprimir_comparacion(filas, avisos):
+    for aviso in avisos:
+        print(f"⚠️ {aviso}")
+    print(f"{'caso':<40} {'p50 base':>9} {'p50 nuevo':>10} {'Δ p50':>8} {'p95 base':>9} {'p95 nuevo':>10} "
+          f"{'Δ p95':>8} {'pico KiB':>17}")
+    for fila in filas:
+        p50, p95 = fila['p50_ms'], fila['p95_ms']
+        marca = 'REGRESIÓN' if fila['regresion'] else 'mejora' if fila['mejora'] else ''
+        pico_antes, pico_despues = fila['alloc_peak_kib_p50']
+        print(f"{fila['caso']:<40} {p50[0]:9.3f} {p50[1]:10.3f} {p50[2]:+8.1%} {p95[0]:9.3f} {p95[1]:10.3f} "
+              f"{p95[2]:+8.1%} {pico_antes:8.1f}→{pico_despues:<8.1f} {marca}")
+    regresiones = sum(fila['regresion'] for fila in filas)
+    print(f"\n{regresiones} regresión(es), {sum(fila['mejora'] for fila in filas)} mejora(s) en {len(filas)} casos")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('base')
+    parser.add_argument('nuevo')
+    parser.add_argument('--umbral', type=float, default=0.10, help="Empeoramiento relativo tolerado (0.10 = 10%%)")
+    parser.add_argument('--minimo-ms', type=float, default=0.05, help="Empeoramiento absoluto mínimo para marcar")
+    args = parser.parse_args()
+
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.nuevo, encoding='utf-8') as f:
+        nuevo = json.load(f)
+    filas, avisos = comparar(base, nuevo, umbral=args.umbral, minimo_ms=args.minimo_ms)
+    imprimir_comparacion(filas, avisos)
+    sys.exit(1 if any(fila['regresion'] for fila in filas) else 0)
+
+
+if __name__ == '__main__':
+    main()
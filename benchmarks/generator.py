@@ -0,0 +1,195 @@
+"""
+Generador de datos sintéticos para los benchmarks.
+
+Llena una base nueva con el esquema de db_schema.SCHEMA_SQL (vía
+SQLiteRepository.init_schema, así triggers, FTS y secuencias quedan como en
+producción) con volúmenes configurables de usuarios, equipos, tickets y
+mantenimientos. Con la misma semilla y volúmenes el contenido es idéntico
+(ids incluidos; solo cambia el salt del hash de contraseña), para que dos
+corridas midan exactamente los mismos datos.
+
+Uso: python -m benchmarks.generator salida.db [--escala mediana] [--tickets 50000] [--seed 42]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from werkzeug.security import generate_password_hash
+
+from config import CATEGORIAS, ESTADOS, PRIORIDADES
+from infrastructure.persistence.repository import SQLiteRepository
+
+ESCALAS = {
+    'pequena': {'usuarios': 200, 'equipos': 150, 'tickets': 5000, 'mantenimientos': 1000},
+    'mediana': {'usuarios': 1000, 'equipos': 800, 'tickets': 50000, 'mantenimientos': 8000},
+    'grande': {'usuarios': 5000, 'equipos': 4000, 'tickets': 500000, 'mantenimientos': 40000},
+}
+
+# Cuentas fijas con las que el runner inicia sesión (una por rol)
+PASSWORD = 'bench'
+CUENTAS = (('bench_admin', 'admin'), ('bench_tecnico', 'tecnico'), ('bench_user', 'user'))
+
+# Fecha de referencia fija: los datos no dependen del día en que se generan
+HOY = date(2025, 6, 30)
+DIAS_HISTORIA = 730
+
+PALABRAS = ("impresora", "red", "correo", "outlook", "contraseña", "vpn", "pantalla", "teclado",
+            "lento", "no enciende", "error", "licencia", "wifi", "excel", "sap", "bloqueo",
+            "disco", "memoria", "actualización", "escáner", "toner", "cable", "servidor", "acceso")
+TIPOS_EQUIPO = ("Laptop", "Desktop", "Impresora", "Monitor", "Servidor", "Router")
+MARCAS = ("Dell Latitude", "HP ProBook", "Lenovo ThinkPad", "HP LaserJet", "Epson", "Cisco")
+DEPARTAMENTOS = ("Contabilidad", "Ventas", "Sistemas", "RRHH", "Logística", "Gerencia")
+
+
+def _uuid(rnd):
+    return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+
+def _texto(rnd, palabras=6):
+    return ' '.join(rnd.choice(PALABRAS) for _ in range(palabras))
+
+
+def _usuarios(rnd, n, password_hash):
+    filas = []
+    for i in range(n):
+        if i < len(CUENTAS):
+            username, role = CUENTAS[i]
+        else:
+            username = f"usuario{i:06d}"
+            r = rnd.random()
+            role = 'admin' if r < 0.01 else 'tecnico' if r < 0.05 else 'user'
+        filas.append((_uuid(rnd), username, f"{username}@bench.local", password_hash, role,
+                      rnd.choice(DEPARTAMENTOS)))
+    return filas
+
+
+def _equipos(rnd, n, usuarios):
+    filas = []
+    for i in range(n):
+        asignado = rnd.choice(usuarios)[0] if rnd.random() < 0.8 else None
+        filas.append((_uuid(rnd), f"EQ-{i:06d}", rnd.choice(TIPOS_EQUIPO), rnd.choice(MARCAS),
+                      f"SN{i:08d}", (HOY - timedelta(days=rnd.randrange(2000))).isoformat(),
+                      f"{rnd.choice((4, 8, 16, 32))} GB", asignado))
+    return filas
+
+
+def _tickets(rnd, n, usuarios, tecnicos, equipos):
+    inicio = datetime.combine(HOY, datetime.min.time()) - timedelta(days=DIAS_HISTORIA)
+    # Fechas crecientes con el número de ticket, como en producción
+    paso = DIAS_HISTORIA * 86400 / max(n, 1)
+    for i in range(n):
+        creado = inicio + timedelta(seconds=int(i * paso + rnd.random() * paso))
+        estado = rnd.choices(ESTADOS, weights=(15, 10, 35, 40))[0]
+        cerrado = estado in ('Resuelto', 'Cerrado')
+        yield (
+            _uuid(rnd), i + 1, rnd.choice(usuarios)[0],
+            rnd.choice(tecnicos)[0] if estado != 'Abierto' or rnd.random() < 0.3 else None,
+            rnd.choice(equipos)[0] if equipos and rnd.random() < 0.7 else None,
+            _texto(rnd, rnd.randint(4, 12)), estado,
+            rnd.choices(PRIORIDADES, weights=(20, 50, 20, 10))[0], rnd.choice(CATEGORIAS),
+            _texto(rnd, 8) if cerrado else None,
+            creado.strftime('%Y-%m-%d %H:%M:%S'),
+            (creado + timedelta(hours=rnd.randint(1, 240))).strftime('%Y-%m-%d %H:%M:%S') if cerrado else None,
+        )
+
+
+def _mantenimientos(rnd, n, equipos, tecnicos):
+    for _ in range(n):
+        # Un año hacia atrás y seis meses hacia adelante, como el calendario real
+        fecha = HOY + timedelta(days=rnd.randint(-365, 180))
+        estado = 'Realizado' if fecha < HOY and rnd.random() < 0.85 else 'Pendiente'
+        yield (_uuid(rnd), rnd.choice(equipos)[0], f"Mantenimiento {rnd.choice(('preventivo', 'correctivo'))}",
+               fecha.isoformat(), estado, rnd.choice(tecnicos)[0] if rnd.random() < 0.6 else None)
+
+
+def _en_lotes(filas, tamano=10000):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def generar(db_path, usuarios=200, equipos=150, tickets=5000, mantenimientos=1000, seed=42):
+    """Crea db_path desde cero y devuelve los volúmenes generados."""
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} ya existe; el generador solo crea bases nuevas")
+    usuarios = max(usuarios, len(CUENTAS))
+    rnd = random.Random(seed)
+
+    repo = SQLiteRepository(db_path)
+    repo.init_schema()
+
+    # Un solo hash para todas las cuentas: hashear N contraseñas dominaría la generación
+    password_hash = generate_password_hash(PASSWORD)
+    filas_usuarios = _usuarios(rnd, usuarios, password_hash)
+    tecnicos = [u for u in filas_usuarios if u[4] in ('tecnico', 'admin')]
+    filas_equipos = _equipos(rnd, equipos, filas_usuarios)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    with conn:
+        conn.executemany("INSERT INTO usuarios (id, username, email, password_hash, role, departamento) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", filas_usuarios)
+        conn.executemany("INSERT INTO equipos (id, nombre_equipo, tipo, marca_modelo, numero_serie, "
+                         "fecha_compra, memoria_ram, usuario_asignado_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         filas_equipos)
+    for lote in _en_lotes(_tickets(rnd, tickets, filas_usuarios, tecnicos, filas_equipos)):
+        with conn:
+            conn.executemany(
+                "INSERT INTO soportes (id, numero_ticket, usuario_id, tecnico_id, equipo_id, problema, estado, "
+                "prioridad, categoria, solucion, fecha_creacion, fecha_finalizacion) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", lote)
+    if filas_equipos:
+        for lote in _en_lotes(_mantenimientos(rnd, mantenimientos, filas_equipos, tecnicos)):
+            with conn:
+                conn.executemany("INSERT INTO mantenimientos (id, equipo_id, titulo, fecha_programada, estado, "
+                                 "tecnico_asignado_id) VALUES (?, ?, ?, ?, ?, ?)", lote)
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+    repo.sync_ticket_sequence()
+    return {'usuarios': usuarios, 'equipos': equipos, 'tickets': tickets,
+            'mantenimientos': mantenimientos if filas_equipos else 0, 'seed': seed}
+
+
+def agregar_argumentos_volumen(parser):
+    parser.add_argument('--escala', choices=sorted(ESCALAS), default='pequena')
+    for clave in ('usuarios', 'equipos', 'tickets', 'mantenimientos'):
+        parser.add_argument(f'--{clave}', type=int, help=f"Sobrescribe el volumen de {clave} de la escala")
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def volumenes(args):
+    datos = dict(ESCALAS[args.escala])
+    for clave in datos:
+        if getattr(args, clave) is not None:
+            datos[clave] = getattr(args, clave)
+    return datos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('salida', help="Ruta de la base a crear")
+    agregar_argumentos_volumen(parser)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    resumen = generar(args.salida, seed=args.seed, **volumenes(args))
+    print(f"Generado {args.salida} en {time.perf_counter() - start:.1f} s: {resumen}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+"""
+Suite de benchmarks reproducible.
+
+Genera (o copia) una base sintética en un directorio temporal, arranca la app
+sobre ella y mide los métodos de SQLiteRepository y las rutas principales
+(dashboard, lista_soportes, lista_equipos, api_eventos) con el test client de
+Flask, iniciando sesión con una cuenta por rol. Por caso se guardan
+p50/p95/p99 y estadísticas de memoria (pico y neto de tracemalloc por llamada,
+colecciones del GC) en un JSON que luego se compara con benchmarks.compare.
+
+Uso:
+  python -m benchmarks.run [--escala mediana] [--seed 42] [--iteraciones 200] [--salida base.json]
+  python -m benchmarks.run --db datos.db --solo ruta: --comparar base.json
+"""
+import argparse
+import gc
+import importlib
+import json
+import os
+import platform
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, NamedTuple, Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from benchmarks.compare import comparar, imprimir_comparacion
+from benchmarks.generator import CUENTAS, PASSWORD, agregar_argumentos_volumen, generar, volumenes
+
+# Ventana que pide FullCalendar al abrir el mes de la fecha de referencia del generador
+VENTANA_CALENDARIO = {'start': '2025-05-25T00:00:00-05:00', 'end': '2025-07-06T00:00:00-05:00'}
+BUSQUEDA = 'impresora'
+
+
+class Caso(NamedTuple):
+    nombre: str
+    ejecutar: Callable[[], object]
+    # Se llama antes de cada iteración, fuera del tiempo medido (p. ej. invalidar cachés)
+    preparar: Optional[Callable[[], None]] = None
+
+
+def percentil(ordenados, p):
+    """Percentil con interpolación lineal sobre una lista ya ordenada."""
+    if not ordenados:
+        return 0.0
+    k = (len(ordenados) - 1) * p / 100
+    bajo = int(k)
+    alto = min(bajo + 1, len(ordenados) - 1)
+    return ordenados[bajo] + (ordenados[alto] - ordenados[bajo]) * (k - bajo)
+
+
+def medir(caso, iteraciones, calentamiento, muestras_memoria):
+    for _ in range(calentamiento):
+        if caso.preparar:
+            caso.preparar()
+        caso.ejecutar()
+
+    tiempos = []
+    gc_antes = sum(s['collections'] for s in gc.get_stats())
+    for _ in range(iteraciones):
+        if caso.preparar:
+            caso.preparar()
+        inicio = time.perf_counter()
+        caso.ejecutar()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    gc_colecciones = sum(s['collections'] for s in gc.get_stats()) - gc_antes
+
+    # Memoria en una pasada aparte: tracemalloc multiplica el tiempo de cada llamada
+    picos, netos = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(muestras_memoria):
+            if caso.preparar:
+                caso.preparar()
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            caso.ejecutar()
+            actual, pico = tracemalloc.get_traced_memory()
+            picos.append((pico - base) / 1024)
+            netos.append((actual - base) / 1024)
+    finally:
+        tracemalloc.stop()
+
+    tiempos.sort()
+    picos.sort()
+    return {
+        'iterations': iteraciones,
+        'mean_ms': round(sum(tiempos) / len(tiempos), 4),
+        'min_ms': round(tiempos[0], 4),
+        'p50_ms': round(percentil(tiempos, 50), 4),
+        'p95_ms': round(percentil(tiempos, 95), 4),
+        'p99_ms': round(percentil(tiempos, 99), 4),
+        'max_ms': round(tiempos[-1], 4),
+        'alloc_peak_kib_p50': round(percentil(picos, 50), 1),
+        'alloc_peak_kib_max': round(picos[-1], 1) if picos else 0.0,
+        'alloc_net_kib_mean': round(sum(netos) / len(netos), 1) if netos else 0.0,
+        'gc_collections': gc_colecciones,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def preparar_base(args, directorio):
+    """Deja soportes_v2.db en el directorio de trabajo; devuelve los volúmenes usados."""
+    destino = os.path.join(directorio, 'soportes_v2.db')
+    if args.db:
+        # Se copia para que las corridas no modifiquen la base de referencia
+        with sqlite3.connect(args.db) as origen, sqlite3.connect(destino) as copia:
+            origen.backup(copia)
+        with sqlite3.connect(destino) as conn:
+            conteos = {tabla: conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+                       for tabla in ('usuarios', 'equipos', 'soportes', 'mantenimientos')}
+        return {'usuarios': conteos['usuarios'], 'equipos': conteos['equipos'], 'tickets': conteos['soportes'],
+                'mantenimientos': conteos['mantenimientos'], 'seed': None, 'db': os.path.abspath(args.db)}
+    inicio = time.perf_counter()
+    resumen = generar(destino, seed=args.seed, **volumenes(args))
+    print(f"Base sintética generada en {time.perf_counter() - inicio:.1f} s: {resumen}")
+    return resumen
+
+
+def cargar_app(directorio):
+    # app.py abre 'soportes_v2.db' relativo al directorio actual; sin workers de correo
+    os.environ.setdefault('MAIL_WORKERS', '0')
+    os.environ.setdefault('SLOW_QUERY_MS', '60000')
+    os.chdir(directorio)
+    return importlib.import_module('app')
+
+
+def clientes_por_rol(modulo_app):
+    clientes = {}
+    for username, role in CUENTAS:
+        cliente = modulo_app.app.test_client()
+        r = cliente.post('/login', data={'username': username, 'password': PASSWORD})
+        if r.status_code != 302:
+            raise RuntimeError(f"No se pudo iniciar sesión como {username} ({r.status_code})")
+        clientes[role] = cliente
+    return clientes
+
+
+def _get(cliente, ruta, **query):
+    def ejecutar():
+        r = cliente.get(ruta, query_string=query)
+        if r.status_code != 200:
+            raise RuntimeError(f"GET {ruta} devolvió {r.status_code}")
+        return r.data
+    return ejecutar
+
+
+def casos(modulo_app):
+    repo = modulo_app.repo
+    admin = repo.get_user_by_username(CUENTAS[0][0])
+    usuario = repo.get_user_by_username(CUENTAS[2][0])
+    filtros_usuario = {'usuario_id': str(usuario.id)}
+    ventana = {'fecha_inicio': VENTANA_CALENDARIO['start'][:10], 'fecha_fin': VENTANA_CALENDARIO['end'][:10]}
+    clientes = clientes_por_rol(modulo_app)
+
+    def invalidar_eventos():
+        # Fuerza el camino sin caché de /api/eventos, como tras reprogramar un mantenimiento
+        repo.bump_data_version('mantenimientos')
+
+    return [
+        Caso('repo:get_user_by_username', lambda: repo.get_user_by_username(CUENTAS[2][0])),
+        Caso('repo:list_tickets_page', lambda: repo.list_tickets_page(limit=15)),
+        Caso('repo:list_tickets_page[usuario]', lambda: repo.list_tickets_page(filtros_usuario, limit=15)),
+        Caso('repo:list_tickets_page[estado]', lambda: repo.list_tickets_page({'estado': 'Abierto'}, limit=15)),
+        Caso('repo:search_tickets', lambda: repo.search_tickets(BUSQUEDA)),
+        Caso('repo:count_tickets_by_status', lambda: repo.count_tickets_by_status()),
+        Caso('repo:get_dashboard_kpis[admin]', lambda: repo.get_dashboard_kpis('admin', admin.id)),
+        Caso('repo:get_dashboard_kpis[usuario]', lambda: repo.get_dashboard_kpis('user', usuario.id)),
+        Caso('repo:get_category_distribution', lambda: repo.get_category_distribution('admin', admin.id)),
+        Caso('repo:list_equipment_read_models', lambda: repo.list_equipment_read_models()),
+        Caso('repo:list_mantenimientos[ventana]', lambda: repo.list_mantenimientos(ventana)),
+        Caso('ruta:dashboard[admin]', _get(clientes['admin'], '/dashboard')),
+        Caso('ruta:dashboard[usuario]', _get(clientes['user'], '/dashboard')),
+        Caso('ruta:lista_soportes[admin]', _get(clientes['admin'], '/soportes')),
+        Caso('ruta:lista_soportes[tecnico]', _get(clientes['tecnico'], '/soportes', estado='Abierto')),
+        Caso('ruta:lista_soportes[usuario]', _get(clientes['user'], '/soportes')),
+        Caso('ruta:lista_soportes[busqueda]', _get(clientes['admin'], '/soportes', q=BUSQUEDA)),
+        Caso('ruta:lista_equipos', _get(clientes['admin'], '/equipos')),
+        Caso('ruta:api_eventos', _get(clientes['admin'], '/api/eventos', **VENTANA_CALENDARIO)),
+        Caso('ruta:api_eventos[sin_cache]', _get(clientes['admin'], '/api/eventos', **VENTANA_CALENDARIO),
+             preparar=invalidar_eventos),
+    ]
+
+
+def imprimir_resultados(resultados):
+    print(f"{'caso':<40} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'pico KiB':>10} {'GC':>5}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<40} {r['p50_ms']:9.3f} {r['p95_ms']:9.3f} {r['p99_ms']:9.3f} "
+              f"{r['alloc_peak_kib_p50']:10.1f} {r['gc_collections']:5d}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    agregar_argumentos_volumen(parser)
+    parser.add_argument('--db', help="Usa una base ya generada (se copia) en lugar de generar una")
+    parser.add_argument('--iteraciones', type=int, default=200)
+    parser.add_argument('--calentamiento', type=int, default=20)
+    parser.add_argument('--muestras-memoria', type=int, default=20, help="Llamadas medidas con tracemalloc")
+    parser.add_argument('--solo', help="Expresión regular: solo los casos cuyo nombre coincide")
+    parser.add_argument('--salida', help="JSON de resultados (por defecto benchmarks/resultados/<fecha>.json)")
+    parser.add_argument('--comparar', help="JSON de una corrida anterior contra la cual comparar")
+    parser.add_argument('--umbral', type=float, default=0.10, help="Regresión relativa tolerada (0.10 = 10%%)")
+    parser.add_argument('--conservar', action='store_true', help="No borra el directorio temporal")
+    args = parser.parse_args()
+
+    salida = os.path.abspath(args.salida or os.path.join(
+        PROJECT_ROOT, 'benchmarks', 'resultados', f"{datetime.now():%Y%m%d-%H%M%S}.json"))
+    base_comparacion = os.path.abspath(args.comparar) if args.comparar else None
+    if args.db:
+        args.db = os.path.abspath(args.db)
+    directorio = tempfile.mkdtemp(prefix='soportes-bench-')
+    try:
+        datos = preparar_base(args, directorio)
+        modulo_app = cargar_app(directorio)
+        seleccion = [c for c in casos(modulo_app) if not args.solo or re.search(args.solo, c.nombre)]
+
+        resultados = {}
+        for caso in seleccion:
+            resultados[caso.nombre] = medir(caso, args.iteraciones, args.calentamiento, args.muestras_memoria)
+        modulo_app.outbox_worker.stop()
+        modulo_app.wal_checkpointer.stop()
+    finally:
+        os.chdir(PROJECT_ROOT)
+        if args.conservar:
+            print(f"Directorio de trabajo conservado: {directorio}")
+        else:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+    informe = {
+        'meta': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'plataforma': platform.platform(),
+            'datos': datos,
+            'iteraciones': args.iteraciones,
+            'calentamiento': args.calentamiento,
+        },
+        'results': resultados,
+    }
+    os.makedirs(os.path.dirname(salida), exist_ok=True)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+
+    imprimir_resultados(resultados)
+    print(f"\nResultados en {salida}")
+
+    if base_comparacion:
+        with open(base_comparacion, encoding='utf-8') as f:
+            base = json.load(f)
+        filas, avisos = comparar(base, informe, umbral=args.umbral)
+        imprimir_comparacion(filas, avisos)
+        if any(fila['regresion'] for fila in filas):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
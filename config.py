@@ -18,6 +18,21 @@ class Config:
     
     # Base de Datos
     DB_FILE = os.environ.get('DB_NAME', 'soportes_v2.db')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 5)
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT') or 30)
+    DB_POOL_HEALTH_CHECK_INTERVAL = float(os.environ.get('DB_POOL_HEALTH_CHECK_INTERVAL') or 30)
+
+    # Perfil de almacenamiento SQLite (PRAGMAs aplicados a cada conexión)
+    DB_JOURNAL_MODE = os.environ.get('DB_JOURNAL_MODE', 'WAL')
+    DB_SYNCHRONOUS = os.environ.get('DB_SYNCHRONOUS', 'NORMAL')
+    DB_CACHE_SIZE = int(os.environ.get('DB_CACHE_SIZE') or -20000)
+    DB_MMAP_SIZE = int(os.environ.get('DB_MMAP_SIZE') or 268435456)
+    DB_TEMP_STORE = os.environ.get('DB_TEMP_STORE', 'MEMORY')
+    DB_BUSY_TIMEOUT = int(os.environ.get('DB_BUSY_TIMEOUT') or 5000)
+    # Solo si no corre el checkpointer en segundo plano (en WAL app.py lo pone en 0)
+    DB_WAL_AUTOCHECKPOINT = int(os.environ.get('DB_WAL_AUTOCHECKPOINT') or 1000)
+    DB_WAL_CHECKPOINT_INTERVAL = float(os.environ.get('DB_WAL_CHECKPOINT_INTERVAL') or 60)
+    DB_WAL_TRUNCATE_BYTES = int(os.environ.get('DB_WAL_TRUNCATE_BYTES') or 64 * 1024 * 1024)
     
     # Configuración de Flask-Mail
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
@@ -26,12 +41,69 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
+
+    # Cola de correo saliente (outbox) y workers de envío
+    MAIL_WORKERS = int(os.environ.get('MAIL_WORKERS') or 2)
+    MAIL_OUTBOX_BATCH = int(os.environ.get('MAIL_OUTBOX_BATCH') or 10)
+    MAIL_OUTBOX_POLL_INTERVAL = float(os.environ.get('MAIL_OUTBOX_POLL_INTERVAL') or 5)
+    MAIL_MAX_RETRIES = int(os.environ.get('MAIL_MAX_RETRIES') or 5)
+    MAIL_RETRY_BACKOFF = float(os.environ.get('MAIL_RETRY_BACKOFF') or 30)
+    # Correos en 'Enviando' más de este tiempo (proceso caído a mitad de envío) vuelven a la cola
+    MAIL_OUTBOX_STALE_SECONDS = float(os.environ.get('MAIL_OUTBOX_STALE_SECONDS') or 600)
+    MAIL_CONNECTION_IDLE_TIMEOUT = float(os.environ.get('MAIL_CONNECTION_IDLE_TIMEOUT') or 30)
+    # A partir de cuántos destinatarios un aviso sale como un solo mensaje en CCO
+    MAIL_BCC_MIN_RECIPIENTS = int(os.environ.get('MAIL_BCC_MIN_RECIPIENTS') or 5)
     
+    # Respuestas de /api/eventos cacheadas (una por ventana del calendario)
+    EVENTOS_CACHE_SIZE = int(os.environ.get('EVENTOS_CACHE_SIZE') or 64)
+
+    # Usuarios y técnicos cacheados en el proceso (se invalidan al crear/editar/borrar usuarios)
+    IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE') or 512)
+    IDENTITY_CACHE_TTL = float(os.environ.get('IDENTITY_CACHE_TTL') or 60)
+
+    # Hash de contraseñas fuera del event loop (hilos nativos) con control de admisión
+    AUTH_HASH_WORKERS = int(os.environ.get('AUTH_HASH_WORKERS') or 4)
+    AUTH_MAX_PENDING = int(os.environ.get('AUTH_MAX_PENDING') or 32)
+    AUTH_ADMISSION_TIMEOUT = float(os.environ.get('AUTH_ADMISSION_TIMEOUT') or 5)
+
+    # Eventos de tickets por Socket.IO: ventana (s) en la que se agrupan las ráfagas
+    SOCKETIO_COALESCE_WINDOW = float(os.environ.get('SOCKETIO_COALESCE_WINDOW') or 0.5)
+
+    # Auditoría: buffer en memoria escrito en lotes por un hilo; lo más viejo que
+    # AUDIT_RETENTION_DAYS se mueve a un archivo SQLite por mes (0 = no archivar)
+    AUDIT_BUFFER_SIZE = int(os.environ.get('AUDIT_BUFFER_SIZE') or 10000)
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE') or 500)
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL') or 1.0)
+    AUDIT_RETENTION_DAYS = int(os.environ.get('AUDIT_RETENTION_DAYS') or 365)
+
+    # Instrumentación: umbral del log de consultas lentas (con EXPLAIN QUERY PLAN)
+    # y token opcional para que Prometheus lea /admin/metrics sin sesión
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS') or 100)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or ''
+
     # Rutas de Archivos
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     STATIC_FOLDER = os.path.join(BASE_DIR, 'static')
     TEMPLATES_FOLDER = os.path.join(BASE_DIR, 'templates')
 
+    # Reportes PDF: se generan en procesos aparte y se cachean en disco
+    REPORTS_DIR = os.environ.get('REPORTS_DIR') or os.path.join(BASE_DIR, 'instance', 'reportes')
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS') or 2)
+    REPORT_CACHE_MAX_MB = int(os.environ.get('REPORT_CACHE_MAX_MB') or 200)
+    REPORT_TIMEOUT = int(os.environ.get('REPORT_TIMEOUT') or 300)
+    REPORT_CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL') or 3600)  # segundos sin uso antes de descartar
+
+    # Exportación XLSX: openpyxl es Python puro y corre en el worker; por encima de
+    # este número de filas se pide usar CSV (que se genera por páginas)
+    EXPORT_XLSX_MAX_ROWS = int(os.environ.get('EXPORT_XLSX_MAX_ROWS') or 10000)
+
+    # Plantillas compiladas en disco y caché de fragmentos HTML (tablas, KPIs, gráficos)
+    JINJA_BYTECODE_DIR = os.environ.get('JINJA_BYTECODE_DIR') or os.path.join(BASE_DIR, 'instance', 'jinja_cache')
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE') or 256)
+    FRAGMENT_CACHE_TTL = float(os.environ.get('FRAGMENT_CACHE_TTL') or 300)
+
+    AUDIT_ARCHIVE_DIR = os.environ.get('AUDIT_ARCHIVE_DIR') or os.path.join(BASE_DIR, 'instance', 'auditoria')
+
 class DevelopmentConfig(Config):
     DEBUG = True
 
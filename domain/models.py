@@ -49,6 +49,27 @@ class Equipment:
     usuario_asignado_id: Optional[UUID] = None
     id: UUID = field(default_factory=uuid4)
 
+@dataclass
+class EquipmentReadModel(Equipment):
+    usuario_asignado: Optional[str] = None
+    departamento: Optional[str] = None
+
+@dataclass
+class Maintenance:
+    equipo_id: UUID
+    titulo: str
+    fecha_programada: str
+    estado: str = "Pendiente"
+    tecnico_asignado_id: Optional[UUID] = None
+    motivo_reprogramacion: Optional[str] = None
+    comentarios: Optional[str] = None
+    id: UUID = field(default_factory=uuid4)
+
+@dataclass
+class MaintenanceReadModel(Maintenance):
+    nombre_equipo: Optional[str] = None
+    tecnico: Optional[str] = None
+
 @dataclass
 class Ticket:
     usuario_id: UUID
@@ -69,3 +90,150 @@ class TicketReadModel(Ticket):
     nombre_usuario: Optional[str] = None
     nombre_tecnico: Optional[str] = None
     nombre_equipo: Optional[str] = None
+
+@dataclass
+class OutboxEmail:
+    destinatarios: List[str]
+    asunto: str
+    cuerpo_html: str
+    copia_oculta: bool = False
+    id: Optional[int] = None
+    estado: str = "Pendiente"
+    intentos: int = 0
+    ultimo_error: Optional[str] = None
+
+
+@dataclass
+class AuditEntry:
+    accion: str
+    usuario_id: Optional[str] = None
+    detalles: Optional[str] = None  # JSON
+    fecha: Optional[str] = None  # 'YYYY-MM-DD HH:MM:SS' UTC, as CURRENT_TIMESTAMP
+
+
+_UNSET = object()
+
+
+class _RowField:
+    """Plain column read straight from the backing row."""
+    def __init__(self, column: str):
+        self.column = column
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj._row[self.column]
+
+
+class _LazyField:
+    """Column converted (UUID, Enum...) on first access and cached in a slot."""
+    def __init__(self, column: str, convert, nullable: bool = False):
+        self.column = column
+        self.convert = convert
+        self.nullable = nullable
+        self.slot = f"_{column}"
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        if value is _UNSET:
+            raw = obj._row[self.column]
+            value = None if (self.nullable and not raw) else self.convert(raw)
+            setattr(obj, self.slot, value)
+        return value
+
+
+class TicketRowView:
+    """
+    Read-only, slotted view over one joined ``soportes`` row.
+
+    Exposes the same attributes as TicketReadModel, but only keeps a reference
+    to the row: UUIDs and enums are parsed the first time a caller reads them,
+    so listing pages that only render a few columns skip most of the work.
+    Use ``to_read_model()`` when a full dataclass is needed.
+    """
+    __slots__ = ('_row', '_id', '_usuario_id', '_tecnico_id', '_equipo_id', '_prioridad', '_estado')
+
+    id = _LazyField('id', UUID)
+    usuario_id = _LazyField('usuario_id', UUID)
+    tecnico_id = _LazyField('tecnico_id', UUID, nullable=True)
+    equipo_id = _LazyField('equipo_id', UUID, nullable=True)
+    prioridad = _LazyField('prioridad', TicketPriority)
+    estado = _LazyField('estado', TicketStatus)
+
+    numero_ticket = _RowField('numero_ticket')
+    problema = _RowField('problema')
+    categoria = _RowField('categoria')
+    solucion = _RowField('solucion')
+    fecha_creacion = _RowField('fecha_creacion')
+    fecha_finalizacion = _RowField('fecha_finalizacion')
+    nombre_usuario = _RowField('nombre_usuario')
+    nombre_tecnico = _RowField('nombre_tecnico')
+    nombre_equipo = _RowField('nombre_equipo')
+
+    def __init__(self, row):
+        self._row = row
+        self._id = self._usuario_id = self._tecnico_id = self._equipo_id = _UNSET
+        self._prioridad = self._estado = _UNSET
+
+    def to_read_model(self) -> TicketReadModel:
+        return TicketReadModel(
+            id=self.id,
+            numero_ticket=self.numero_ticket,
+            usuario_id=self.usuario_id,
+            problema=self.problema,
+            categoria=self.categoria,
+            prioridad=self.prioridad,
+            tecnico_id=self.tecnico_id,
+            equipo_id=self.equipo_id,
+            estado=self.estado,
+            solucion=self.solucion,
+            fecha_creacion=self.fecha_creacion,
+            fecha_finalizacion=self.fecha_finalizacion,
+            nombre_usuario=self.nombre_usuario,
+            nombre_tecnico=self.nombre_tecnico,
+            nombre_equipo=self.nombre_equipo
+        )
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(numero_ticket={self.numero_ticket!r}, estado={self._row['estado']!r})"
+
+
+class TicketSearchHit(TicketRowView):
+    """TicketRowView plus the FTS rank and highlighted fragments of a search result."""
+    __slots__ = ()
+
+    problema_resaltado = _RowField('problema_resaltado')
+    solucion_resaltada = _RowField('solucion_resaltada')
+    rank = _RowField('rank')
+
+
+@dataclass
+class TicketPage:
+    items: List[TicketRowView]
+    next_cursor: Optional[str] = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+@dataclass
+class TicketSearchPage:
+    items: List[TicketSearchHit]
+    total: int
+    page: int
+    per_page: int
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.total // self.per_page))
+
+    @property
+    def has_prev(self) -> bool:
+        return self.page > 1
+
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.pages
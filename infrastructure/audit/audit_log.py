@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+from domain.models import AuditEntry
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+class AuditLogWriter:
+    """
+    Buffers audit entries in memory and writes them to ``auditoria_logs`` in batches.
+
+    ``record`` only appends to a bounded ring buffer, so a request pays no
+    extra insert or commit for auditing. A background thread writes whatever
+    has accumulated every ``flush_interval`` seconds (sooner once
+    ``batch_size`` entries are waiting), in one executemany transaction. A
+    failed batch goes back to the front of the buffer for the next attempt.
+    If the buffer overflows (the database is unavailable for long), the oldest
+    entries are dropped and counted in ``stats()['dropped']``.
+
+    The same thread runs retention every ``retention_interval`` seconds.
+    Whole calendar months older than ``retention_days`` are moved to
+    ``archive_dir/auditoria_<YYYY-MM>.db``, one partition per month.
+    """
+
+    def __init__(self, repository, capacity: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0, retention_days: Optional[int] = 365,
+                 archive_dir: Optional[str] = None, retention_interval: float = 6 * 3600):
+        self.repository = repository
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.archive_dir = archive_dir
+        self.retention_interval = retention_interval
+
+        self._buffer = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._next_retention = 0.0
+        self._stats = {'recorded': 0, 'written': 0, 'dropped': 0, 'batches': 0, 'errors': 0,
+                       'archived': 0, 'partitions_archived': 0, 'last_error': None}
+
+    def record(self, accion: str, usuario_id=None, **detalles) -> None:
+        """Queues one entry; keyword arguments are stored as the JSON ``detalles``."""
+        entry = AuditEntry(
+            accion=accion,
+            usuario_id=str(usuario_id) if usuario_id else None,
+            detalles=json.dumps(detalles, ensure_ascii=False, default=str) if detalles else None,
+            fecha=datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+        )
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._stats['dropped'] += 1
+            self._buffer.append(entry)
+            self._stats['recorded'] += 1
+            pending = len(self._buffer)
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def _take(self) -> List[AuditEntry]:
+        with self._lock:
+            count = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _requeue(self, entries: List[AuditEntry]) -> None:
+        with self._lock:
+            room = self._buffer.maxlen - len(self._buffer)
+            if room < len(entries):
+                self._stats['dropped'] += len(entries) - room
+                entries = entries[len(entries) - room:]
+            self._buffer.extendleft(reversed(entries))
+
+    def flush(self) -> int:
+        """Writes everything buffered so far; returns how many entries were written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take()
+                if not batch:
+                    break
+                try:
+                    self.repository.insert_audit_entries(batch)
+                except Exception as e:
+                    self._requeue(batch)
+                    with self._lock:
+                        self._stats['errors'] += 1
+                        self._stats['last_error'] = str(e)
+                    raise
+                written += len(batch)
+                with self._lock:
+                    self._stats['written'] += len(batch)
+                    self._stats['batches'] += 1
+        return written
+
+    def archive_expired(self, today: Optional[date] = None) -> int:
+        """Archives every whole month older than the retention period; returns entries moved."""
+        if not self.retention_days or not self.archive_dir:
+            return 0
+        today = today or datetime.now(timezone.utc).date()
+        cutoff = today - timedelta(days=self.retention_days)
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+        moved = 0
+        while True:
+            oldest = self.repository.oldest_audit_date()
+            if not oldest:
+                break
+            month = _month_start(date.fromisoformat(str(oldest)[:10]))
+            end = _next_month(month)
+            if end > cutoff:
+                break
+            path = os.path.join(self.archive_dir, f"auditoria_{month:%Y-%m}.db")
+            count = self.repository.archive_audit_logs(end.isoformat(), path)
+            moved += count
+            with self._lock:
+                self._stats['archived'] += count
+                self._stats['partitions_archived'] += 1
+            if not count:
+                break
+        return moved
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Error escribiendo la auditoría: {e}")
+            if time.monotonic() >= self._next_retention:
+                self._next_retention = time.monotonic() + self.retention_interval
+                try:
+                    self.archive_expired()
+                except Exception as e:
+                    print(f"⚠️ Error archivando la auditoría: {e}")
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='audit-log', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stops the thread and writes what is still buffered."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"⚠️ Auditoría sin escribir al detener: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            s['pending'] = len(self._buffer)
+        return s
@@ -0,0 +1,85 @@
+import csv
+import io
+from typing import BinaryIO, Iterable, Iterator
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+from domain.models import TicketRowView
+
+# (header, value) for every exported column, in order.
+EXPORT_COLUMNS = [
+    ('Ticket', lambda t: t.numero_ticket),
+    ('Fecha', lambda t: t.fecha_creacion),
+    ('Usuario', lambda t: t.nombre_usuario),
+    ('Equipo', lambda t: t.nombre_equipo),
+    ('Categoría', lambda t: t.categoria),
+    ('Prioridad', lambda t: t.prioridad.value),
+    ('Estado', lambda t: t.estado.value),
+    ('Técnico', lambda t: t.nombre_tecnico),
+    ('Problema', lambda t: t.problema),
+    ('Solución', lambda t: t.solucion),
+    ('Fecha finalización', lambda t: t.fecha_finalizacion),
+]
+
+
+# A cell starting with one of these is evaluated as a formula by Excel/LibreOffice
+# (e.g. a ticket whose problem text is =HYPERLINK(...)).
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def neutralize(value):
+    """Prefixes user text that a spreadsheet would run as a formula with a quote."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _values(ticket: TicketRowView) -> list:
+    return [neutralize(value(ticket)) for _, value in EXPORT_COLUMNS]
+
+
+def iter_csv(tickets: Iterable[TicketRowView], chunk_rows: int = 500) -> Iterator[str]:
+    """
+    Yields the CSV export in chunks of ``chunk_rows`` rows, for a streamed
+    (chunked) response. Starts with a UTF-8 BOM so Excel detects the encoding.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow([header for header, _ in EXPORT_COLUMNS])
+    pending = 0
+    for ticket in tickets:
+        writer.writerow(_values(ticket))
+        pending += 1
+        if pending == chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def _cell(sheet, value):
+    if not isinstance(value, str):
+        return value
+    cell = WriteOnlyCell(sheet, value)
+    cell.data_type = 's'
+    return cell
+
+
+def write_xlsx(tickets: Iterable[TicketRowView], fileobj: BinaryIO) -> int:
+    """
+    Writes the XLSX export to ``fileobj`` with openpyxl's write-only mode, which
+    flushes rows to disk as they are appended. Returns the number of rows.
+    Text is always written as string cells, never as formulas.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Soportes')
+    sheet.append([header for header, _ in EXPORT_COLUMNS])
+    count = 0
+    for ticket in tickets:
+        sheet.append([_cell(sheet, value) for value in _values(ticket)])
+        count += 1
+    workbook.save(fileobj)
+    return count
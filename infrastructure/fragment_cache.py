@@ -0,0 +1,83 @@
+import threading
+from typing import Hashable, Optional, Sequence
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from infrastructure.cache import LRUCache
+
+
+class FragmentCache:
+    """
+    Rendered HTML fragments keyed by name, caller-supplied vary values and data versions.
+
+    ``scopes`` lists the repository data versions the fragment depends on
+    ('soportes', 'usuarios', ...). Repository writes bump them, so the next
+    render misses and rebuilds. ``vary`` carries whatever else changes the
+    output, typically the role scope ('todos' for staff, the user id for
+    requesters) and the query string. The optional TTL bounds staleness for
+    writes made outside this process.
+    """
+
+    def __init__(self, repository, maxsize: int = 256, ttl: Optional[float] = None):
+        self.repository = repository
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._by_name = {}  # name -> [hits, misses]
+
+    def key(self, name: str, scopes: Sequence[str], vary: Sequence[Hashable]) -> tuple:
+        return (name, tuple(vary), tuple(self.repository.data_version(scope) for scope in scopes))
+
+    def fetch(self, name: str, scopes: Sequence[str], vary: Sequence[Hashable], render):
+        key = self.key(name, scopes, vary)
+        html = self._cache.get(key)
+        hit = html is not None
+        if not hit:
+            html = render()
+            self._cache.set(key, html)
+        with self._lock:
+            counts = self._by_name.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+        return html
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        s = self._cache.stats()
+        with self._lock:
+            for name, (hits, misses) in self._by_name.items():
+                s[f'{name}_hits'] = hits
+                s[f'{name}_misses'] = misses
+        return s
+
+
+class FragmentCacheExtension(Extension):
+    """
+    ``{% cache "name", ["scope", ...], vary1, vary2 %}...{% endcache %}``
+
+    Renders the body once per key and serves the stored HTML afterwards, so
+    data loaded lazily inside the block (callables passed by the view) is not
+    queried on a hit. Without ``environment.fragment_cache`` the body is
+    always rendered.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, name, scopes, *vary, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        return cache.fetch(name, scopes, vary, caller)
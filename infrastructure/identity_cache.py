@@ -0,0 +1,77 @@
+import threading
+from typing import Callable, List, Optional, Sequence
+
+from domain.models import User
+from infrastructure.cache import LRUCache
+
+STAFF_ROLES = ('admin', 'tecnico')
+
+_MISSING = object()
+
+
+class IdentityCache:
+    """
+    Cached user lookups for the routes: single users and the technician roster.
+
+    Two levels:
+
+    * ``request_memo`` returns a dict that lives for one request (``flask.g``),
+      so a route that asks for the same user twice hits the database once.
+    * A process-wide LRU with TTL shared by all requests. Keys carry the
+      repository's ``usuarios`` data version, which ``create_user``,
+      ``update_user`` and ``delete_user`` bump. Writes made through this
+      process are therefore seen immediately. The TTL bounds staleness for
+      writes from elsewhere (import scripts, another worker).
+
+    Returned objects are shared between requests: read them, don't modify
+    them. Code that edits a user should load it from the repository.
+    """
+
+    def __init__(self, repository, maxsize: int = 512, ttl: float = 60.0,
+                 request_memo: Optional[Callable[[], Optional[dict]]] = None):
+        self.repository = repository
+        self.request_memo = request_memo
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._request_hits = 0
+
+    def _lookup(self, key: tuple, load: Callable):
+        key = key + (self.repository.data_version('usuarios'),)
+        memo = self.request_memo() if self.request_memo else None
+        if memo is not None and key in memo:
+            with self._lock:
+                self._request_hits += 1
+            return memo[key]
+
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = load()
+            self._cache.set(key, value)
+        if memo is not None:
+            memo[key] = value
+        return value
+
+    def get_user(self, user_id) -> Optional[User]:
+        if not user_id:
+            return None
+        user_id = str(user_id)
+        return self._lookup(('user', user_id), lambda: self.repository.get_user_by_id(user_id))
+
+    def list_users(self, roles: Optional[Sequence[str]] = None) -> List[User]:
+        roles = tuple(sorted(roles)) if roles else None
+        filters = {'roles': list(roles)} if roles else None
+        return self._lookup(('users', roles), lambda: self.repository.list_users(filters=filters))
+
+    def list_staff(self) -> List[User]:
+        """Admins and technicians (assignable to tickets), ordered by username."""
+        return self.list_users(STAFF_ROLES)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        s = self._cache.stats()
+        with self._lock:
+            s['request_hits'] = self._request_hits
+        return s
+
@@ -0,0 +1,160 @@
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from flask_mail import BadHeaderError, Connection, Mail, Message
+
+# Errors that reject one message but leave the SMTP session usable (smtplib
+# issues RSET before raising them), so the connection is kept for the next one.
+_MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError,
+                   BadHeaderError, AssertionError)
+
+
+class MailTransport:
+    """
+    Flask-Mail transport configured from the ``configuracion`` table.
+
+    Settings are read once per ``configuracion`` data version (bumped by
+    ``save_config``) and turned into a Flask-Mail state object without touching
+    the shared ``app.config``. Each thread keeps its SMTP session open and
+    reuses it across sends until the configuration changes, the session has
+    been idle for ``idle_timeout`` seconds or the connection fails.
+
+    ``Connection.send`` emits Flask-Mail's ``email_dispatched`` signal through
+    ``current_app``, so sends must run inside an application context. Flask-Mail's
+    ``Message`` also reads ``default_sender`` and ``ascii_attachments`` from
+    ``current_app.extensions['mail']``; ``init_app`` registers the transport
+    there, so no separate ``Mail(app)`` built from ``app.config`` is needed.
+    """
+
+    def __init__(self, repository, defaults: dict, debug: bool = False, testing: bool = False,
+                 idle_timeout: float = 30.0):
+        self.repository = repository
+        self.defaults = defaults
+        self.debug = debug
+        self.testing = testing
+        self.idle_timeout = idle_timeout
+
+        self._state = None
+        self._version = None
+        self._local = threading.local()
+        self._open = set()
+        self._lock = threading.Lock()
+        self._stats = {'config_loads': 0, 'handshakes': 0, 'reused': 0, 'dropped': 0}
+
+    def _load_settings(self) -> dict:
+        settings = dict(self.defaults)
+        for key, val in self.repository.get_config_by_prefix('MAIL_').items():
+            settings[key] = val.strip() if isinstance(val, str) else val
+        settings['MAIL_PORT'] = int(settings.get('MAIL_PORT') or 25)
+        settings['MAIL_USE_TLS'] = str(settings.get('MAIL_USE_TLS')).lower() == 'true'
+        return settings
+
+    @property
+    def state(self):
+        """Flask-Mail ``_Mail`` state for the current configuration version."""
+        version = self.repository.data_version('configuracion')
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._state = Mail().init_mail(self._load_settings(), self.debug, self.testing)
+                    self._version = version
+                    self._stats['config_loads'] += 1
+        return self._state
+
+    def init_app(self, app) -> None:
+        app.extensions['mail'] = self
+
+    @property
+    def default_sender(self) -> Optional[str]:
+        return self.state.default_sender
+
+    @property
+    def ascii_attachments(self) -> bool:
+        return self.state.ascii_attachments
+
+    @property
+    def sender(self) -> Optional[str]:
+        state = self.state
+        return state.username or state.default_sender
+
+    def _open_connection(self, state) -> Connection:
+        conn = Connection(state)
+        conn.__enter__()
+        self._local.conn = conn
+        with self._lock:
+            self._open.add(conn)
+            self._stats['handshakes'] += 1
+        return conn
+
+    def _drop(self, conn: Connection) -> None:
+        if getattr(self._local, 'conn', None) is conn:
+            self._local.conn = None
+        with self._lock:
+            self._open.discard(conn)
+            self._stats['dropped'] += 1
+        if conn.host is not None:
+            try:
+                conn.host.quit()
+            except (smtplib.SMTPException, OSError):
+                conn.host.close()
+
+    @contextmanager
+    def connection(self):
+        """Yields this thread's SMTP connection, reconnecting when it is stale."""
+        state = self.state
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and (conn.mail is not state
+                                 or time.monotonic() - self._local.last_used > self.idle_timeout):
+            self._drop(conn)
+            conn = None
+        if conn is None:
+            conn = self._open_connection(state)
+        else:
+            with self._lock:
+                self._stats['reused'] += 1
+        try:
+            yield conn
+        except _MESSAGE_ERRORS:
+            self._local.last_used = time.monotonic()
+            raise
+        except Exception:
+            self._drop(conn)
+            raise
+        self._local.last_used = time.monotonic()
+
+    def send(self, message: Message) -> None:
+        if not message.sender:
+            message.sender = self.sender
+        try:
+            with self.connection() as conn:
+                conn.send(message)
+        except smtplib.SMTPServerDisconnected:
+            # The server closed the idle session before our timeout; retry once on a fresh one.
+            with self.connection() as conn:
+                conn.send(message)
+
+    def send_batch(self, messages: List[Message]) -> List[tuple]:
+        """Sends ``messages`` over this thread's session; returns ``(message, error)`` for each failure."""
+        failures = []
+        for message in messages:
+            try:
+                self.send(message)
+            except Exception as e:
+                failures.append((message, e))
+        return failures
+
+    def close(self) -> None:
+        with self._lock:
+            open_conns = list(self._open)
+        for conn in open_conns:
+            self._drop(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            s['open'] = len(self._open)
+        s['config_version'] = self._version
+        return s
@@ -0,0 +1,146 @@
+import threading
+import time
+from typing import Callable, List, Optional
+
+from domain.models import OutboxEmail
+
+
+class EmailOutboxWorker:
+    """
+    Pool of background threads that drains the ``email_outbox`` table.
+
+    Routes only enqueue; each worker claims a batch of due emails, hands it to
+    ``deliver`` and records the outcome. A failed email is retried with
+    exponential backoff (``backoff_base * 2 ** (intentos - 1)`` seconds, capped
+    at ``backoff_max``) until ``max_retries`` attempts have been made.
+
+    ``deliver`` receives the whole claimed batch and returns the emails it
+    could not send as ``(email, error)`` pairs, so a transport can reuse one
+    SMTP session across the batch.
+
+    Emails left in 'Enviando' by a process that died mid-send go back to the
+    queue once they have been claimed for ``stale_after`` seconds. The check
+    runs at start and then every ``requeue_interval`` seconds from the worker
+    loop, so a quick restart does not leave them stuck.
+    """
+
+    def __init__(self, repository, deliver: Callable[[List[OutboxEmail]], List[tuple]],
+                 workers: int = 2, batch_size: int = 10, poll_interval: float = 5.0,
+                 max_retries: int = 5, backoff_base: float = 30.0, backoff_max: float = 3600.0,
+                 stale_after: float = 600.0, requeue_interval: float = 60.0):
+        self.repository = repository
+        self.deliver = deliver
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stale_after = stale_after
+        self.requeue_interval = requeue_interval
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._next_requeue = 0.0
+        self._stats = {'sent': 0, 'retried': 0, 'failed': 0, 'batches': 0, 'requeued': 0, 'last_error': None}
+
+    def backoff(self, intentos: int) -> float:
+        return min(self.backoff_base * 2 ** max(intentos - 1, 0), self.backoff_max)
+
+    def wake(self) -> None:
+        """Signals the workers that new emails were enqueued (skips the poll wait)."""
+        self._wake.set()
+
+    def process_batch(self) -> int:
+        """Claims and delivers one batch; returns how many emails were claimed."""
+        emails = self.repository.claim_emails(self.batch_size)
+        if not emails:
+            return 0
+        try:
+            failures = self.deliver(emails)
+        except Exception as e:
+            failures = [(email, e) for email in emails]
+
+        failed_ids = set()
+        for email, error in failures:
+            failed_ids.add(email.id)
+            if email.intentos >= self.max_retries:
+                self.repository.mark_email_failed(email.id, str(error), None)
+                self._count('failed', error)
+            else:
+                self.repository.mark_email_failed(email.id, str(error), self.backoff(email.intentos))
+                self._count('retried', error)
+        for email in emails:
+            if email.id not in failed_ids:
+                self.repository.mark_email_sent(email.id)
+                self._count('sent')
+        self._count('batches')
+        return len(emails)
+
+    def requeue_stale(self) -> int:
+        """Returns emails claimed more than ``stale_after`` seconds ago to the queue."""
+        requeued = self.repository.requeue_stale_emails(older_than_seconds=self.stale_after)
+        with self._lock:
+            self._stats['requeued'] += requeued
+        return requeued
+
+    def _requeue_if_due(self) -> None:
+        # Only one of the worker threads runs the check each interval.
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_requeue:
+                return
+            self._next_requeue = now + self.requeue_interval
+        if self.requeue_stale():
+            self.wake()
+
+    def _count(self, key: str, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            self._stats[key] += 1
+            if error is not None:
+                self._stats['last_error'] = str(error)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._requeue_if_due()
+                claimed = self.process_batch()
+            except Exception as e:
+                print(f"⚠️ Error en el worker de correo: {e}")
+                claimed = 0
+            if claimed:
+                continue
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._next_requeue = time.monotonic() + self.requeue_interval
+        self.requeue_stale()
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f'email-outbox-{i}', daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def drain(self, timeout: float = 30.0) -> None:
+        """Processes due emails in the calling thread until none are left (scripts/tests)."""
+        deadline = time.monotonic() + timeout
+        while self.process_batch() and time.monotonic() < deadline:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+        s['workers'] = len(self._threads)
+        return s
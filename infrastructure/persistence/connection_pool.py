@@ -0,0 +1,177 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+
+def enable_foreign_keys(conn: sqlite3.Connection) -> None:
+    # SQLite ships with foreign keys disabled per connection.
+    conn.execute("PRAGMA foreign_keys = ON")
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no connection becomes available within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections with per-thread reuse.
+
+    A thread (or greenlet, once eventlet has monkey-patched ``threading``)
+    keeps the same connection for as long as it holds at least one lease, so
+    nested ``connection()`` blocks and consecutive repository calls made inside
+    a ``lease()`` share a single connection. Idle connections are handed to the
+    next caller, which is why they are opened with ``check_same_thread=False``:
+    a connection is only ever used by the thread that currently leases it.
+    """
+
+    def __init__(self, db_path: str, max_size: int = 5, timeout: float = 30.0,
+                 health_check_interval: float = 30.0,
+                 setup: Optional[List[Callable[[sqlite3.Connection], None]]] = None,
+                 factory: type = sqlite3.Connection):
+        self.db_path = db_path
+        self.factory = factory  # sqlite3.Connection subclass (e.g. the instrumented one)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._setup = list(setup) if setup is not None else [enable_foreign_keys]
+
+        self._cond = threading.Condition()
+        self._idle: List[tuple] = []  # (connection, last_used)
+        self._size = 0
+        self._local = threading.local()
+        self._stats = {'created': 0, 'acquired': 0, 'reused': 0, 'discarded': 0, 'waits': 0}
+
+    # --- Setup hooks ---
+    def add_setup(self, hook: Callable[[sqlite3.Connection], None]) -> None:
+        """Registers a hook run on every new connection (PRAGMAs, functions...)."""
+        self._setup.append(hook)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        try:
+            for hook in self._setup:
+                hook(conn)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    # --- Checkout / Return ---
+    def _checkout(self) -> sqlite3.Connection:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    if (time.monotonic() - last_used > self.health_check_interval
+                            and not self._is_healthy(conn)):
+                        self._discard(conn)
+                        continue
+                    self._stats['reused'] += 1
+                    return conn
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"No hay conexiones libres en el pool ({self.max_size}) tras {self.timeout}s")
+                self._stats['waits'] += 1
+                self._cond.wait(remaining)
+
+        # Opening the file happens outside the lock so other threads are not blocked.
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+
+    def _checkin(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            with self._cond:
+                self._discard(conn)
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        # Caller must hold self._cond.
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._size -= 1
+        self._stats['discarded'] += 1
+
+    # --- Public API ---
+    def acquire(self) -> sqlite3.Connection:
+        """Leases the calling thread's connection, checking one out if needed."""
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            self._local.conn = self._checkout()
+            with self._cond:
+                self._stats['acquired'] += 1
+        self._local.depth = depth + 1
+        return self._local.conn
+
+    def release(self) -> None:
+        """Drops one lease; the connection goes back to the pool with the last one."""
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            return
+        self._local.depth = depth - 1
+        if depth == 1:
+            conn = self._local.conn
+            self._local.conn = None
+            self._checkin(conn)
+
+    def holds_connection(self) -> bool:
+        """True if the calling thread already leases a connection (a new lease reuses it)."""
+        return getattr(self._local, 'depth', 0) > 0
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release()
+
+    @contextmanager
+    def lease(self):
+        """Pins one connection to the current thread for the whole block (e.g. a request)."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {**self._stats, 'size': self._size, 'idle': len(self._idle), 'max_size': self.max_size}
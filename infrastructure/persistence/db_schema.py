@@ -53,10 +53,22 @@ CREATE TABLE IF NOT EXISTS mantenimientos (
     estado TEXT DEFAULT 'Pendiente',
     tecnico_asignado_id TEXT,
     motivo_reprogramacion TEXT,
+    comentarios TEXT,
     FOREIGN KEY (equipo_id) REFERENCES equipos (id) ON DELETE CASCADE,
     FOREIGN KEY (tecnico_asignado_id) REFERENCES usuarios (id) ON DELETE SET NULL
 );
 
+CREATE INDEX IF NOT EXISTS idx_mantenimientos_equipo_fecha ON mantenimientos (equipo_id, fecha_programada);
+CREATE INDEX IF NOT EXISTS idx_mantenimientos_estado ON mantenimientos (estado);
+CREATE INDEX IF NOT EXISTS idx_mantenimientos_fecha ON mantenimientos (fecha_programada);
+
+-- Monotonic counters (numero_ticket). Values are handed out with
+-- UPDATE ... RETURNING inside the inserting transaction; gaps are allowed.
+CREATE TABLE IF NOT EXISTS secuencias (
+    nombre TEXT PRIMARY KEY,
+    ultimo_valor INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
 CREATE TABLE IF NOT EXISTS auditoria_logs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     usuario_id TEXT,
@@ -66,6 +78,10 @@ CREATE TABLE IF NOT EXISTS auditoria_logs (
     FOREIGN KEY (usuario_id) REFERENCES usuarios (id) ON DELETE SET NULL
 );
 
+-- Audit queries: one user's history, and one action over a period
+CREATE INDEX IF NOT EXISTS idx_auditoria_usuario_fecha ON auditoria_logs (usuario_id, fecha);
+CREATE INDEX IF NOT EXISTS idx_auditoria_accion_fecha ON auditoria_logs (accion, fecha);
+
 CREATE TABLE IF NOT EXISTS legacy_migration_map (
     old_id INTEGER,
     new_uuid TEXT PRIMARY KEY,
@@ -76,6 +92,114 @@ CREATE TABLE IF NOT EXISTS legacy_migration_map (
 CREATE INDEX IF NOT EXISTS idx_soportes_usuario ON soportes (usuario_id, fecha_creacion);
 CREATE INDEX IF NOT EXISTS idx_soportes_estado ON soportes (estado, prioridad);
 
+-- Keyset pagination: ORDER BY fecha_creacion DESC, id DESC for each visibility scope
+CREATE INDEX IF NOT EXISTS idx_soportes_fecha_id ON soportes (fecha_creacion, id);
+CREATE INDEX IF NOT EXISTS idx_soportes_usuario_fecha_id ON soportes (usuario_id, fecha_creacion, id);
+CREATE INDEX IF NOT EXISTS idx_soportes_estado_fecha_id ON soportes (estado, fecha_creacion, id);
+
+-- Materialized dashboard counters, kept current by triggers inside the same
+-- transaction as every INSERT/UPDATE/DELETE on soportes (including FK cascades).
+CREATE TABLE IF NOT EXISTS soportes_contadores (
+    usuario_id TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    cantidad INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (usuario_id, estado, categoria)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_soportes_contadores_estado ON soportes_contadores (estado);
+
+CREATE TRIGGER IF NOT EXISTS trg_soportes_contadores_insert AFTER INSERT ON soportes
+BEGIN
+    INSERT INTO soportes_contadores (usuario_id, estado, categoria, cantidad)
+    VALUES (NEW.usuario_id, NEW.estado, NEW.categoria, 1)
+    ON CONFLICT (usuario_id, estado, categoria) DO UPDATE SET cantidad = cantidad + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_soportes_contadores_delete AFTER DELETE ON soportes
+BEGIN
+    UPDATE soportes_contadores SET cantidad = cantidad - 1
+    WHERE usuario_id = OLD.usuario_id AND estado = OLD.estado AND categoria = OLD.categoria;
+    DELETE FROM soportes_contadores
+    WHERE usuario_id = OLD.usuario_id AND estado = OLD.estado AND categoria = OLD.categoria AND cantidad <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_soportes_contadores_update AFTER UPDATE OF usuario_id, estado, categoria ON soportes
+WHEN OLD.usuario_id IS NOT NEW.usuario_id OR OLD.estado IS NOT NEW.estado OR OLD.categoria IS NOT NEW.categoria
+BEGIN
+    UPDATE soportes_contadores SET cantidad = cantidad - 1
+    WHERE usuario_id = OLD.usuario_id AND estado = OLD.estado AND categoria = OLD.categoria;
+    DELETE FROM soportes_contadores
+    WHERE usuario_id = OLD.usuario_id AND estado = OLD.estado AND categoria = OLD.categoria AND cantidad <= 0;
+    INSERT INTO soportes_contadores (usuario_id, estado, categoria, cantidad)
+    VALUES (NEW.usuario_id, NEW.estado, NEW.categoria, 1)
+    ON CONFLICT (usuario_id, estado, categoria) DO UPDATE SET cantidad = cantidad + 1;
+END;
+
+-- Full-text search over tickets. The FTS rowid is soportes.numero_ticket
+-- (stable across VACUUM, unlike the implicit rowid of a TEXT-keyed table).
+CREATE INDEX IF NOT EXISTS idx_soportes_equipo ON soportes (equipo_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS soportes_fts USING fts5(
+    problema, solucion, nombre_equipo, nombre_usuario,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_soportes_fts_insert AFTER INSERT ON soportes
+WHEN NEW.numero_ticket IS NOT NULL
+BEGIN
+    INSERT INTO soportes_fts (rowid, problema, solucion, nombre_equipo, nombre_usuario)
+    VALUES (NEW.numero_ticket, NEW.problema, NEW.solucion,
+            (SELECT nombre_equipo FROM equipos WHERE id = NEW.equipo_id),
+            (SELECT username FROM usuarios WHERE id = NEW.usuario_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_soportes_fts_delete AFTER DELETE ON soportes
+BEGIN
+    DELETE FROM soportes_fts WHERE rowid = OLD.numero_ticket;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_soportes_fts_update
+AFTER UPDATE OF numero_ticket, problema, solucion, equipo_id, usuario_id ON soportes
+BEGIN
+    DELETE FROM soportes_fts WHERE rowid = OLD.numero_ticket;
+    INSERT INTO soportes_fts (rowid, problema, solucion, nombre_equipo, nombre_usuario)
+    SELECT NEW.numero_ticket, NEW.problema, NEW.solucion,
+           (SELECT nombre_equipo FROM equipos WHERE id = NEW.equipo_id),
+           (SELECT username FROM usuarios WHERE id = NEW.usuario_id)
+    WHERE NEW.numero_ticket IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_equipos_fts_rename AFTER UPDATE OF nombre_equipo ON equipos
+BEGIN
+    UPDATE soportes_fts SET nombre_equipo = NEW.nombre_equipo
+    WHERE rowid IN (SELECT numero_ticket FROM soportes WHERE equipo_id = NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_usuarios_fts_rename AFTER UPDATE OF username ON usuarios
+BEGIN
+    UPDATE soportes_fts SET nombre_usuario = NEW.username
+    WHERE rowid IN (SELECT numero_ticket FROM soportes WHERE usuario_id = NEW.id);
+END;
+
+-- Persistent email outbox drained by the background delivery workers.
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    destinatarios TEXT NOT NULL,
+    asunto TEXT NOT NULL,
+    cuerpo_html TEXT NOT NULL,
+    copia_oculta INTEGER NOT NULL DEFAULT 0,
+    estado TEXT NOT NULL DEFAULT 'Pendiente',
+    intentos INTEGER NOT NULL DEFAULT 0,
+    proximo_intento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    reclamado_en TIMESTAMP,
+    ultimo_error TEXT,
+    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_envio TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_email_outbox_pendientes ON email_outbox (estado, proximo_intento);
+
 CREATE TABLE IF NOT EXISTS configuracion (
     clave TEXT PRIMARY KEY,
     valor TEXT
@@ -0,0 +1,164 @@
+import inspect
+import logging
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from typing import Optional
+
+from infrastructure.metrics import COUNT_BUCKETS, MetricsRegistry, current_request_stats
+from infrastructure.persistence.repository import SQLiteRepository
+
+logger = logging.getLogger('soportes.sql')
+
+_EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+@lru_cache(maxsize=512)
+def _statement_kind(sql: str) -> str:
+    word = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ''
+    return word if word in _EXPLAINABLE or word in ('BEGIN', 'COMMIT', 'PRAGMA') else 'OTHER'
+
+
+class QueryTracer:
+    """
+    Times SQL statements and attributes them to the current request and repository method.
+
+    Statements slower than ``slow_threshold`` seconds are logged to ``soportes.sql``
+    together with their ``EXPLAIN QUERY PLAN`` (parameters are never logged). The
+    recorded time covers executing the statement up to its first row; fetching the
+    rest is included in the repository method's duration.
+    """
+
+    def __init__(self, registry: MetricsRegistry, slow_threshold: float = 0.1):
+        self.slow_threshold = slow_threshold
+        self._local = threading.local()
+        self.query_seconds = registry.histogram(
+            'db_query_duration_seconds', 'SQL statement execution time', ('statement',))
+        self.slow_queries = registry.counter('db_slow_queries_total', 'Statements over the slow-query threshold')
+        self.method_seconds = registry.histogram(
+            'repository_call_duration_seconds', 'SQLiteRepository method duration', ('method',))
+        self.method_queries = registry.histogram(
+            'repository_call_queries', 'SQL statements per repository call', ('method',), buckets=COUNT_BUCKETS)
+        self.method_connections = registry.counter(
+            'repository_connections_total', 'Pool checkouts made by repository calls', ('method',))
+
+    # --- Repository calls ---
+    def _calls(self) -> list:
+        calls = getattr(self._local, 'calls', None)
+        if calls is None:
+            calls = self._local.calls = []
+        return calls
+
+    @contextmanager
+    def repository_call(self, method: str):
+        calls = self._calls()
+        if calls:
+            # Nested call (a method calling another): counted in the outer one.
+            yield
+            return
+        frame = {'method': method, 'queries': 0, 'connections': 0}
+        calls.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            calls.pop()
+            self.method_seconds.observe(elapsed, method=method)
+            self.method_queries.observe(frame['queries'], method=method)
+            if frame['connections']:
+                self.method_connections.inc(frame['connections'], method=method)
+            stats = current_request_stats()
+            if stats is not None:
+                stats.repository_calls += 1
+
+    def count_connection(self) -> None:
+        calls = self._calls()
+        if calls:
+            calls[-1]['connections'] += 1
+        stats = current_request_stats()
+        if stats is not None:
+            stats.connections += 1
+
+    # --- Statements ---
+    def record(self, conn: sqlite3.Connection, sql: str, params, seconds: float) -> None:
+        kind = _statement_kind(sql)
+        self.query_seconds.observe(seconds, statement=kind)
+        calls = self._calls()
+        if calls:
+            calls[-1]['queries'] += 1
+        stats = current_request_stats()
+        if stats is not None:
+            stats.queries += 1
+            stats.sql_seconds += seconds
+        if seconds >= self.slow_threshold and kind in _EXPLAINABLE:
+            self.slow_queries.inc()
+            self._log_slow(conn, sql, params, seconds, calls[-1]['method'] if calls else None)
+
+    def _log_slow(self, conn, sql: str, params, seconds: float, method: Optional[str]) -> None:
+        plan = []
+        if params is not None:
+            try:
+                rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+                plan = [row[3] for row in rows]
+            except sqlite3.Error as e:
+                plan = [f"(sin plan: {e})"]
+        logger.warning("Consulta lenta %.1f ms en %s: %s\n  plan: %s", seconds * 1000, method or '-',
+                       re.sub(r'\s+', ' ', sql).strip(), ' | '.join(plan) or '-')
+
+
+def connection_factory(tracer: QueryTracer):
+    """sqlite3 ``factory=`` whose execute/executemany report to ``tracer``."""
+
+    class InstrumentedConnection(sqlite3.Connection):
+        def execute(self, sql, parameters=()):
+            start = time.perf_counter()
+            try:
+                return super().execute(sql, parameters)
+            finally:
+                tracer.record(self, sql, parameters, time.perf_counter() - start)
+
+        def executemany(self, sql, seq_of_parameters):
+            start = time.perf_counter()
+            try:
+                return super().executemany(sql, seq_of_parameters)
+            finally:
+                # No single parameter set to explain a batched statement with.
+                tracer.record(self, sql, None, time.perf_counter() - start)
+
+    return InstrumentedConnection
+
+
+class InstrumentedRepository(SQLiteRepository):
+    """SQLiteRepository whose public methods report duration, statements and pool checkouts."""
+
+    def __init__(self, db_path: str, pool=None, tracer: Optional[QueryTracer] = None):
+        super().__init__(db_path, pool)
+        self.tracer = tracer
+
+    @contextmanager
+    def _get_connection(self):
+        # Only real pool checkouts count; nested calls reuse the thread's lease.
+        if not self.pool.holds_connection():
+            self.tracer.count_connection()
+        with super()._get_connection() as conn:
+            yield conn
+
+
+def _instrumented(name, method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.tracer.repository_call(name):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+# Generators (iter_tickets) are left alone: they run while the response streams, and
+# the pages they fetch are instrumented as list_tickets_page calls.
+for _name, _method in list(vars(SQLiteRepository).items()):
+    if _name.startswith('_') or not inspect.isfunction(_method) or inspect.isgeneratorfunction(_method):
+        continue
+    setattr(InstrumentedRepository, _name, _instrumented(_name, _method))
@@ -1,22 +1,116 @@
-import sqlite3
+import base64
+import json
+import threading
 from contextlib import contextmanager
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from uuid import UUID
-from domain.models import User, Ticket, Equipment, TicketStatus, TicketPriority, UserRole, TicketReadModel
+from domain.models import User, Ticket, Equipment, EquipmentReadModel, MaintenanceReadModel, TicketStatus, TicketPriority, UserRole, TicketRowView, TicketPage, TicketSearchHit, TicketSearchPage, OutboxEmail, AuditEntry
+from infrastructure.persistence.connection_pool import ConnectionPool
+from infrastructure.persistence.db_schema import SCHEMA_SQL
+
+
+def encode_cursor(fecha_creacion, ticket_id: str) -> str:
+    raw = json.dumps([str(fecha_creacion), ticket_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        fecha, ticket_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Cursor inválido: {cursor!r}") from e
+    return fecha, ticket_id
+
+
+# Markers wrapped around matched terms by search_tickets(); the presentation
+# layer escapes the text and swaps them for <mark> tags.
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """Turns free user input into a safe FTS5 query: every word, as a prefix, must match."""
+    terms = []
+    for word in text.split():
+        word = word.replace('"', '')
+        if word:
+            terms.append(f'"{word}"*')
+    return " ".join(terms) or None
+
 
 class SQLiteRepository:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, pool: Optional[ConnectionPool] = None):
         self.db_path = db_path
+        self.pool = pool or ConnectionPool(db_path)
+        self._versions = {}
+        self._versions_lock = threading.Lock()
+
+    def init_schema(self) -> None:
+        """Applies SCHEMA_SQL (idempotent) so new tables/indexes reach existing databases."""
+        with self._get_connection() as conn:
+            conn.executescript(SCHEMA_SQL)
+            conn.commit()
+            # Databases created before the counters table existed start empty.
+            has_tickets = conn.execute("SELECT 1 FROM soportes LIMIT 1").fetchone()
+            has_counters = conn.execute("SELECT 1 FROM soportes_contadores LIMIT 1").fetchone()
+            has_index = conn.execute("SELECT 1 FROM soportes_fts LIMIT 1").fetchone()
+        if has_tickets and not has_counters:
+            self.rebuild_ticket_counters()
+        if has_tickets and not has_index:
+            self.rebuild_search_index()
+        self.sync_ticket_sequence()
 
     @contextmanager
     def _get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON")
-        try:
+        # Reuses the connection already leased by this thread (e.g. by an outer
+        # method calling this one); otherwise checks out an idle pooled one.
+        with self.pool.connection() as conn:
             yield conn
-        finally:
-            conn.close()
+
+    @contextmanager
+    def _write_transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so a read-then-write
+        # sequence cannot interleave with another writer or fail to upgrade.
+        with self._get_connection() as conn:
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    # --- Secuencias ---
+    TICKET_SEQUENCE = 'numero_ticket'
+
+    @staticmethod
+    def _allocate(conn, nombre: str, count: int = 1) -> int:
+        """Advances sequence ``nombre`` by ``count`` in the caller's transaction; returns the first value."""
+        row = conn.execute("UPDATE secuencias SET ultimo_valor = ultimo_valor + ? WHERE nombre = ? "
+                           "RETURNING ultimo_valor", (count, nombre)).fetchone()
+        if row is None:
+            raise LookupError(f"Secuencia no inicializada: {nombre}")
+        return row[0] - count + 1
+
+    def reserve_ticket_numbers(self, count: int) -> range:
+        """Pre-allocates a block of ticket numbers for bulk imports (unused ones become gaps)."""
+        with self._write_transaction() as conn:
+            first = self._allocate(conn, self.TICKET_SEQUENCE, count)
+        return range(first, first + count)
+
+    def sync_ticket_sequence(self) -> int:
+        """Creates the ticket sequence or moves it past numbers written without it; returns its value."""
+        with self._write_transaction() as conn:
+            conn.execute("""
+                INSERT INTO secuencias (nombre, ultimo_valor)
+                SELECT ?, COALESCE(MAX(numero_ticket), 0) FROM soportes WHERE true
+                ON CONFLICT (nombre) DO UPDATE SET ultimo_valor = MAX(ultimo_valor, excluded.ultimo_valor)
+            """, (self.TICKET_SEQUENCE,))
+            return conn.execute("SELECT ultimo_valor FROM secuencias WHERE nombre = ?",
+                                (self.TICKET_SEQUENCE,)).fetchone()[0]
 
     # --- Usuarios ---
     def get_user_by_username(self, username: str) -> Optional[User]:
@@ -80,6 +174,7 @@ class SQLiteRepository:
                   user.role.value if isinstance(user.role, UserRole) else user.role, 
                   user.departamento))
             conn.commit()
+        self.bump_data_version('usuarios')
         return user
 
     def update_user(self, user: User) -> User:
@@ -92,21 +187,25 @@ class SQLiteRepository:
                   user.role.value if isinstance(user.role, UserRole) else user.role, 
                   user.password_hash, user.departamento, str(user.id)))
             conn.commit()
+        self.bump_data_version('usuarios')
         return user
 
     def delete_user(self, user_id: UUID) -> bool:
         with self._get_connection() as conn:
             cursor = conn.execute("DELETE FROM usuarios WHERE id = ?", (str(user_id),))
             conn.commit()
-            return cursor.rowcount > 0
+        self.bump_data_version('usuarios')
+        return cursor.rowcount > 0
 
     # --- Soportes (Tickets) ---
     def create_ticket(self, ticket: Ticket) -> Ticket:
-        with self._get_connection() as conn:
-            # Get next number if not provided
+        with self._write_transaction() as conn:
+            # The number comes from the sequence in the same transaction as the insert.
             if ticket.numero_ticket is None:
-                row = conn.execute("SELECT MAX(numero_ticket) as max_num FROM soportes").fetchone()
-                ticket.numero_ticket = (row['max_num'] or 0) + 1
+                ticket.numero_ticket = self._allocate(conn, self.TICKET_SEQUENCE)
+            else:
+                conn.execute("UPDATE secuencias SET ultimo_valor = MAX(ultimo_valor, ?) WHERE nombre = ?",
+                             (ticket.numero_ticket, self.TICKET_SEQUENCE))
 
             conn.execute("""
                 INSERT INTO soportes (id, numero_ticket, usuario_id, tecnico_id, equipo_id, problema, estado, prioridad, categoria, solucion)
@@ -116,7 +215,7 @@ class SQLiteRepository:
                   str(ticket.equipo_id) if ticket.equipo_id else None,
                   ticket.problema, ticket.estado.value, ticket.prioridad.value, 
                   ticket.categoria, ticket.solucion))
-            conn.commit()
+        self.bump_data_version('soportes')
         return ticket
 
     def get_ticket_by_id(self, ticket_id: UUID) -> Optional[Ticket]:
@@ -139,8 +238,7 @@ class SQLiteRepository:
                 )
         return None
 
-    def list_tickets(self, filters: Optional[dict] = None) -> List[TicketReadModel]:
-        query = """
+    _TICKET_SELECT = """
             SELECT s.*, 
                    u.username as nombre_usuario, 
                    t.username as nombre_tecnico,
@@ -151,38 +249,174 @@ class SQLiteRepository:
             LEFT JOIN equipos e ON s.equipo_id = e.id
             WHERE 1=1
         """
+
+    def _ticket_filters(self, filters: Optional[dict]) -> tuple:
+        where = ""
         params = []
         if filters:
             if 'estado' in filters:
-                query += " AND s.estado = ?"
+                where += " AND s.estado = ?"
                 params.append(filters['estado'])
             if 'usuario_id' in filters:
-                query += " AND s.usuario_id = ?"
+                where += " AND s.usuario_id = ?"
                 params.append(str(filters['usuario_id']))
+            if 'categoria' in filters:
+                where += " AND s.categoria = ?"
+                params.append(filters['categoria'])
+            if 'fecha_inicio' in filters:
+                where += " AND s.fecha_creacion >= ?"
+                params.append(filters['fecha_inicio'])
+            if 'fecha_fin' in filters:
+                # Whole end day, without wrapping the column (keeps the index usable)
+                where += " AND s.fecha_creacion < date(?, '+1 day')"
+                params.append(filters['fecha_fin'])
+        return where, params
+
+    def get_ticket_row(self, ticket_id: UUID) -> Optional[TicketRowView]:
+        """One ticket with requester/technician/equipment names (the list row)."""
+        with self._get_connection() as conn:
+            row = conn.execute(self._TICKET_SELECT + " AND s.id = ?", (str(ticket_id),)).fetchone()
+        return TicketRowView(row) if row else None
 
+    def list_tickets(self, filters: Optional[dict] = None) -> List[TicketRowView]:
+        where, params = self._ticket_filters(filters)
         # El ORDER BY debe ir después de todas las condiciones del WHERE
-        query += " ORDER BY s.fecha_creacion DESC"
+        query = self._TICKET_SELECT + where + " ORDER BY s.fecha_creacion DESC"
 
         with self._get_connection() as conn:
             rows = conn.execute(query, params).fetchall()
-            return [TicketReadModel(
-                id=UUID(row['id']),
-                numero_ticket=row['numero_ticket'],
-                usuario_id=UUID(row['usuario_id']),
-                problema=row['problema'],
-                categoria=row['categoria'],
-                prioridad=TicketPriority(row['prioridad']),
-                tecnico_id=UUID(row['tecnico_id']) if row['tecnico_id'] else None,
-                equipo_id=UUID(row['equipo_id']) if row['equipo_id'] else None,
-                estado=TicketStatus(row['estado']),
-                solucion=row['solucion'],
-                fecha_creacion=row['fecha_creacion'],
-                fecha_finalizacion=row['fecha_finalizacion'],
-                nombre_usuario=row['nombre_usuario'],
-                nombre_tecnico=row['nombre_tecnico'],
-                nombre_equipo=row['nombre_equipo']
-            ) for row in rows]
+            return [TicketRowView(row) for row in rows]
+
+    def iter_tickets(self, filters: Optional[dict] = None, batch_size: int = 1000) -> Iterator[TicketRowView]:
+        """
+        Streams tickets (newest first) in keyset pages of ``batch_size`` rows,
+        so exports of any size hold only one page in memory. Each page is a
+        separate ``list_tickets_page`` call: the connection goes back to the
+        pool between pages, and no read snapshot stays open while a slow
+        client downloads (it would keep the WAL from being reset). Tickets
+        created or deleted meanwhile may or may not appear.
+        """
+        cursor = None
+        while True:
+            page = self.list_tickets_page(filters=filters, limit=batch_size, cursor=cursor)
+            yield from page.items
+            if not page.has_more:
+                break
+            cursor = page.next_cursor
+
+    def list_report_tickets(self, filters: Optional[dict] = None) -> List[dict]:
+        """Rows for templates/reporte_pdf.html (ticket number as ``id``, requester and department)."""
+        where, params = self._ticket_filters(filters)
+        query = """
+            SELECT s.numero_ticket as id, s.estado, u.username as usuario, u.departamento,
+                   s.problema, s.categoria, s.solucion, s.fecha_finalizacion
+            FROM soportes s
+            JOIN usuarios u ON s.usuario_id = u.id
+            WHERE 1=1
+        """ + where + " ORDER BY s.fecha_creacion DESC"
+        with self._get_connection() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    def list_tickets_page(self, filters: Optional[dict] = None, limit: int = 15,
+                          cursor: Optional[str] = None) -> TicketPage:
+        """
+        Keyset pagination over (fecha_creacion, id), newest first.
+
+        ``cursor`` is the opaque ``next_cursor`` of the previous page; each page
+        is an index range scan, so cost does not depend on how deep the page is.
+        Raises ValueError for a malformed cursor.
+        """
+        where, params = self._ticket_filters(filters)
+        if cursor:
+            fecha, ticket_id = decode_cursor(cursor)
+            where += " AND (s.fecha_creacion, s.id) < (?, ?)"
+            params.extend([fecha, ticket_id])
+        query = self._TICKET_SELECT + where + " ORDER BY s.fecha_creacion DESC, s.id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._get_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last['fecha_creacion'], last['id'])
+        return TicketPage(items=[TicketRowView(row) for row in rows], next_cursor=next_cursor)
+
+    def search_tickets(self, text: str, filters: Optional[dict] = None,
+                       page: int = 1, per_page: int = 15) -> TicketSearchPage:
+        """
+        Ranked full-text search over problema, solucion, equipment and user name.
+
+        Results are ordered by bm25 (problema weighs most) and paginated by
+        offset, since a relevance order has no stable key to seek on.
+        """
+        match = build_match_query(text)
+        page = max(page, 1)
+        if not match:
+            return TicketSearchPage(items=[], total=0, page=page, per_page=per_page)
+
+        where, params = self._ticket_filters(filters)
+        from_clause = """
+            FROM soportes_fts
+            JOIN soportes s ON s.numero_ticket = soportes_fts.rowid
+            JOIN usuarios u ON s.usuario_id = u.id
+            LEFT JOIN usuarios t ON s.tecnico_id = t.id
+            LEFT JOIN equipos e ON s.equipo_id = e.id
+            WHERE soportes_fts MATCH ?
+        """ + where
+        # The total only needs soportes when there are visibility/estado filters.
+        count_query = "SELECT COUNT(*) FROM soportes_fts"
+        if where:
+            count_query += " JOIN soportes s ON s.numero_ticket = soportes_fts.rowid"
+        count_query += " WHERE soportes_fts MATCH ?" + where
+        query = f"""
+            SELECT s.*,
+                   u.username as nombre_usuario,
+                   t.username as nombre_tecnico,
+                   e.nombre_equipo,
+                   highlight(soportes_fts, 0, ?, ?) as problema_resaltado,
+                   snippet(soportes_fts, 1, ?, ?, '…', 16) as solucion_resaltada,
+                   bm25(soportes_fts, 10.0, 4.0, 2.0, 2.0) as rank
+            {from_clause}
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        """
+        markers = [HIGHLIGHT_START, HIGHLIGHT_END, HIGHLIGHT_START, HIGHLIGHT_END]
+
+        with self._get_connection() as conn:
+            total = conn.execute(count_query, [match] + params).fetchone()[0]
+            rows = conn.execute(query, markers + [match] + params + [per_page, (page - 1) * per_page]).fetchall()
+        return TicketSearchPage(items=[TicketSearchHit(row) for row in rows], total=total, page=page, per_page=per_page)
 
+    def rebuild_search_index(self) -> int:
+        """Repopulates soportes_fts from soportes; returns the number of indexed tickets."""
+        with self._get_connection() as conn:
+            conn.execute("DELETE FROM soportes_fts")
+            conn.execute("""
+                INSERT INTO soportes_fts (rowid, problema, solucion, nombre_equipo, nombre_usuario)
+                SELECT s.numero_ticket, s.problema, s.solucion, e.nombre_equipo, u.username
+                FROM soportes s
+                LEFT JOIN equipos e ON s.equipo_id = e.id
+                LEFT JOIN usuarios u ON s.usuario_id = u.id
+                WHERE s.numero_ticket IS NOT NULL
+            """)
+            conn.execute("INSERT INTO soportes_fts (soportes_fts) VALUES ('optimize')")
+            conn.commit()
+            return conn.execute("SELECT COUNT(*) FROM soportes_fts").fetchone()[0]
+
+    def count_tickets_by_status(self, filters: Optional[dict] = None) -> dict:
+        """Counts tickets per estado for a visibility scope in a single GROUP BY."""
+        query = "SELECT estado, SUM(cantidad) as cantidad FROM soportes_contadores WHERE 1=1"
+        params = []
+        if filters and 'usuario_id' in filters:
+            query += " AND usuario_id = ?"
+            params.append(str(filters['usuario_id']))
+        query += " GROUP BY estado"
+
+        with self._get_connection() as conn:
+            return {row['estado']: row['cantidad'] for row in conn.execute(query, params).fetchall()}
 
     def update_ticket(self, ticket: Ticket) -> Ticket:
         with self._get_connection() as conn:
@@ -200,56 +434,69 @@ class SQLiteRepository:
                   ticket.prioridad.value,
                   str(ticket.id)))
             conn.commit()
+        self.bump_data_version('soportes')
         return ticket
 
     def delete_ticket(self, ticket_id: UUID) -> bool:
         with self._get_connection() as conn:
             cursor = conn.execute("DELETE FROM soportes WHERE id = ?", (str(ticket_id),))
             conn.commit()
-            return cursor.rowcount > 0
+        self.bump_data_version('soportes')
+        return cursor.rowcount > 0
 
     # --- Equipos ---
+    @staticmethod
+    def _equipment_fields(row) -> dict:
+        return dict(
+            id=UUID(row['id']),
+            nombre_equipo=row['nombre_equipo'],
+            tipo=row['tipo'],
+            marca_modelo=row['marca_modelo'],
+            numero_serie=row['numero_serie'],
+            fecha_compra=row['fecha_compra'],
+            procesador=row['procesador'],
+            memoria_ram=row['memoria_ram'],
+            tipo_ram=row['tipo_ram'],
+            disco_duro=row['disco_duro'],
+            tipo_disco=row['tipo_disco'],
+            color=row['color'],
+            notas=row['notas'],
+            usuario_asignado_id=UUID(row['usuario_asignado_id']) if row['usuario_asignado_id'] else None
+        )
+
     def get_equipment_by_id(self, equipment_id: UUID) -> Optional[Equipment]:
         with self._get_connection() as conn:
             row = conn.execute("SELECT * FROM equipos WHERE id = ?", (str(equipment_id),)).fetchone()
             if row:
-                return Equipment(
-                    id=UUID(row['id']),
-                    nombre_equipo=row['nombre_equipo'],
-                    tipo=row['tipo'],
-                    marca_modelo=row['marca_modelo'],
-                    numero_serie=row['numero_serie'],
-                    fecha_compra=row['fecha_compra'],
-                    procesador=row['procesador'],
-                    memoria_ram=row['memoria_ram'],
-                    tipo_ram=row['tipo_ram'],
-                    disco_duro=row['disco_duro'],
-                    tipo_disco=row['tipo_disco'],
-                    color=row['color'],
-                    notas=row['notas'],
-                    usuario_asignado_id=UUID(row['usuario_asignado_id']) if row['usuario_asignado_id'] else None
-                )
+                return Equipment(**self._equipment_fields(row))
         return None
 
     def list_equipos(self) -> List[Equipment]:
         with self._get_connection() as conn:
             rows = conn.execute("SELECT * FROM equipos ORDER BY nombre_equipo").fetchall()
-            return [Equipment(
-                id=UUID(row['id']),
-                nombre_equipo=row['nombre_equipo'],
-                tipo=row['tipo'],
-                marca_modelo=row['marca_modelo'],
-                numero_serie=row['numero_serie'],
-                fecha_compra=row['fecha_compra'],
-                procesador=row['procesador'],
-                memoria_ram=row['memoria_ram'],
-                tipo_ram=row['tipo_ram'],
-                disco_duro=row['disco_duro'],
-                tipo_disco=row['tipo_disco'],
-                color=row['color'],
-                notas=row['notas'],
-                usuario_asignado_id=UUID(row['usuario_asignado_id']) if row['usuario_asignado_id'] else None
-            ) for row in rows]
+            return [Equipment(**self._equipment_fields(row)) for row in rows]
+
+    # Equipment plus assignee name/department in one query (listing and detail pages).
+    _EQUIPMENT_SELECT = """
+        SELECT e.*, u.username as usuario_asignado, u.departamento
+        FROM equipos e
+        LEFT JOIN usuarios u ON e.usuario_asignado_id = u.id
+    """
+
+    def _equipment_read_model(self, row) -> EquipmentReadModel:
+        return EquipmentReadModel(**self._equipment_fields(row),
+                                  usuario_asignado=row['usuario_asignado'],
+                                  departamento=row['departamento'])
+
+    def get_equipment_read_model(self, equipment_id: UUID) -> Optional[EquipmentReadModel]:
+        with self._get_connection() as conn:
+            row = conn.execute(self._EQUIPMENT_SELECT + " WHERE e.id = ?", (str(equipment_id),)).fetchone()
+            return self._equipment_read_model(row) if row else None
+
+    def list_equipment_read_models(self) -> List[EquipmentReadModel]:
+        with self._get_connection() as conn:
+            rows = conn.execute(self._EQUIPMENT_SELECT + " ORDER BY e.nombre_equipo").fetchall()
+            return [self._equipment_read_model(row) for row in rows]
 
     def create_equipment(self, equipment: Equipment) -> Equipment:
         with self._get_connection() as conn:
@@ -263,6 +510,7 @@ class SQLiteRepository:
                   equipment.tipo_ram, equipment.disco_duro, equipment.tipo_disco, equipment.color, equipment.notas,
                   str(equipment.usuario_asignado_id) if equipment.usuario_asignado_id else None))
             conn.commit()
+        self.bump_data_version('equipos')
         return equipment
 
     def update_equipment(self, equipment: Equipment) -> Equipment:
@@ -279,13 +527,15 @@ class SQLiteRepository:
                   str(equipment.usuario_asignado_id) if equipment.usuario_asignado_id else None,
                   str(equipment.id)))
             conn.commit()
+        self.bump_data_version('equipos')
         return equipment
 
     def delete_equipment(self, equipment_id: UUID) -> bool:
         with self._get_connection() as conn:
             cursor = conn.execute("DELETE FROM equipos WHERE id = ?", (str(equipment_id),))
             conn.commit()
-            return cursor.rowcount > 0
+        self.bump_data_version('equipos')
+        return cursor.rowcount > 0
 
     # --- Mantenimientos ---
     def list_mantenimientos(self, filters: Optional[dict] = None) -> List[dict]:
@@ -305,6 +555,7 @@ class SQLiteRepository:
                 query += " AND m.equipo_id = ?"
                 params.append(str(filters['equipo_id']))
             if 'fecha_inicio' in filters and 'fecha_fin' in filters:
+                # Range scan on idx_mantenimientos_fecha (calendar windows)
                 query += " AND m.fecha_programada BETWEEN ? AND ?"
                 params.extend([filters['fecha_inicio'], filters['fecha_fin']])
         
@@ -313,11 +564,37 @@ class SQLiteRepository:
         with self._get_connection() as conn:
             return [dict(row) for row in conn.execute(query, params).fetchall()]
 
+    def get_maintenance_by_id(self, mant_id) -> Optional[MaintenanceReadModel]:
+        """Primary-key lookup of one maintenance with its equipment and technician names."""
+        with self._get_connection() as conn:
+            row = conn.execute("""
+                SELECT m.*, e.nombre_equipo, u.username as tecnico
+                FROM mantenimientos m
+                JOIN equipos e ON m.equipo_id = e.id
+                LEFT JOIN usuarios u ON m.tecnico_asignado_id = u.id
+                WHERE m.id = ?
+            """, (str(mant_id),)).fetchone()
+            if not row:
+                return None
+            return MaintenanceReadModel(
+                id=UUID(row['id']),
+                equipo_id=UUID(row['equipo_id']),
+                titulo=row['titulo'],
+                fecha_programada=row['fecha_programada'],
+                estado=row['estado'],
+                tecnico_asignado_id=UUID(row['tecnico_asignado_id']) if row['tecnico_asignado_id'] else None,
+                motivo_reprogramacion=row['motivo_reprogramacion'],
+                comentarios=row['comentarios'],
+                nombre_equipo=row['nombre_equipo'],
+                tecnico=row['tecnico']
+            )
+
     def create_maintenance(self, mant_id: str, equipo_id: str, titulo: str, fecha: str) -> None:
         with self._get_connection() as conn:
             conn.execute("INSERT INTO mantenimientos (id, equipo_id, titulo, fecha_programada, estado) VALUES (?, ?, ?, ?, 'Pendiente')",
                        (mant_id, equipo_id, titulo, fecha))
             conn.commit()
+        self.bump_data_version('mantenimientos')
 
     def update_maintenance(self, mant_id: str, updates: dict) -> None:
         if not updates: return
@@ -329,13 +606,17 @@ class SQLiteRepository:
         with self._get_connection() as conn:
             conn.execute(query, params)
             conn.commit()
+        self.bump_data_version('mantenimientos')
 
     def delete_maintenance(self, mant_id: str) -> None:
         with self._get_connection() as conn:
             conn.execute("DELETE FROM mantenimientos WHERE id = ?", (mant_id,))
             conn.commit()
+        self.bump_data_version('mantenimientos')
 
     # --- Dashboard & KPIs ---
+    # Ticket counts come from soportes_contadores (one row per usuario/estado/categoria),
+    # so these read O(groups) rows instead of scanning soportes.
     def get_dashboard_kpis(self, role: str, user_id: UUID) -> dict:
         base_where = ""
         params = []
@@ -345,9 +626,9 @@ class SQLiteRepository:
         
         with self._get_connection() as conn:
             return {
-                "total_abiertos": conn.execute(f"SELECT COUNT(*) FROM soportes WHERE estado = 'Abierto'{base_where}", params).fetchone()[0],
-                "total_en_proceso": conn.execute(f"SELECT COUNT(*) FROM soportes WHERE estado = 'En Proceso'{base_where}", params).fetchone()[0],
-                "mis_tickets": conn.execute("SELECT COUNT(*) FROM soportes WHERE usuario_id = ? AND estado IN ('Abierto', 'En Proceso')", (str(user_id),)).fetchone()[0],
+                "total_abiertos": conn.execute(f"SELECT COALESCE(SUM(cantidad), 0) FROM soportes_contadores WHERE estado = 'Abierto'{base_where}", params).fetchone()[0],
+                "total_en_proceso": conn.execute(f"SELECT COALESCE(SUM(cantidad), 0) FROM soportes_contadores WHERE estado = 'En Proceso'{base_where}", params).fetchone()[0],
+                "mis_tickets": conn.execute("SELECT COALESCE(SUM(cantidad), 0) FROM soportes_contadores WHERE usuario_id = ? AND estado IN ('Abierto', 'En Proceso')", (str(user_id),)).fetchone()[0],
                 "mantenimientos_pendientes": conn.execute("SELECT COUNT(*) FROM mantenimientos WHERE estado = 'Pendiente'").fetchone()[0]
             }
 
@@ -359,7 +640,7 @@ class SQLiteRepository:
             params.append(str(user_id))
         
         with self._get_connection() as conn:
-            rows = conn.execute(f"SELECT estado, COUNT(*) as cantidad FROM soportes WHERE 1=1{base_where} GROUP BY estado", params).fetchall()
+            rows = conn.execute(f"SELECT estado, SUM(cantidad) as cantidad FROM soportes_contadores WHERE 1=1{base_where} GROUP BY estado", params).fetchall()
             return {"labels": [r['estado'] for r in rows], "datos": [r['cantidad'] for r in rows]}
 
     def get_category_distribution(self, role: str, user_id: UUID) -> dict:
@@ -370,9 +651,170 @@ class SQLiteRepository:
             params.append(str(user_id))
         
         with self._get_connection() as conn:
-            rows = conn.execute(f"SELECT categoria, COUNT(*) as cantidad FROM soportes WHERE 1=1{base_where} GROUP BY categoria ORDER BY cantidad DESC", params).fetchall()
+            rows = conn.execute(f"SELECT categoria, SUM(cantidad) as cantidad FROM soportes_contadores WHERE 1=1{base_where} GROUP BY categoria ORDER BY cantidad DESC", params).fetchall()
             return {"labels": [r['categoria'] for r in rows], "datos": [r['cantidad'] for r in rows]}
 
+    _COUNTERS_SOURCE_SQL = """
+        SELECT usuario_id, estado, categoria, COUNT(*) as cantidad
+        FROM soportes GROUP BY usuario_id, estado, categoria
+    """
+
+    def rebuild_ticket_counters(self) -> int:
+        """Recomputes soportes_contadores from soportes; returns the number of groups."""
+        with self._get_connection() as conn:
+            conn.execute("DELETE FROM soportes_contadores")
+            conn.execute("INSERT INTO soportes_contadores (usuario_id, estado, categoria, cantidad) "
+                         + self._COUNTERS_SOURCE_SQL)
+            conn.commit()
+            return conn.execute("SELECT COUNT(*) FROM soportes_contadores").fetchone()[0]
+
+    def verify_ticket_counters(self) -> List[dict]:
+        """Returns the groups whose materialized count drifted from soportes (empty = consistent)."""
+        with self._get_connection() as conn:
+            actual = {(r['usuario_id'], r['estado'], r['categoria']): r['cantidad']
+                      for r in conn.execute(self._COUNTERS_SOURCE_SQL)}
+            stored = {(r['usuario_id'], r['estado'], r['categoria']): r['cantidad']
+                      for r in conn.execute("SELECT usuario_id, estado, categoria, cantidad FROM soportes_contadores")}
+        drift = []
+        for key in actual.keys() | stored.keys():
+            if actual.get(key, 0) != stored.get(key, 0):
+                usuario_id, estado, categoria = key
+                drift.append({'usuario_id': usuario_id, 'estado': estado, 'categoria': categoria,
+                              'esperado': actual.get(key, 0), 'materializado': stored.get(key, 0)})
+        return drift
+
+    # --- Correo saliente (outbox) ---
+    def enqueue_emails(self, emails: List[OutboxEmail]) -> None:
+        with self._get_connection() as conn:
+            conn.executemany(
+                "INSERT INTO email_outbox (destinatarios, asunto, cuerpo_html, copia_oculta) VALUES (?, ?, ?, ?)",
+                [(", ".join(e.destinatarios), e.asunto, e.cuerpo_html, int(e.copia_oculta)) for e in emails])
+            conn.commit()
+
+    def claim_emails(self, limit: int) -> List[OutboxEmail]:
+        """Atomically moves up to ``limit`` due emails to 'Enviando' so no other worker picks them."""
+        with self._get_connection() as conn:
+            rows = conn.execute("""
+                UPDATE email_outbox
+                SET estado = 'Enviando', intentos = intentos + 1, reclamado_en = datetime('now')
+                WHERE id IN (
+                    SELECT id FROM email_outbox
+                    WHERE estado = 'Pendiente' AND proximo_intento <= datetime('now')
+                    ORDER BY id LIMIT ?
+                )
+                RETURNING id, destinatarios, asunto, cuerpo_html, copia_oculta, estado, intentos, ultimo_error
+            """, (limit,)).fetchall()
+            conn.commit()
+        return [OutboxEmail(
+            id=row['id'],
+            destinatarios=[d.strip() for d in row['destinatarios'].split(',') if d.strip()],
+            asunto=row['asunto'],
+            cuerpo_html=row['cuerpo_html'],
+            copia_oculta=bool(row['copia_oculta']),
+            estado=row['estado'],
+            intentos=row['intentos'],
+            ultimo_error=row['ultimo_error']
+        ) for row in sorted(rows, key=lambda r: r['id'])]
+
+    def mark_email_sent(self, email_id: int) -> None:
+        with self._get_connection() as conn:
+            conn.execute("UPDATE email_outbox SET estado = 'Enviado', fecha_envio = datetime('now'), "
+                         "ultimo_error = NULL WHERE id = ?", (email_id,))
+            conn.commit()
+
+    def mark_email_failed(self, email_id: int, error: str, retry_in: Optional[float]) -> None:
+        """Schedules a retry ``retry_in`` seconds from now, or gives up when it is None."""
+        with self._get_connection() as conn:
+            if retry_in is None:
+                conn.execute("UPDATE email_outbox SET estado = 'Fallido', ultimo_error = ? WHERE id = ?",
+                             (error, email_id))
+            else:
+                conn.execute("UPDATE email_outbox SET estado = 'Pendiente', ultimo_error = ?, "
+                             "proximo_intento = datetime('now', ?) WHERE id = ?",
+                             (error, f"+{int(retry_in)} seconds", email_id))
+            conn.commit()
+
+    def requeue_stale_emails(self, older_than_seconds: int = 600) -> int:
+        """Returns emails stuck in 'Enviando' (worker died mid-send) to the queue."""
+        with self._get_connection() as conn:
+            cursor = conn.execute("UPDATE email_outbox SET estado = 'Pendiente' WHERE estado = 'Enviando' "
+                                  "AND reclamado_en <= datetime('now', ?)", (f"-{int(older_than_seconds)} seconds",))
+            conn.commit()
+            return cursor.rowcount
+
+    def count_emails_by_status(self) -> dict:
+        with self._get_connection() as conn:
+            rows = conn.execute("SELECT estado, COUNT(*) as cantidad FROM email_outbox GROUP BY estado").fetchall()
+            return {row['estado']: row['cantidad'] for row in rows}
+
+    # --- Auditoría ---
+    def insert_audit_entries(self, entries: List[AuditEntry]) -> int:
+        """Writes a batch in one transaction. An entry whose user was deleted meanwhile keeps usuario_id NULL."""
+        with self._write_transaction() as conn:
+            conn.executemany(
+                "INSERT INTO auditoria_logs (usuario_id, accion, detalles, fecha) "
+                "VALUES ((SELECT id FROM usuarios WHERE id = ?), ?, ?, COALESCE(?, CURRENT_TIMESTAMP))",
+                [(e.usuario_id, e.accion, e.detalles, e.fecha) for e in entries])
+        return len(entries)
+
+    def oldest_audit_date(self) -> Optional[str]:
+        # Entries are appended in time order, so the lowest id is the oldest one.
+        with self._get_connection() as conn:
+            row = conn.execute("SELECT fecha FROM auditoria_logs ORDER BY id LIMIT 1").fetchone()
+            return row[0] if row else None
+
+    def archive_audit_logs(self, before: str, archive_path: str) -> int:
+        """
+        Moves entries dated before ``before`` into ``archive_path`` (an SQLite file
+        with the same table, created on demand) in one transaction; returns how many.
+
+        The cut is found by walking ids from the oldest entry, so the cost is
+        proportional to the rows moved rather than to the whole table.
+        """
+        with self._get_connection() as conn:
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("ATTACH DATABASE ? AS archivo", (archive_path,))
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS archivo.auditoria_logs (
+                            id INTEGER PRIMARY KEY, usuario_id TEXT, accion TEXT NOT NULL,
+                            detalles TEXT, fecha TIMESTAMP
+                        )
+                    """)
+                    row = conn.execute("SELECT id FROM main.auditoria_logs WHERE fecha >= ? ORDER BY id LIMIT 1",
+                                       (before,)).fetchone()
+                    limite = row[0] if row else conn.execute(
+                        "SELECT COALESCE(MAX(id), 0) + 1 FROM main.auditoria_logs").fetchone()[0]
+                    conn.execute("""
+                        INSERT OR IGNORE INTO archivo.auditoria_logs (id, usuario_id, accion, detalles, fecha)
+                        SELECT id, usuario_id, accion, detalles, fecha FROM main.auditoria_logs
+                        WHERE id < ? AND fecha < ?
+                    """, (limite, before))
+                    moved = conn.execute("DELETE FROM main.auditoria_logs WHERE id < ? AND fecha < ?",
+                                         (limite, before)).rowcount
+                except BaseException:
+                    conn.rollback()
+                    raise
+                conn.commit()
+            finally:
+                conn.execute("DETACH DATABASE archivo")
+        return moved
+
+    # --- Versiones de datos ---
+    # In-process counters bumped by writes so callers can cache derived state
+    # (mail transport, rendered fragments...) and rebuild it only on change.
+    def data_version(self, scope: str) -> int:
+        return self._versions.get(scope, 0)
+
+    def bump_data_version(self, scope: str) -> int:
+        with self._versions_lock:
+            version = self._versions.get(scope, 0) + 1
+            self._versions[scope] = version
+            return version
+
     # --- Configuración ---
     def get_config_by_prefix(self, prefix: str) -> dict:
         with self._get_connection() as conn:
@@ -384,4 +826,5 @@ class SQLiteRepository:
             for clave, valor in config_dict.items():
                 conn.execute("INSERT OR REPLACE INTO configuracion (clave, valor) VALUES (?, ?)", (clave, valor))
             conn.commit()
+        self.bump_data_version('configuracion')
 
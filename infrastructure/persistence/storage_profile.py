@@ -0,0 +1,68 @@
+import sqlite3
+from dataclasses import dataclass
+
+_JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+_SYNCHRONOUS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+_TEMP_STORE = {'DEFAULT', 'FILE', 'MEMORY'}
+
+
+@dataclass
+class StorageProfile:
+    """
+    PRAGMA set applied to every pooled connection.
+
+    The defaults put the database in WAL mode so readers never wait for a
+    ticket write to commit; ``synchronous=NORMAL`` is durable in WAL mode
+    except for the last transactions on power loss.
+
+    ``wal_autocheckpoint`` makes the write that crosses the threshold run the
+    checkpoint inline. It is the fallback for when no WalCheckpointManager
+    runs; set it to 0 when one does, so request writes never checkpoint.
+    """
+    journal_mode: str = 'WAL'
+    synchronous: str = 'NORMAL'
+    cache_size: int = -20000        # negative = KiB, ~20 MB per connection
+    mmap_size: int = 268435456      # 256 MB
+    temp_store: str = 'MEMORY'
+    busy_timeout: int = 5000        # ms
+    wal_autocheckpoint: int = 1000  # pages
+
+    @classmethod
+    def from_config(cls, config) -> 'StorageProfile':
+        return cls(
+            journal_mode=config.DB_JOURNAL_MODE,
+            synchronous=config.DB_SYNCHRONOUS,
+            cache_size=config.DB_CACHE_SIZE,
+            mmap_size=config.DB_MMAP_SIZE,
+            temp_store=config.DB_TEMP_STORE,
+            busy_timeout=config.DB_BUSY_TIMEOUT,
+            wal_autocheckpoint=config.DB_WAL_AUTOCHECKPOINT
+        )
+
+    def __post_init__(self):
+        # PRAGMAs do not accept bound parameters, so values are validated here.
+        self.journal_mode = self.journal_mode.upper()
+        self.synchronous = self.synchronous.upper()
+        self.temp_store = self.temp_store.upper()
+        if self.journal_mode not in _JOURNAL_MODES:
+            raise ValueError(f"journal_mode inválido: {self.journal_mode}")
+        if self.synchronous not in _SYNCHRONOUS:
+            raise ValueError(f"synchronous inválido: {self.synchronous}")
+        if self.temp_store not in _TEMP_STORE:
+            raise ValueError(f"temp_store inválido: {self.temp_store}")
+        self.cache_size = int(self.cache_size)
+        self.mmap_size = int(self.mmap_size)
+        self.busy_timeout = int(self.busy_timeout)
+        self.wal_autocheckpoint = int(self.wal_autocheckpoint)
+
+    def apply(self, conn: sqlite3.Connection) -> None:
+        """Connection setup hook for ConnectionPool."""
+        # busy_timeout first so the journal_mode switch can wait for other writers.
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout}")
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute(f"PRAGMA cache_size = {self.cache_size}")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        conn.execute(f"PRAGMA temp_store = {self.temp_store}")
+        if self.journal_mode == 'WAL':
+            conn.execute(f"PRAGMA wal_autocheckpoint = {self.wal_autocheckpoint}")
@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class WalCheckpointManager:
+    """
+    Background WAL checkpointer.
+
+    SQLite's auto-checkpoint runs inside whichever write happens to cross the
+    threshold, so one unlucky ticket insert pays for it. This runs PASSIVE
+    checkpoints on a timer from its own connection instead, escalating to
+    TRUNCATE when the -wal file grows past ``truncate_threshold`` bytes.
+
+    That only takes the cost off the writers if their connections run with
+    ``PRAGMA wal_autocheckpoint = 0`` (StorageProfile.wal_autocheckpoint);
+    otherwise both mechanisms checkpoint.
+    """
+
+    def __init__(self, db_path: str, interval: float = 60.0,
+                 truncate_threshold: int = 64 * 1024 * 1024, busy_timeout: int = 5000):
+        self.db_path = db_path
+        self.interval = interval
+        self.truncate_threshold = truncate_threshold
+        self.busy_timeout = busy_timeout
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'checkpoints': 0,
+            'busy': 0,
+            'errors': 0,
+            'last_mode': None,
+            'last_latency_ms': 0.0,
+            'max_latency_ms': 0.0,
+            'total_latency_ms': 0.0,
+            'last_wal_frames': 0,
+            'last_checkpointed_frames': 0,
+            'last_run': None,
+        }
+
+    @property
+    def wal_path(self) -> str:
+        return f"{self.db_path}-wal"
+
+    def wal_size(self) -> int:
+        try:
+            return os.path.getsize(self.wal_path)
+        except OSError:
+            return 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        return self._conn
+
+    def checkpoint(self, mode: Optional[str] = None) -> dict:
+        """Runs one checkpoint and returns SQLite's (busy, log, checkpointed) result."""
+        if mode is None:
+            mode = 'TRUNCATE' if self.wal_size() > self.truncate_threshold else 'PASSIVE'
+        with self._lock:
+            start = time.perf_counter()
+            try:
+                busy, log_frames, checkpointed = self._connection().execute(
+                    f"PRAGMA wal_checkpoint({mode})").fetchone()
+            except sqlite3.Error:
+                self._stats['errors'] += 1
+                raise
+            latency = (time.perf_counter() - start) * 1000
+            s = self._stats
+            s['checkpoints'] += 1
+            s['busy'] += 1 if busy else 0
+            s['last_mode'] = mode
+            s['last_latency_ms'] = latency
+            s['max_latency_ms'] = max(s['max_latency_ms'], latency)
+            s['total_latency_ms'] += latency
+            s['last_wal_frames'] = log_frames
+            s['last_checkpointed_frames'] = checkpointed
+            s['last_run'] = time.time()
+        return {'busy': busy, 'log': log_frames, 'checkpointed': checkpointed}
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.checkpoint()
+            except sqlite3.Error as e:
+                print(f"⚠️ Error en checkpoint WAL: {e}")
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='wal-checkpoint', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+        s['wal_size_bytes'] = self.wal_size()
+        s['avg_latency_ms'] = s['total_latency_ms'] / s['checkpoints'] if s['checkpoints'] else 0.0
+        return s
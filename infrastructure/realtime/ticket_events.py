@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+STAFF_ROOMS = ('admins', 'tecnicos')
+
+
+def room_for_role(role: Optional[str]) -> Optional[str]:
+    return {'admin': 'admins', 'tecnico': 'tecnicos'}.get(role)
+
+
+def user_room(user_id) -> str:
+    return f"user:{user_id}"
+
+
+class TicketEventBroadcaster:
+    """
+    Coalesces ticket changes and fans them out per Socket.IO room.
+
+    Events published within ``window`` seconds are sent as one ``tickets``
+    message per room instead of one broadcast per change: staff rooms get
+    every event, and each requester's ``user:<id>`` room gets the events for
+    their own tickets. Successive changes to the same ticket inside a window
+    collapse into one event (created + updated -> created, created + deleted
+    -> nothing). Every event carries a ``seq`` so clients that are in several
+    rooms can ignore copies they have already applied.
+    """
+
+    def __init__(self, socketio, window: float = 0.5, event_name: str = 'tickets'):
+        self.socketio = socketio
+        self.window = window
+        self.event_name = event_name
+        self._pending = OrderedDict()  # ticket id -> event
+        self._scheduled = False
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stats = {'published': 0, 'coalesced': 0, 'batches': 0, 'messages': 0, 'events_sent': 0}
+
+    @staticmethod
+    def _merge(previous: str, current: str) -> Optional[str]:
+        if previous == 'creado':
+            return None if current == 'eliminado' else 'creado'
+        return current
+
+    def publish(self, tipo: str, ticket: dict) -> None:
+        """Queues ``tipo`` ('creado' | 'actualizado' | 'eliminado') for ``ticket`` (needs id and usuario_id)."""
+        with self._lock:
+            self._stats['published'] += 1
+            self._seq += 1
+            previous = self._pending.pop(ticket['id'], None)
+            if previous is not None:
+                self._stats['coalesced'] += 1
+                tipo = self._merge(previous['tipo'], tipo)
+            if tipo is not None:
+                self._pending[ticket['id']] = {'tipo': tipo, 'seq': self._seq, 'ticket': ticket}
+            schedule = not self._scheduled
+            self._scheduled = True
+        if schedule:
+            self.socketio.start_background_task(self._flush_later)
+
+    def _flush_later(self) -> None:
+        self.socketio.sleep(self.window)
+        self.flush()
+
+    def flush(self) -> int:
+        """Sends everything pending now; returns the number of events sent."""
+        with self._lock:
+            eventos = list(self._pending.values())
+            self._pending.clear()
+            self._scheduled = False
+        if not eventos:
+            return 0
+
+        por_usuario = {}
+        for evento in eventos:
+            por_usuario.setdefault(evento['ticket']['usuario_id'], []).append(evento)
+
+        self.socketio.emit(self.event_name, {'eventos': eventos}, to=list(STAFF_ROOMS))
+        for usuario_id, propios in por_usuario.items():
+            self.socketio.emit(self.event_name, {'eventos': propios}, to=user_room(usuario_id))
+
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['messages'] += 1 + len(por_usuario)
+            self._stats['events_sent'] += len(eventos)
+        return len(eventos)
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            s['pending'] = len(self._pending)
+        return s
@@ -1,112 +1,220 @@
-import pandas as pd
+"""
+Importación masiva de soportes históricos (Excel o CSV) al esquema UUID actual.
+
+- Los usuarios existentes se cargan una sola vez en un mapa username -> id.
+- La contraseña por defecto de los usuarios nuevos se hashea una sola vez.
+- Los tickets se insertan con executemany en transacciones por lotes; si un
+  lote falla se reintenta fila a fila para reportar sólo las filas malas.
+- numero_ticket se reserva en bloque en la secuencia (reserve_ticket_numbers).
+
+Uso: python migracion_historica.py [archivo.xlsx|archivo.csv] [--lote 5000]
+"""
+import argparse
+import csv
+import os
 import sqlite3
+import time
+import uuid
+from datetime import date, datetime
+
 from werkzeug.security import generate_password_hash
-from datetime import datetime
 from config import config_dict
+from domain.models import TicketPriority, TicketStatus
+from infrastructure.persistence.repository import SQLiteRepository
 
 # --- CONFIGURACIÓN ---
 ARCHIVO_EXCEL = 'plantilla_soportes_historicos.xlsx'
 config = config_dict['development']
 DB_FILE = config.DB_FILE
 PASSWORD_POR_DEFECTO = '123456'  # Contraseña para usuarios nuevos creados automáticamente
+TAMANO_LOTE = 5000
 
-def conectar_db():
-    return sqlite3.connect(DB_FILE)
+INSERT_TICKET = """
+    INSERT INTO soportes (
+        id, numero_ticket, usuario_id, tecnico_id, problema, categoria, prioridad, estado,
+        solucion, fecha_creacion, fecha_finalizacion
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
-def obtener_o_crear_usuario(cursor, username, role='user'):
-    """
-    Busca si el usuario existe. Si no, lo crea automáticamente.
-    Retorna el ID del usuario.
-    """
-    if not username or pd.isna(username):
-        return None
 
-    username = str(username).strip()
-    
-    # 1. Buscar si ya existe
-    cursor.execute("SELECT id FROM usuarios WHERE username = ?", (username,))
-    resultado = cursor.fetchone()
-    
-    if resultado:
-        return resultado[0] # Retorna el ID existente
-    
-    # 2. Si no existe, crearlo
-    print(f"   ↳ 👤 Usuario '{username}' no existía. Creándolo como {role}...")
-    password_hash = generate_password_hash(PASSWORD_POR_DEFECTO)
+def leer_filas(archivo):
+    """Genera dicts por fila sin cargar el archivo completo en memoria."""
+    if archivo.lower().endswith('.csv'):
+        with open(archivo, newline='', encoding='utf-8-sig') as f:
+            for fila in csv.DictReader(f):
+                yield {k: (v if v != '' else None) for k, v in fila.items()}
+        return
+
+    from openpyxl import load_workbook
+    wb = load_workbook(archivo, read_only=True, data_only=True)
     try:
-        cursor.execute("INSERT INTO usuarios (username, password_hash, role) VALUES (?, ?, ?)", 
-                       (username, password_hash, role))
-        return cursor.lastrowid
-    except sqlite3.IntegrityError:
-        # Por seguridad, si falla por concurrencia, volvemos a buscar
-        cursor.execute("SELECT id FROM usuarios WHERE username = ?", (username,))
-        return cursor.fetchone()[0]
-
-def migrar_datos():
-    print(f"--- 🚀 INICIANDO MIGRACIÓN DESDE {ARCHIVO_EXCEL} ---")
-    
+        filas = wb.active.iter_rows(values_only=True)
+        encabezados = [str(c).strip() if c is not None else '' for c in next(filas, ())]
+        for valores in filas:
+            if not any(v is not None for v in valores):
+                continue
+            yield dict(zip(encabezados, valores))
+    finally:
+        wb.close()
+
+
+def a_texto_fecha(valor, por_defecto=None):
+    if valor is None:
+        return por_defecto
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(valor, date):
+        return valor.strftime('%Y-%m-%d')
+    return str(valor).strip() or por_defecto
+
+
+def limpiar(valor):
+    if valor is None:
+        return None
+    valor = str(valor).strip()
+    return valor or None
+
+
+def validar_enum(enum, campo, valor, por_defecto):
+    """Devuelve el valor del enum (o el por defecto si viene vacío); ValueError si no es válido."""
+    valor = limpiar(valor)
+    if valor is None:
+        return por_defecto.value
     try:
-        # Leer Excel (asegurando que los vacíos sean None)
-        df = pd.read_excel(ARCHIVO_EXCEL)
-        df = df.where(pd.notnull(df), None)
-    except FileNotFoundError:
-        print(f"❌ ERROR: No encuentro el archivo '{ARCHIVO_EXCEL}'.")
+        return enum(valor).value
+    except ValueError:
+        validos = ', '.join(e.value for e in enum)
+        raise ValueError(f"{campo} '{valor}' no válido (se espera uno de: {validos})") from None
+
+
+class ImportadorHistorico:
+    def __init__(self, repo, conn, password_hash):
+        self.repo = repo
+        self.conn = conn
+        self.password_hash = password_hash
+        # Un solo SELECT para todos los usuarios en lugar de uno por fila.
+        self.usuarios = {row['username']: row['id'] for row in conn.execute("SELECT id, username FROM usuarios")}
+        self.usuarios_creados = 0
+        self.tickets_creados = 0
+        self.errores = 0
+
+    def resolver_usuario(self, username, role, pendientes):
+        username = limpiar(username)
+        if username is None:
+            return None
+        user_id = self.usuarios.get(username)
+        if user_id is None:
+            user_id = str(uuid.uuid4())
+            self.usuarios[username] = user_id
+            pendientes.append((user_id, username, self.password_hash, role))
+            self.usuarios_creados += 1
+            print(f"   ↳ 👤 Usuario '{username}' no existía. Creándolo como {role}...")
+        return user_id
+
+    def preparar(self, fila, pendientes):
+        """Convierte una fila del archivo en la tupla de INSERT (sin numero_ticket)."""
+        # Se valida antes de resolver usuarios: una fila rechazada no debe crearlos.
+        prioridad = validar_enum(TicketPriority, 'prioridad', fila.get('prioridad'), TicketPriority.MEDIA)
+        estado = validar_enum(TicketStatus, 'estado', fila.get('estado'), TicketStatus.CERRADO)
+        usuario_id = self.resolver_usuario(fila.get('usuario_reporta'), 'user', pendientes)
+        if usuario_id is None:
+            raise ValueError("usuario_reporta vacío")
+        tecnico_id = self.resolver_usuario(fila.get('tecnico_asignado'), 'tecnico', pendientes)
+        return (
+            str(uuid.uuid4()), usuario_id, tecnico_id,
+            limpiar(fila.get('problema')) or "Sin descripción importada",
+            limpiar(fila.get('categoria')) or "Otro",
+            prioridad,
+            estado,
+            limpiar(fila.get('solucion')),
+            a_texto_fecha(fila.get('fecha'), datetime.now().strftime('%Y-%m-%d')),
+            a_texto_fecha(fila.get('fecha_cierre')),
+        )
+
+    def escribir_lote(self, lote, pendientes):
+        """Inserta usuarios nuevos y tickets del lote en una sola transacción."""
+        conn = self.conn
+        # Bloque de números reservado aparte: si el lote falla sólo quedan huecos.
+        numeros = self.repo.reserve_ticket_numbers(len(lote)) if lote else range(0)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR IGNORE INTO usuarios (id, username, password_hash, role) VALUES (?, ?, ?, ?)",
+                             pendientes)
+            filas = [(t[0], numero) + t[1:] for numero, (_, t) in zip(numeros, lote)]
+            conn.executemany(INSERT_TICKET, filas)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            self.escribir_fila_a_fila(lote, pendientes, numeros)
+            return
+        self.tickets_creados += len(lote)
+
+    def escribir_fila_a_fila(self, lote, pendientes, numeros):
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("INSERT OR IGNORE INTO usuarios (id, username, password_hash, role) VALUES (?, ?, ?, ?)",
+                         pendientes)
+        for numero, (numero_fila, t) in zip(numeros, lote):
+            try:
+                conn.execute("SAVEPOINT fila")
+                conn.execute(INSERT_TICKET, (t[0], numero) + t[1:])
+                conn.execute("RELEASE fila")
+                self.tickets_creados += 1
+            except sqlite3.Error as e:
+                conn.execute("ROLLBACK TO fila")
+                conn.execute("RELEASE fila")
+                self.errores += 1
+                print(f"❌ Error en fila {numero_fila}: {e}")
+        conn.commit()
+
+
+def migrar_datos(archivo=ARCHIVO_EXCEL, tamano_lote=TAMANO_LOTE):
+    print(f"--- 🚀 INICIANDO MIGRACIÓN DESDE {archivo} ---")
+    if not os.path.exists(archivo):
+        print(f"❌ ERROR: No encuentro el archivo '{archivo}'.")
         print("   Por favor crea el archivo y asegúrate de que esté en la misma carpeta.")
         return
 
-    conn = conectar_db()
-    cursor = conn.cursor()
-    
-    tickets_creados = 0
-    usuarios_nuevos = 0 # Contador simple (aprox)
+    repo = SQLiteRepository(DB_FILE)
+    repo.init_schema()
+    inicio = time.perf_counter()
 
-    print(f"📂 Se encontraron {len(df)} registros para procesar.")
+    with repo.pool.connection() as conn:
+        importador = ImportadorHistorico(repo, conn, generate_password_hash(PASSWORD_POR_DEFECTO))
+        lote, pendientes = [], []
+        # La fila 1 es el encabezado, así que los números coinciden con Excel.
+        for numero_fila, fila in enumerate(leer_filas(archivo), start=2):
+            try:
+                lote.append((numero_fila, importador.preparar(fila, pendientes)))
+            except Exception as e:
+                importador.errores += 1
+                print(f"❌ Error en fila {numero_fila}: {e}")
+                continue
+            if len(lote) >= tamano_lote:
+                importador.escribir_lote(lote, pendientes)
+                lote, pendientes = [], []
+                transcurrido = time.perf_counter() - inicio
+                print(f"   ... Procesados {importador.tickets_creados} tickets "
+                      f"({importador.tickets_creados / transcurrido:,.0f} filas/s).")
+        if lote or pendientes:
+            importador.escribir_lote(lote, pendientes)
+
+    repo.pool.close()
+    transcurrido = time.perf_counter() - inicio
 
-    for index, row in df.iterrows():
-        try:
-            # 1. Resolver ID del Usuario (Reportador)
-            usuario_id = obtener_o_crear_usuario(cursor, row['usuario_reporta'], 'user')
-            
-            # 2. Resolver ID del Técnico (Opcional)
-            tecnico_id = obtener_o_crear_usuario(cursor, row['tecnico_asignado'], 'tecnico')
-
-            # 3. Preparar datos del Ticket
-            fecha_creacion = row['fecha'] if row['fecha'] else datetime.now().strftime('%Y-%m-%d')
-            # Si es fecha de Excel (timestamp), convertir a string
-            if isinstance(fecha_creacion, datetime):
-                fecha_creacion = fecha_creacion.strftime('%Y-%m-%d %H:%M:%S')
-
-            problema = row['problema'] or "Sin descripción importada"
-            categoria = row['categoria'] or "Otro"
-            prioridad = row['prioridad'] or "Media"
-            estado = row['estado'] or "Cerrado"
-            solucion = row['solucion']
-            fecha_finalizacion = row['fecha_cierre']
-
-            # 4. Insertar Ticket
-            cursor.execute("""
-                INSERT INTO soportes (
-                    usuario_id, tecnico_id, problema, categoria, prioridad, estado, 
-                    solucion, fecha_creacion, fecha_finalizacion
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (usuario_id, tecnico_id, problema, categoria, prioridad, estado, solucion, fecha_creacion, fecha_finalizacion))
-            
-            tickets_creados += 1
-            if tickets_creados % 10 == 0:
-                print(f"   ... Procesados {tickets_creados} tickets.")
-
-        except Exception as e:
-            print(f"❌ Error en fila {index + 2}: {e}")
-            continue
-
-    conn.commit()
-    conn.close()
-    
     print("\n" + "="*40)
-    print(f"✅ MIGRACIÓN COMPLETADA")
-    print(f"📊 Total Tickets Importados: {tickets_creados}")
+    print("✅ MIGRACIÓN COMPLETADA")
+    print(f"📊 Total Tickets Importados: {importador.tickets_creados}")
+    print(f"👤 Usuarios nuevos: {importador.usuarios_creados}")
+    print(f"⚠️  Filas con error: {importador.errores}")
+    print(f"⏱️  {transcurrido:.1f} s ({importador.tickets_creados / max(transcurrido, 1e-9):,.0f} filas/s)")
     print(f"🔑 Nota: Los usuarios nuevos tienen la contraseña: '{PASSWORD_POR_DEFECTO}'")
     print("="*40)
 
+
 if __name__ == '__main__':
-    migrar_datos()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Importa soportes históricos desde Excel o CSV.")
+    parser.add_argument('archivo', nargs='?', default=ARCHIVO_EXCEL)
+    parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Filas por transacción")
+    args = parser.parse_args()
+    migrar_datos(args.archivo, args.lote)
@@ -0,0 +1,69 @@
+"""
+Benchmark: logins concurrentes bajo eventlet (como el worker de gunicorn).
+
+Lanza N verificaciones de contraseña a la vez mientras un "dashboard" (un
+green thread que pide cada 10 ms) mide cuánto se retrasa. Compara el hash en
+línea (comportamiento anterior) con AuthService, que lo manda a hilos nativos.
+
+Uso: python scripts/bench_auth.py [--logins 20] [--workers 4]
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from werkzeug.security import check_password_hash, generate_password_hash
+from application.services.auth_service import AuthService
+
+TICK = 0.01
+
+
+def medir(verificar, password_hash, logins):
+    """Devuelve (tiempo total, retraso máximo del dashboard, peticiones atendidas)."""
+    retrasos = []
+    activo = [True]
+
+    def dashboard():
+        while activo[0]:
+            start = time.perf_counter()
+            eventlet.sleep(TICK)
+            retrasos.append(time.perf_counter() - start - TICK)
+
+    latido = eventlet.spawn(dashboard)
+    eventlet.sleep(TICK * 3)
+    start = time.perf_counter()
+    pool = eventlet.GreenPool(logins)
+    for _ in range(logins):
+        pool.spawn(verificar, password_hash, 'clave-correcta')
+    pool.waitall()
+    total = time.perf_counter() - start
+    activo[0] = False
+    latido.wait()
+    return total, max(retrasos), len(retrasos)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    password_hash = generate_password_hash('clave-correcta')
+    print(f"{args.logins} logins concurrentes, hash {password_hash.split('$')[0]}")
+
+    total, retraso, ticks = medir(check_password_hash, password_hash, args.logins)
+    print(f"en línea:      {total * 1000:8.1f} ms  dashboard bloqueado hasta {retraso * 1000:7.1f} ms  ({ticks} respuestas)")
+
+    auth = AuthService(workers=args.workers)
+    total, retraso, ticks = medir(auth.verify_password, password_hash, args.logins)
+    print(f"AuthService:   {total * 1000:8.1f} ms  dashboard bloqueado hasta {retraso * 1000:7.1f} ms  ({ticks} respuestas)")
+    print(auth.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: conexiones por petición del dashboard.
+
+Compara el comportamiento anterior (un sqlite3.connect() por método del
+repositorio) con el pool, con y sin un lease por petición. app.py no usa el
+lease: toma conexiones solo alrededor de cada llamada al repositorio, y el pool
+las reutiliza sin abrir nuevas.
+
+Uso: python scripts/bench_connection_pool.py [--requests 2000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from infrastructure.persistence.db_schema import SCHEMA_SQL
+from infrastructure.persistence.connection_pool import ConnectionPool
+from infrastructure.persistence.repository import SQLiteRepository
+
+
+class LegacyRepository(SQLiteRepository):
+    """Reproduce el _get_connection original: abrir y cerrar en cada método."""
+    opened = 0
+
+    @contextmanager
+    def _get_connection(self):
+        LegacyRepository.opened += 1
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+def seed(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_SQL)
+    user_id = str(uuid.uuid4())
+    conn.execute("INSERT INTO usuarios (id, username, password_hash, role) VALUES (?, 'bench', 'x', 'admin')", (user_id,))
+    conn.executemany(
+        "INSERT INTO soportes (id, numero_ticket, usuario_id, problema, estado) VALUES (?, ?, ?, 'bench', ?)",
+        [(str(uuid.uuid4()), i, user_id, ['Abierto', 'En Proceso', 'Resuelto'][i % 3]) for i in range(1, 501)])
+    conn.commit()
+    conn.close()
+    return uuid.UUID(user_id)
+
+
+def dashboard_request(repo, user_id):
+    repo.get_dashboard_kpis('admin', user_id)
+    repo.get_status_distribution('admin', user_id)
+    repo.get_category_distribution('admin', user_id)
+
+
+def run(label, repo, user_id, requests, lease=None):
+    start = time.perf_counter()
+    for _ in range(requests):
+        if lease:
+            with lease():
+                dashboard_request(repo, user_id)
+        else:
+            dashboard_request(repo, user_id)
+    elapsed = time.perf_counter() - start
+    return label, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        user_id = seed(db_path)
+
+        legacy = LegacyRepository(db_path)
+        label, elapsed = run('legacy (connect por método)', legacy, user_id, args.requests)
+        print(f"{label:<34} {elapsed * 1000 / args.requests:7.3f} ms/req  "
+              f"{LegacyRepository.opened / args.requests:.1f} conexiones/req")
+
+        pool = ConnectionPool(db_path)
+        repo = SQLiteRepository(db_path, pool=pool)
+        label, elapsed = run('pool sin lease', repo, user_id, args.requests)
+        s = pool.stats()
+        print(f"{label:<34} {elapsed * 1000 / args.requests:7.3f} ms/req  "
+              f"{s['acquired'] / args.requests:.1f} checkouts/req, {s['created']} abiertas en total")
+        pool.close()
+
+        pool = ConnectionPool(db_path)
+        repo = SQLiteRepository(db_path, pool=pool)
+        label, elapsed = run('pool con lease por petición', repo, user_id, args.requests, lease=pool.lease)
+        s = pool.stats()
+        print(f"{label:<34} {elapsed * 1000 / args.requests:7.3f} ms/req  "
+              f"{s['acquired'] / args.requests:.1f} checkouts/req, {s['created']} abiertas en total")
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: aviso a una lista de distribución contra un SMTP de prueba.
+
+Compara el envío anterior (config leída de la DB, Mail nuevo y una sesión SMTP
+por destinatario) con MailTransport reutilizando la sesión para todo el lote
+y con el modo CCO (un único mensaje). Cuenta handshakes SMTP y transacciones
+en el servidor de prueba, que simula latencia de red por comando.
+
+Uso: python scripts/bench_email.py [--recipients 50] [--latency 0.02]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from flask_mail import Connection, Mail, Message
+
+from infrastructure.mail.mail_transport import MailTransport
+from infrastructure.persistence.repository import SQLiteRepository
+from scripts.smtp_stub import StubSMTPServer
+
+HTML = "<p>Mantenimiento programado del servidor de archivos el sábado a las 08:00.</p>" * 20
+
+
+def legacy(repo, recipients):
+    # Lo que hacía send_email(): por cada destinatario, config de la DB + Mail nuevo + sesión propia
+    for r in recipients:
+        settings = repo.get_config_by_prefix('MAIL_')
+        settings['MAIL_PORT'] = int(settings['MAIL_PORT'])
+        settings['MAIL_USE_TLS'] = settings['MAIL_USE_TLS'].lower() == 'true'
+        state = Mail().init_mail(settings)
+        msg = Message("Aviso", sender=settings['MAIL_USERNAME'], recipients=[r])
+        msg.html = HTML
+        with Connection(state) as conn:
+            conn.send(msg)
+
+
+def per_recipient(transport, recipients):
+    messages = []
+    for r in recipients:
+        msg = Message("Aviso", recipients=[r])
+        msg.html = HTML
+        messages.append(msg)
+    failures = transport.send_batch(messages)
+    assert not failures, failures
+
+
+def bcc(transport, recipients):
+    msg = Message("Aviso", bcc=recipients)
+    msg.html = HTML
+    transport.send(msg)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--recipients', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.02, help="latencia simulada por handshake y por DATA")
+    args = parser.parse_args()
+    recipients = [f"usuario{i}@empresa.com" for i in range(args.recipients)]
+
+    app = Flask(__name__)
+    Mail(app)  # Message.as_bytes() lee current_app.extensions['mail']
+    with tempfile.TemporaryDirectory() as tmp, app.app_context():
+        repo = SQLiteRepository(os.path.join(tmp, 'bench.db'))
+        repo.init_schema()
+
+        print(f"{args.recipients} destinatarios, latencia simulada {args.latency * 1000:.0f} ms")
+        print(f"{'modo':<28} {'handshakes':>10} {'transacciones':>13} {'tiempo s':>9}")
+        escenarios = [
+            ('anterior (1 sesión c/u)', lambda t: legacy(repo, recipients)),
+            ('sesión reutilizada', lambda t: per_recipient(t, recipients)),
+            ('CCO (un mensaje)', lambda t: bcc(t, recipients)),
+        ]
+        for label, run in escenarios:
+            with StubSMTPServer(latency=args.latency) as smtp:
+                repo.save_config({'MAIL_SERVER': smtp.host, 'MAIL_PORT': str(smtp.port),
+                                  'MAIL_USE_TLS': 'False', 'MAIL_USERNAME': 'soporte@empresa.com'})
+                transport = MailTransport(repo, {})
+                start = time.perf_counter()
+                run(transport)
+                elapsed = time.perf_counter() - start
+                transport.close()
+                entregados = len(smtp.recipients)
+                assert entregados == args.recipients, entregados
+                print(f"{label:<28} {smtp.connections:>10} {len(smtp.messages):>13} {elapsed:9.2f}")
+        repo.pool.close()
+
+
+if __name__ == '__main__':
+    main()
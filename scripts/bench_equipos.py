@@ -0,0 +1,70 @@
+"""
+Benchmark: listado de equipos con el usuario asignado.
+
+Compara el patrón anterior de lista_equipos() (list_equipos() dos veces y un
+get_user_by_id() por fila) con list_equipment_read_models() (un JOIN), contando
+checkouts de conexión del pool y tiempo.
+
+Uso: python scripts/bench_equipos.py [--equipos 5000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from infrastructure.persistence.repository import SQLiteRepository
+
+
+def seed(repo, equipos):
+    users = [(str(uuid.uuid4()), f"usuario{i}", f"Depto {i % 12}") for i in range(equipos // 2)]
+    with repo.pool.connection() as conn:
+        conn.executemany("INSERT INTO usuarios (id, username, password_hash, departamento) VALUES (?, ?, 'x', ?)", users)
+        conn.executemany("INSERT INTO equipos (id, nombre_equipo, tipo, usuario_asignado_id) VALUES (?, ?, ?, ?)",
+                         [(str(uuid.uuid4()), f"EQ-{i:05d}", 'Laptop' if i % 3 else 'Desktop',
+                           users[i % len(users)][0] if i % 4 else None) for i in range(equipos)])
+        conn.commit()
+
+
+def legacy(repo):
+    repo.list_equipos()
+    equipos = repo.list_equipos()
+    for e in equipos:
+        if e.usuario_asignado_id:
+            user = repo.get_user_by_id(e.usuario_asignado_id)
+            setattr(e, 'usuario_asignado', user.username if user else None)
+        else:
+            setattr(e, 'usuario_asignado', None)
+    return equipos
+
+
+def measure(label, repo, fn):
+    before = repo.pool.stats()['acquired']
+    start = time.perf_counter()
+    equipos = fn(repo)
+    elapsed = time.perf_counter() - start
+    checkouts = repo.pool.stats()['acquired'] - before
+    asignados = sum(1 for e in equipos if e.usuario_asignado)
+    print(f"{label:<32} checkouts={checkouts:>6}  tiempo={elapsed * 1000:8.1f} ms  asignados={asignados}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--equipos', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = SQLiteRepository(os.path.join(tmp, 'bench.db'))
+        repo.init_schema()
+        seed(repo, args.equipos)
+        print(f"{args.equipos} equipos")
+        measure('anterior (N+1)', repo, legacy)
+        measure('list_equipment_read_models()', repo, lambda r: r.list_equipment_read_models())
+        repo.pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: feed del calendario (/api/eventos) con años de historial.
+
+Compara serializar todos los mantenimientos (comportamiento anterior) con la
+consulta por ventana visible sobre idx_mantenimientos_fecha, navegando mes a
+mes como FullCalendar (ventanas de 6 semanas).
+
+Uso: python scripts/bench_eventos.py [--anios 5] [--por-dia 25]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from infrastructure.persistence.repository import SQLiteRepository
+
+
+def seed(repo, anios, por_dia):
+    rnd = random.Random(7)
+    equipos = [(str(uuid.uuid4()), f"EQ-{i:04d}") for i in range(500)]
+    inicio = date.today() - timedelta(days=365 * anios)
+    filas = []
+    for d in range(365 * anios):
+        fecha = (inicio + timedelta(days=d)).isoformat()
+        for _ in range(por_dia):
+            filas.append((str(uuid.uuid4()), rnd.choice(equipos)[0], "Mantenimiento preventivo", fecha,
+                          rnd.choice(['Pendiente', 'Realizado'])))
+    with repo.pool.connection() as conn:
+        conn.executemany("INSERT INTO equipos (id, nombre_equipo) VALUES (?, ?)", equipos)
+        conn.executemany("INSERT INTO mantenimientos (id, equipo_id, titulo, fecha_programada, estado) "
+                         "VALUES (?, ?, ?, ?, ?)", filas)
+        conn.commit()
+    return inicio, len(filas)
+
+
+def serializar(eventos):
+    return json.dumps([{'id': ev['id'], 'title': f"{ev['nombre_equipo']}: {ev['titulo']}",
+                        'start': ev['fecha_programada']} for ev in eventos])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--anios', type=int, default=5)
+    parser.add_argument('--por-dia', type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = SQLiteRepository(os.path.join(tmp, 'bench.db'))
+        repo.init_schema()
+        inicio, total = seed(repo, args.anios, args.por_dia)
+        print(f"{total} mantenimientos en {args.anios} años")
+
+        start = time.perf_counter()
+        body = serializar(repo.list_mantenimientos())
+        print(f"todo el historial:     {(time.perf_counter() - start) * 1000:8.1f} ms  ({len(body) / 2 ** 20:.1f} MiB)")
+
+        tiempos = []
+        for mes in range(12 * args.anios):
+            ini = inicio + timedelta(days=30 * mes)
+            fin = ini + timedelta(days=42)
+            start = time.perf_counter()
+            serializar(repo.list_mantenimientos(filters={'fecha_inicio': ini.isoformat(), 'fecha_fin': fin.isoformat()}))
+            tiempos.append(time.perf_counter() - start)
+        tiempos.sort()
+        print(f"ventana de 6 semanas:  p50={tiempos[len(tiempos) // 2] * 1000:6.1f} ms  "
+              f"max={tiempos[-1] * 1000:6.1f} ms  ({len(tiempos)} meses navegados)")
+        repo.pool.close()
+
+
+if __name__ == '__main__':
+    main()
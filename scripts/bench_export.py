@@ -0,0 +1,97 @@
+"""
+Benchmark: memoria pico (RSS) al exportar tickets.
+
+Compara la exportación anterior (pandas.read_sql + to_excel, como
+gestor_soportes_db.exportar_a_excel) con el streaming de /soportes/export
+(iter_tickets + iter_csv / write_xlsx en modo write-only). Cada modo corre en
+un subproceso para medir su RSS pico por separado.
+
+Uso: python scripts/bench_export.py [--tickets 500000] [--legacy]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from infrastructure.persistence.db_schema import SCHEMA_SQL
+
+
+def seed(db_path, tickets):
+    import sqlite3
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_SQL)
+    users = [str(uuid.uuid4()) for _ in range(200)]
+    conn.executemany("INSERT INTO usuarios (id, username, password_hash) VALUES (?, ?, 'x')",
+                     [(u, f"usuario{i}") for i, u in enumerate(users)])
+    batch = []
+    for i in range(1, tickets + 1):
+        batch.append((str(uuid.uuid4()), i, users[i % 200], f"Problema reportado número {i} " * 3,
+                      f"Solución aplicada {i}" if i % 2 else None))
+        if len(batch) == 20000:
+            conn.executemany("INSERT INTO soportes (id, numero_ticket, usuario_id, problema, solucion) "
+                             "VALUES (?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO soportes (id, numero_ticket, usuario_id, problema, solucion) "
+                         "VALUES (?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.close()
+
+
+def run_mode(mode, db_path, out_path):
+    if mode == 'pandas':
+        import sqlite3
+        import pandas as pd
+        conn = sqlite3.connect(db_path)
+        df = pd.read_sql_query("SELECT * FROM soportes ORDER BY id", conn)
+        df.to_excel(out_path, index=False)
+        return
+    from infrastructure.export.ticket_export import iter_csv, write_xlsx
+    from infrastructure.persistence.repository import SQLiteRepository
+    repo = SQLiteRepository(db_path)
+    tickets = repo.iter_tickets()
+    if mode == 'csv':
+        with open(out_path, 'w', encoding='utf-8') as f:
+            for chunk in iter_csv(tickets):
+                f.write(chunk)
+    else:
+        with open(out_path, 'wb') as f:
+            write_xlsx(tickets, f)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickets', type=int, default=500000)
+    parser.add_argument('--legacy', action='store_true', help="incluye pandas.to_excel (lento)")
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--out', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        start = time.perf_counter()
+        run_mode(args.mode, args.db, args.out)
+        elapsed = time.perf_counter() - start
+        peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{args.mode:<8} tiempo={elapsed:6.1f} s  RSS pico={peak_mib:7.1f} MiB  "
+              f"archivo={os.path.getsize(args.out) / 2 ** 20:6.1f} MiB")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        seed(db_path, args.tickets)
+        print(f"{args.tickets} tickets")
+        modes = (['pandas'] if args.legacy else []) + ['csv', 'xlsx']
+        for mode in modes:
+            out = os.path.join(tmp, f"export_{mode}.{'csv' if mode == 'csv' else 'xlsx'}")
+            subprocess.run([sys.executable, __file__, '--mode', mode, '--db', db_path, '--out', out], check=True)
+
+
+if __name__ == '__main__':
+    main()
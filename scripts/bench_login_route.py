@@ -0,0 +1,142 @@
+"""
+Benchmark: ráfaga de logins por la ruta /login real, bajo eventlet.
+
+A diferencia de bench_auth.py (que llama a AuthService directamente), arranca
+la app completa en un servidor eventlet.wsgi (como gunicorn -k eventlet -w 1),
+con su pool de conexiones, y lanza N POST /login concurrentes mientras otro
+cliente consulta /api/soportes?limit=1. Reporta la latencia de esas consultas
+durante la ráfaga y las esperas del pool.
+
+Con --con-lease reproduce el comportamiento anterior (una conexión del pool
+reservada durante toda la petición) para comparar.
+
+Uso: python scripts/bench_login_route.py [--logins 30] [--con-lease]
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import http.client
+import importlib
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from eventlet import wsgi
+
+from benchmarks.generator import CUENTAS, PASSWORD, generar
+
+INTERVALO_CONSULTA = 0.02
+
+
+def _pedir(puerto, metodo, ruta, cuerpo=None, cookie=None):
+    conn = http.client.HTTPConnection('127.0.0.1', puerto, timeout=60)
+    headers = {'Content-Type': 'application/x-www-form-urlencoded'} if cuerpo else {}
+    if cookie:
+        headers['Cookie'] = cookie
+    try:
+        conn.request(metodo, ruta, body=cuerpo, headers=headers)
+        resp = conn.getresponse()
+        resp.read()
+        return resp.status, resp.getheader('Set-Cookie')
+    finally:
+        conn.close()
+
+
+def _login(puerto, username):
+    return _pedir(puerto, 'POST', '/login', urlencode({'username': username, 'password': PASSWORD}))
+
+
+def rafaga(modulo_app, puerto, logins):
+    """Devuelve (latencias de las consultas en s, duración de la ráfaga, respuestas de login)."""
+    estado, cookie = _login(puerto, CUENTAS[0][0])
+    if estado != 302 or not cookie:
+        raise RuntimeError(f"No se pudo iniciar sesión ({estado})")
+    cookie = cookie.split(';', 1)[0]
+
+    latencias = []
+    activo = [True]
+
+    def consultar():
+        while activo[0]:
+            inicio = time.perf_counter()
+            estado, _ = _pedir(puerto, 'GET', '/api/soportes?limit=1', cookie=cookie)
+            if estado != 200:
+                raise RuntimeError(f"/api/soportes devolvió {estado}")
+            latencias.append(time.perf_counter() - inicio)
+            eventlet.sleep(INTERVALO_CONSULTA)
+
+    consultor = eventlet.spawn(consultar)
+    eventlet.sleep(INTERVALO_CONSULTA * 5)
+    latencias.clear()
+
+    inicio = time.perf_counter()
+    pool = eventlet.GreenPool(logins)
+    respuestas = list(pool.imap(lambda i: _login(puerto, CUENTAS[i % len(CUENTAS)][0])[0], range(logins)))
+    duracion = time.perf_counter() - inicio
+    activo[0] = False
+    consultor.wait()
+    return latencias, duracion, respuestas
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=30)
+    parser.add_argument('--con-lease', action='store_true',
+                        help="Reserva una conexión por petición, como antes (para comparar)")
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix='soportes-login-')
+    try:
+        generar(os.path.join(directorio, 'soportes_v2.db'), usuarios=50, equipos=20, tickets=2000,
+                mantenimientos=50)
+        # app.py abre 'soportes_v2.db' relativo al directorio actual; sin workers de correo
+        os.environ.setdefault('MAIL_WORKERS', '0')
+        os.chdir(directorio)
+        modulo_app = importlib.import_module('app')
+        app, pool_db = modulo_app.app, modulo_app.pool
+
+        if args.con_lease:
+            @app.before_request
+            def reservar_conexion():
+                pool_db.acquire()
+
+            @app.teardown_request
+            def liberar_conexion(exc):
+                pool_db.release()
+
+        servidor = eventlet.listen(('127.0.0.1', 0))
+        puerto = servidor.getsockname()[1]
+        hilo_servidor = eventlet.spawn(wsgi.server, servidor, app, log_output=False)
+
+        esperas_antes = pool_db.stats()['waits']
+        latencias, duracion, respuestas = rafaga(modulo_app, puerto, args.logins)
+        esperas = pool_db.stats()['waits'] - esperas_antes
+        hilo_servidor.kill()
+        modulo_app.outbox_worker.stop()
+        modulo_app.wal_checkpointer.stop()
+    finally:
+        os.chdir(PROJECT_ROOT)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    latencias.sort()
+    modo = 'lease por petición (anterior)' if args.con_lease else 'conexión por llamada al repositorio'
+    print(f"{args.logins} logins concurrentes por /login, {modo}, pool de {pool_db.max_size}")
+    print(f"  ráfaga: {duracion * 1000:.0f} ms, respuestas {sorted(set(respuestas))}")
+    if latencias:
+        print(f"  /api/soportes durante la ráfaga: {len(latencias)} respuestas, "
+              f"p50 {statistics.median(latencias) * 1000:.1f} ms, "
+              f"p95 {latencias[int(len(latencias) * 0.95)] * 1000:.1f} ms, máx {latencias[-1] * 1000:.1f} ms")
+    print(f"  esperas del pool: {esperas}")
+    print(f"  auth: {modulo_app.auth_service.stats()}")
+
+
+if __name__ == '__main__':
+    main()
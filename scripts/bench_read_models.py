@@ -0,0 +1,101 @@
+"""
+Microbenchmark: hidratación de listados de tickets.
+
+Compara TicketReadModel (dataclass con UUID/Enum parseados por fila) con
+TicketRowView (slots, conversión perezosa) sobre las mismas filas, midiendo
+costo por fila y pico de memoria con tracemalloc. El escenario "plantilla"
+lee solo los campos que usa lista_soportes.html.
+
+Uso: python scripts/bench_read_models.py [--rows 100000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from domain.models import TicketReadModel, TicketRowView, TicketPriority, TicketStatus
+from infrastructure.persistence.db_schema import SCHEMA_SQL
+from infrastructure.persistence.repository import SQLiteRepository
+
+
+def build_rows(n):
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_SQL)
+    users = [str(uuid.uuid4()) for _ in range(50)]
+    conn.executemany("INSERT INTO usuarios (id, username, password_hash) VALUES (?, ?, 'x')",
+                     [(u, f"user{i}") for i, u in enumerate(users)])
+    estados = [e.value for e in TicketStatus]
+    prioridades = [p.value for p in TicketPriority]
+    conn.executemany(
+        "INSERT INTO soportes (id, numero_ticket, usuario_id, tecnico_id, problema, estado, prioridad) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(str(uuid.uuid4()), i, users[i % 50], users[(i + 1) % 50] if i % 2 else None,
+          f"Problema {i}", estados[i % 4], prioridades[i % 4]) for i in range(n)])
+    rows = conn.execute(SQLiteRepository._TICKET_SELECT + " ORDER BY s.fecha_creacion DESC").fetchall()
+    conn.close()
+    return rows
+
+
+def legacy(row):
+    return TicketReadModel(
+        id=uuid.UUID(row['id']),
+        numero_ticket=row['numero_ticket'],
+        usuario_id=uuid.UUID(row['usuario_id']),
+        problema=row['problema'],
+        categoria=row['categoria'],
+        prioridad=TicketPriority(row['prioridad']),
+        tecnico_id=uuid.UUID(row['tecnico_id']) if row['tecnico_id'] else None,
+        equipo_id=uuid.UUID(row['equipo_id']) if row['equipo_id'] else None,
+        estado=TicketStatus(row['estado']),
+        solucion=row['solucion'],
+        fecha_creacion=row['fecha_creacion'],
+        fecha_finalizacion=row['fecha_finalizacion'],
+        nombre_usuario=row['nombre_usuario'],
+        nombre_tecnico=row['nombre_tecnico'],
+        nombre_equipo=row['nombre_equipo']
+    )
+
+
+def render_fields(t):
+    # Campos que lee lista_soportes.html por fila
+    return (t.numero_ticket, t.fecha_creacion, t.nombre_usuario, t.problema, t.categoria,
+            t.prioridad.value, t.estado.value, t.nombre_tecnico, t.id, t.usuario_id)
+
+
+def measure(label, rows, build, touch):
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = [build(r) for r in rows]
+    hydrate = time.perf_counter() - start
+    if touch:
+        for t in items:
+            render_fields(t)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = len(rows)
+    print(f"{label:<38} hidratar={hydrate * 1e6 / n:6.2f} µs/fila  total={total * 1e6 / n:6.2f} µs/fila  "
+          f"pico={peak / 2 ** 20:7.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    print(f"{len(rows)} filas")
+    measure('TicketReadModel (solo hidratar)', rows, legacy, touch=False)
+    measure('TicketRowView   (solo hidratar)', rows, TicketRowView, touch=False)
+    measure('TicketReadModel (+ campos plantilla)', rows, legacy, touch=True)
+    measure('TicketRowView   (+ campos plantilla)', rows, TicketRowView, touch=True)
+
+
+if __name__ == '__main__':
+    main()
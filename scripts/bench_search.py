@@ -0,0 +1,116 @@
+"""
+Benchmark: búsqueda LIKE '%término%' (estilo buscar_soportes()) contra FTS5.
+
+Genera un dataset sintético (200k tickets por defecto), construye el índice
+con el esquema real (triggers incluidos) y mide ambas búsquedas.
+
+Uso: python scripts/bench_search.py [--tickets 200000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from infrastructure.persistence.db_schema import SCHEMA_SQL
+from infrastructure.persistence.repository import SQLiteRepository
+
+PALABRAS = ("impresora monitor teclado mouse red wifi correo outlook contraseña bloqueo vpn "
+            "disco lento pantalla azul licencia office actualización servidor carpeta compartida "
+            "escáner cable hdmi batería cargador audio micrófono cámara zoom teams navegador").split()
+TERMINOS = ['impresora', 'vpn', 'pantalla azul', 'contraseña bloqueo', 'hdmi', 'usuario42', 'EQ-1234']
+
+
+def vocabulario(rnd, size=5000):
+    letras = 'abcdefghijklmnopqrstuvwxyz'
+    return ["".join(rnd.choice(letras) for _ in range(rnd.randint(4, 10))) for _ in range(size)]
+
+
+def frase(rnd, n, vocab):
+    # Mezcla de jerga de soporte (frecuente) y texto libre (cola larga), como los tickets reales.
+    return " ".join(rnd.choice(PALABRAS) if rnd.random() < 0.15 else rnd.choice(vocab) for _ in range(n))
+
+
+def seed(db_path, tickets):
+    rnd = random.Random(42)
+    vocab = vocabulario(rnd)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_SQL)
+    users = [(str(uuid.uuid4()), f"usuario{i}") for i in range(500)]
+    conn.executemany("INSERT INTO usuarios (id, username, password_hash) VALUES (?, ?, 'x')", users)
+    equipos = [(str(uuid.uuid4()), f"EQ-{i:04d}") for i in range(2000)]
+    conn.executemany("INSERT INTO equipos (id, nombre_equipo) VALUES (?, ?)", equipos)
+    batch = []
+    for i in range(1, tickets + 1):
+        batch.append((str(uuid.uuid4()), i, rnd.choice(users)[0], rnd.choice(equipos)[0],
+                      frase(rnd, 8, vocab), frase(rnd, 12, vocab) if i % 3 else None))
+        if len(batch) == 10000:
+            conn.executemany("INSERT INTO soportes (id, numero_ticket, usuario_id, equipo_id, problema, solucion) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO soportes (id, numero_ticket, usuario_id, equipo_id, problema, solucion) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.close()
+
+
+def like_search(conn, term, limit=15):
+    # Un LIKE por columna, como buscar_soportes(); sin índice posible por el comodín inicial.
+    pattern = f"%{term}%"
+    total = conn.execute("""
+        SELECT COUNT(*) FROM soportes s
+        JOIN usuarios u ON s.usuario_id = u.id
+        LEFT JOIN equipos e ON s.equipo_id = e.id
+        WHERE s.problema LIKE ? OR s.solucion LIKE ? OR u.username LIKE ? OR e.nombre_equipo LIKE ?
+    """, (pattern,) * 4).fetchone()[0]
+    rows = conn.execute("""
+        SELECT s.* FROM soportes s
+        JOIN usuarios u ON s.usuario_id = u.id
+        LEFT JOIN equipos e ON s.equipo_id = e.id
+        WHERE s.problema LIKE ? OR s.solucion LIKE ? OR u.username LIKE ? OR e.nombre_equipo LIKE ?
+        ORDER BY s.fecha_creacion DESC LIMIT ?
+    """, (pattern,) * 4 + (limit,)).fetchall()
+    return total, rows
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickets', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        start = time.perf_counter()
+        seed(db_path, args.tickets)
+        print(f"{args.tickets} tickets generados e indexados en {time.perf_counter() - start:.1f}s")
+
+        repo = SQLiteRepository(db_path)
+        conn = sqlite3.connect(db_path)
+        print(f"{'término':<20} {'LIKE ms':>9} {'FTS5 ms':>9} {'coincidencias LIKE/FTS':>24}")
+        for term in TERMINOS:
+            like_ms, (like_total, _) = timed(lambda: like_search(conn, term), args.repeat)
+            fts_ms, page = timed(lambda: repo.search_tickets(term, per_page=15), args.repeat)
+            print(f"{term:<20} {like_ms:9.1f} {fts_ms:9.1f} {like_total:>12}/{page.total:<11}")
+        conn.close()
+        repo.pool.close()
+
+
+if __name__ == '__main__':
+    main()
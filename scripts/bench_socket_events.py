@@ -0,0 +1,109 @@
+"""
+Benchmark: tormenta de tickets y tráfico Socket.IO.
+
+Conecta clientes de prueba de Flask-SocketIO (técnicos/admins y usuarios) y
+crea tickets en ráfaga. Compara el broadcast anterior ('new_ticket' a todos
+los clientes, y cada técnico en la lista recargando la página) con las salas
+por rol/usuario y la ventana de agrupación de TicketEventBroadcaster.
+
+Uso: python scripts/bench_socket_events.py [--staff 20] [--usuarios 200] [--tickets 300] [--duracion 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from flask_socketio import SocketIO, join_room
+
+from infrastructure.realtime.ticket_events import TicketEventBroadcaster, room_for_role, user_room
+
+# El cliente anterior recargaba la página 3 s después de cada aviso
+RECARGA_S = 3.0
+
+
+def crear_app():
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='threading')
+
+    @socketio.on('connect')
+    def conectar(auth=None):
+        join_room(user_room(auth['user_id']))
+        sala = room_for_role(auth['role'])
+        if sala:
+            join_room(sala)
+
+    return app, socketio
+
+
+def recargas_legacy(tiempos):
+    """Recargas (consultas completas de la lista) que hacía un técnico con la lista abierta."""
+    recargas, proxima = 0, None
+    for t in tiempos:
+        if proxima is None or t >= proxima:
+            recargas += 1
+            proxima = t + RECARGA_S
+    return recargas
+
+
+def tormenta(socketio, publicar, tickets, duracion, usuarios):
+    rnd = random.Random(11)
+    tiempos = []
+    start = time.perf_counter()
+    for i in range(tickets):
+        objetivo = start + duracion * i / tickets
+        while time.perf_counter() < objetivo:
+            socketio.sleep(0.001)
+        tiempos.append(time.perf_counter() - start)
+        publicar({'id': f"t{i}", 'numero_ticket': i + 1, 'usuario_id': rnd.choice(usuarios),
+                  'problema': f"ticket {i}", 'estado': 'Abierto', 'prioridad': 'Media'})
+    return tiempos
+
+
+def medir(label, modo, args):
+    app, socketio = crear_app()
+    staff = [(f"s{i}", 'tecnico' if i % 2 else 'admin') for i in range(args.staff)]
+    usuarios = [f"u{i}" for i in range(args.usuarios)]
+    clientes = [socketio.test_client(app, auth={'user_id': uid, 'role': rol}) for uid, rol in staff]
+    clientes += [socketio.test_client(app, auth={'user_id': uid, 'role': 'user'}) for uid in usuarios]
+
+    if modo == 'broadcast':
+        publicar = lambda t: socketio.emit('new_ticket', t)
+    else:
+        eventos = TicketEventBroadcaster(socketio, window=args.ventana)
+        publicar = lambda t: eventos.publish('creado', t)
+
+    start = time.perf_counter()
+    tiempos = tormenta(socketio, publicar, args.tickets, args.duracion, usuarios)
+    socketio.sleep(args.ventana + 0.5)
+    elapsed = time.perf_counter() - start
+
+    recibidos = [c.get_received() for c in clientes]
+    mensajes = sum(len(r) for r in recibidos)
+    por_staff = sum(len(r) for r in recibidos[:args.staff]) / max(args.staff, 1)
+    recargas = recargas_legacy(tiempos) * args.staff if modo == 'broadcast' else 0
+    print(f"{label:<22} {mensajes:8d} mensajes  {por_staff:6.1f} por técnico  "
+          f"{recargas:5d} recargas de la lista  ({elapsed:.1f} s)")
+    for c in clientes:
+        c.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--staff', type=int, default=20)
+    parser.add_argument('--usuarios', type=int, default=200)
+    parser.add_argument('--tickets', type=int, default=300)
+    parser.add_argument('--duracion', type=float, default=3.0, help="Segundos que dura la ráfaga")
+    parser.add_argument('--ventana', type=float, default=0.5, help="Ventana de agrupación (s)")
+    args = parser.parse_args()
+
+    print(f"{args.tickets} tickets en {args.duracion:.0f} s, {args.staff} técnicos/admins + {args.usuarios} usuarios conectados")
+    medir("broadcast (anterior)", 'broadcast', args)
+    medir("salas + ventana", 'salas', args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: lectores concurrentes mientras se escriben tickets.
+
+Ejecuta el mismo escenario con journal_mode=DELETE (modo por defecto de
+SQLite) y con el StorageProfile WAL, y reporta la latencia de los lectores.
+
+Uso: python scripts/bench_wal.py [--seconds 5] [--readers 4]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from infrastructure.persistence.db_schema import SCHEMA_SQL
+from infrastructure.persistence.connection_pool import ConnectionPool, enable_foreign_keys
+from infrastructure.persistence.storage_profile import StorageProfile
+from infrastructure.persistence.wal_checkpoint import WalCheckpointManager
+from infrastructure.persistence.repository import SQLiteRepository
+
+
+def seed(db_path, tickets=5000):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_SQL)
+    user_id = str(uuid.uuid4())
+    conn.execute("INSERT INTO usuarios (id, username, password_hash) VALUES (?, 'bench', 'x')", (user_id,))
+    conn.executemany(
+        "INSERT INTO soportes (id, numero_ticket, usuario_id, problema) VALUES (?, ?, ?, 'bench')",
+        [(str(uuid.uuid4()), i, user_id) for i in range(1, tickets + 1)])
+    conn.commit()
+    conn.close()
+    return user_id
+
+
+def scenario(journal_mode, seconds, readers):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        user_id = seed(db_path)
+        # Como app.py: con el checkpointer en marcha los escritores no hacen auto-checkpoint
+        profile = StorageProfile(journal_mode=journal_mode, wal_autocheckpoint=0 if journal_mode == 'WAL' else 1000)
+        pool = ConnectionPool(db_path, max_size=readers + 1, setup=[enable_foreign_keys, profile.apply])
+        repo = SQLiteRepository(db_path, pool=pool)
+        checkpointer = WalCheckpointManager(db_path, interval=1.0)
+        if journal_mode == 'WAL':
+            checkpointer.start()
+
+        stop = threading.Event()
+        latencies, errors, writes = [], [0], [0]
+        lock = threading.Lock()
+
+        def writer():
+            n = 10 ** 6
+            while not stop.is_set():
+                with pool.connection() as conn:
+                    rows = []
+                    for _ in range(50):
+                        n += 1
+                        rows.append((str(uuid.uuid4()), n, user_id, 'x' * 2000))
+                    conn.executemany(
+                        "INSERT INTO soportes (id, numero_ticket, usuario_id, problema) VALUES (?, ?, ?, ?)", rows)
+                    conn.commit()
+                writes[0] += len(rows)
+
+        def reader():
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    repo.get_status_distribution('admin', uuid.UUID(user_id))
+                except sqlite3.OperationalError:
+                    with lock:
+                        errors[0] += 1
+                    continue
+                with lock:
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        checkpointer.stop()
+        pool.close()
+
+    latencies.sort()
+    return {
+        'lecturas': len(latencies),
+        'escrituras': writes[0],
+        'errores': errors[0],
+        'p50_ms': statistics.median(latencies) if latencies else 0,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] if latencies else 0,
+        'max_ms': latencies[-1] if latencies else 0,
+        'checkpoints': checkpointer.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=4)
+    args = parser.parse_args()
+
+    for mode in ('DELETE', 'WAL'):
+        r = scenario(mode, args.seconds, args.readers)
+        print(f"{mode:<7} lecturas={r['lecturas']:<7} escrituras={r['escrituras']:<5} errores={r['errores']:<4} "
+              f"p50={r['p50_ms']:.2f}ms p95={r['p95_ms']:.2f}ms max={r['max_ms']:.2f}ms")
+        if mode == 'WAL':
+            c = r['checkpoints']
+            print(f"        checkpoints={c['checkpoints']} avg={c['avg_latency_ms']:.2f}ms max={c['max_latency_ms']:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
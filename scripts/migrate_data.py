@@ -1,116 +1,281 @@
-import sqlite3
-import uuid
+"""
+Streaming migration from the legacy integer-id database to the UUID schema.
+
+Each legacy table is read in keyset-paginated chunks (``WHERE id > ? LIMIT ?``)
+and written with executemany. A chunk commits together with its
+legacy_migration_map rows and a per-table checkpoint row, so memory stays flat
+and an interrupted run resumes after the last committed chunk.
+
+Re-running picks up only legacy rows added since the last run. With --delta it
+also copies changes made in the legacy app to rows that were already migrated,
+which keeps the new database in step during a parallel-run cutover. Legacy
+deletions are not propagated.
+
+Usage: python scripts/migrate_data.py [--old soportes.db] [--new soportes_v2.db]
+                                      [--chunk 2000] [--delta] [--fresh]
+"""
+import argparse
 import os
+import sqlite3
 import sys
+import time
+import uuid
+from typing import Callable, Dict, List, NamedTuple, Tuple
 
 # Add the project root to the path for imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from infrastructure.persistence.db_schema import SCHEMA_SQL
+from infrastructure.persistence.repository import SQLiteRepository
 
 OLD_DB = 'soportes.db'
 NEW_DB = 'soportes_v2.db'
+CHUNK_SIZE = 2000
 
-def migrate():
-    print(f"--- 🚀 Starting Migration: {OLD_DB} -> {NEW_DB} ---")
-    
-    if os.path.exists(NEW_DB):
-        os.remove(NEW_DB)
-        print(f"🧹 Removed existing {NEW_DB} for a clean start.")
-    
-    # Connect to databases
-    old_conn = sqlite3.connect(OLD_DB)
-    old_conn.row_factory = sqlite3.Row
-    new_conn = sqlite3.connect(NEW_DB)
-    
-    # Init new schema
-    new_conn.executescript(SCHEMA_SQL)
-    new_conn.commit()
 
-    # Mapping dictionary: table_name -> {old_id: new_uuid}
-    id_map = {
-        'usuarios': {},
-        'equipos': {},
-        'soportes': {},
-        'mantenimientos': {}
-    }
-
-    def save_map(table, old_id, new_uuid):
-        id_map[table][old_id] = new_uuid
-        new_conn.execute("INSERT INTO legacy_migration_map (old_id, new_uuid, table_name) VALUES (?, ?, ?)", 
-                         (old_id, new_uuid, table))
-
-    # 1. Migrate Users
-    print("Migrating users...")
-    users = old_conn.execute("SELECT * FROM usuarios").fetchall()
-    for u in users:
-        new_id = str(uuid.uuid4())
-        save_map('usuarios', u['id'], new_id)
-        new_conn.execute("""
-            INSERT INTO usuarios (id, username, email, password_hash, role, departamento, fecha_creacion)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (new_id, u['username'], u['email'], u['password_hash'], u['role'], u['departamento'], u['fecha_creacion']))
-
-    # 2. Migrate Equipos
-    print("Migrating equipment...")
-    equipos = old_conn.execute("SELECT * FROM equipos").fetchall()
-    for e in equipos:
-        new_id = str(uuid.uuid4())
-        save_map('equipos', e['id'], new_id)
-        
-        # Standardizing on fecha_compra
-        e_dict = dict(e)
-        fecha_val = e_dict.get('fecha_compra') or e_dict.get('fecha_adquisicion')
-        
-        new_conn.execute("""
-            INSERT INTO equipos (id, nombre_equipo, tipo, marca_modelo, numero_serie, fecha_compra, 
-                               procesador, memoria_ram, tipo_ram, disco_duro, tipo_disco, color, notas, usuario_asignado_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (new_id, e['nombre_equipo'], e['tipo'], e['marca_modelo'], e['numero_serie'], fecha_val,
-              e_dict.get('procesador'), e_dict.get('memoria_ram'), e_dict.get('tipo_ram'), 
-              e_dict.get('disco_duro'), e_dict.get('tipo_disco'), e_dict.get('color'), e_dict.get('notas'),
-              id_map['usuarios'].get(e['usuario_asignado_id'])))
-
-    # 3. Migrate Soportes
-    print("Migrating tickets (ordered by date)...")
-    soportes = old_conn.execute("SELECT * FROM soportes ORDER BY fecha_creacion ASC, id ASC").fetchall()
-    for idx, s in enumerate(soportes, 1):
-        new_id = str(uuid.uuid4())
-        save_map('soportes', s['id'], new_id)
-        new_conn.execute("""
-            INSERT INTO soportes (id, numero_ticket, usuario_id, tecnico_id, equipo_id, problema, estado, prioridad, categoria, solucion, fecha_creacion, fecha_finalizacion)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (new_id, idx,
-              id_map['usuarios'].get(s['usuario_id']), 
-              id_map['usuarios'].get(s['tecnico_id']), 
-              id_map['equipos'].get(s['equipo_id']),
-              s['problema'], s['estado'], s['prioridad'], s['categoria'], s['solucion'], s['fecha_creacion'], s['fecha_finalizacion']))
-
-    # 4. Migrate Mantenimientos
-    print("Migrating maintenance...")
-    mantenimientos = old_conn.execute("SELECT * FROM mantenimientos").fetchall()
-    for m in mantenimientos:
-        new_id = str(uuid.uuid4())
-        save_map('mantenimientos', m['id'], new_id)
-        new_conn.execute("""
-            INSERT INTO mantenimientos (id, equipo_id, titulo, fecha_programada, estado, tecnico_asignado_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (new_id, id_map['equipos'].get(m['equipo_id']), m['titulo'], m['fecha_programada'], m['estado'], id_map['usuarios'].get(m['tecnico_asignado_id'])))
-
-    # 5. Migrate Auditoria Logs
-    print("Migrating logs...")
-    logs = old_conn.execute("SELECT * FROM auditoria_logs").fetchall()
-    for l in logs:
-        new_conn.execute("""
-            INSERT INTO auditoria_logs (usuario_id, accion, detalles, fecha)
-            VALUES (?, ?, ?, ?)
-        """, (id_map['usuarios'].get(l['usuario_id']), l['accion'], l['detalles'], l['fecha']))
+class Table(NamedTuple):
+    name: str
+    refs: Dict[str, str]                 # legacy FK column -> referenced legacy table
+    build: Callable[[sqlite3.Row, Callable], dict]
+    keep: Tuple[str, ...] = ()           # columns --delta never overwrites
+    mapped: bool = True                  # rows get a UUID and a legacy_migration_map entry
+
+
+def _usuarios(r, ref):
+    return {'username': r['username'], 'email': r['email'], 'password_hash': r['password_hash'],
+            'role': r['role'], 'departamento': r['departamento'], 'fecha_creacion': r['fecha_creacion']}
+
+
+def _equipos(r, ref):
+    keys = r.keys()
+    value = lambda col: r[col] if col in keys else None
+    return {'nombre_equipo': r['nombre_equipo'], 'tipo': r['tipo'], 'marca_modelo': r['marca_modelo'],
+            'numero_serie': r['numero_serie'],
+            # Standardizing on fecha_compra
+            'fecha_compra': value('fecha_compra') or value('fecha_adquisicion'),
+            'procesador': value('procesador'), 'memoria_ram': value('memoria_ram'), 'tipo_ram': value('tipo_ram'),
+            'disco_duro': value('disco_duro'), 'tipo_disco': value('tipo_disco'), 'color': value('color'),
+            'notas': value('notas'), 'usuario_asignado_id': ref('usuarios', r['usuario_asignado_id'])}
+
+
+def _soportes(r, ref):
+    return {'usuario_id': ref('usuarios', r['usuario_id']), 'tecnico_id': ref('usuarios', r['tecnico_id']),
+            'equipo_id': ref('equipos', r['equipo_id']), 'problema': r['problema'], 'estado': r['estado'],
+            'prioridad': r['prioridad'], 'categoria': r['categoria'], 'solucion': r['solucion'],
+            'fecha_creacion': r['fecha_creacion'], 'fecha_finalizacion': r['fecha_finalizacion']}
+
+
+def _mantenimientos(r, ref):
+    return {'equipo_id': ref('equipos', r['equipo_id']), 'titulo': r['titulo'],
+            'fecha_programada': r['fecha_programada'], 'estado': r['estado'],
+            'tecnico_asignado_id': ref('usuarios', r['tecnico_asignado_id']),
+            'motivo_reprogramacion': r['motivo_reprogramacion'] if 'motivo_reprogramacion' in r.keys() else None}
+
+
+def _auditoria_logs(r, ref):
+    return {'usuario_id': ref('usuarios', r['usuario_id']), 'accion': r['accion'],
+            'detalles': r['detalles'], 'fecha': r['fecha']}
+
+
+# In foreign-key order: every chunk can resolve its references from earlier tables.
+TABLES: List[Table] = [
+    Table('usuarios', {}, _usuarios, keep=('fecha_creacion',)),
+    Table('equipos', {'usuario_asignado_id': 'usuarios'}, _equipos),
+    Table('soportes', {'usuario_id': 'usuarios', 'tecnico_id': 'usuarios', 'equipo_id': 'equipos'},
+          _soportes, keep=('fecha_creacion',)),
+    Table('mantenimientos', {'equipo_id': 'equipos', 'tecnico_asignado_id': 'usuarios'}, _mantenimientos),
+    Table('auditoria_logs', {'usuario_id': 'usuarios'}, _auditoria_logs, mapped=False),
+]
+
+
+def checkpoint_key(table: str) -> str:
+    return f"checkpoint:{table}"
+
 
+def get_checkpoint(conn: sqlite3.Connection, table: Table) -> int:
+    """Highest legacy id already committed for ``table``."""
+    row = conn.execute("SELECT old_id FROM legacy_migration_map WHERE new_uuid = ?",
+                       (checkpoint_key(table.name),)).fetchone()
+    if row:
+        return row[0]
+    # Databases produced by the old one-shot script have map rows but no checkpoints.
+    if table.mapped:
+        row = conn.execute("SELECT MAX(old_id) FROM legacy_migration_map WHERE table_name = ?",
+                           (table.name,)).fetchone()
+        return row[0] or 0
+    return 0
+
+
+def set_checkpoint(conn: sqlite3.Connection, table: Table, old_id: int) -> None:
+    key = checkpoint_key(table.name)
+    conn.execute("""
+        INSERT INTO legacy_migration_map (old_id, new_uuid, table_name) VALUES (?, ?, ?)
+        ON CONFLICT (new_uuid) DO UPDATE SET old_id = excluded.old_id
+    """, (old_id, key, key))
+
+
+def adopt_one_shot_migration(old_conn: sqlite3.Connection, new_conn: sqlite3.Connection) -> None:
+    """
+    The old script migrated everything in a single transaction and left map rows
+    but no checkpoints. Unmapped tables (the audit log) cannot be derived from the
+    map, so they are marked as copied up to the current legacy maximum.
+    """
+    has_map = new_conn.execute("SELECT 1 FROM legacy_migration_map LIMIT 1").fetchone()
+    has_checkpoints = new_conn.execute(
+        "SELECT 1 FROM legacy_migration_map WHERE table_name LIKE 'checkpoint:%' LIMIT 1").fetchone()
+    if not has_map or has_checkpoints:
+        return
+    new_conn.execute("BEGIN IMMEDIATE")
+    for table in TABLES:
+        if not table.mapped:
+            last = old_conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table.name}").fetchone()[0]
+            set_checkpoint(new_conn, table, last)
+            print(f"  {table.name}: copied by a previous one-shot migration, checkpoint set at {last}")
     new_conn.commit()
+
+
+def lookup_map(conn: sqlite3.Connection, table: str, old_ids) -> Dict[int, str]:
+    old_ids = list(old_ids)
+    found = {}
+    for i in range(0, len(old_ids), 900):
+        part = old_ids[i:i + 900]
+        found.update(conn.execute(
+            f"SELECT old_id, new_uuid FROM legacy_migration_map "
+            f"WHERE table_name = ? AND old_id IN ({','.join('?' * len(part))})",
+            [table] + part).fetchall())
+    return found
+
+
+def resolve_refs(conn: sqlite3.Connection, table: Table, rows: List[sqlite3.Row]) -> Callable:
+    """Loads only the map entries this chunk references and returns a lookup function."""
+    wanted: Dict[str, set] = {}
+    for column, target in table.refs.items():
+        wanted.setdefault(target, set()).update(r[column] for r in rows if r[column] is not None)
+    resolved = {target: lookup_map(conn, target, ids) for target, ids in wanted.items()}
+    return lambda target, old_id: resolved.get(target, {}).get(old_id)
+
+
+def iter_chunks(old_conn: sqlite3.Connection, table: str, after: int, chunk: int, upto: int = None):
+    sql = f"SELECT * FROM {table} WHERE id > ?"
+    if upto is not None:
+        sql += " AND id <= ?"
+    sql += " ORDER BY id LIMIT ?"
+    while True:
+        params = (after, upto, chunk) if upto is not None else (after, chunk)
+        rows = old_conn.execute(sql, params).fetchall()
+        if not rows:
+            return
+        yield rows
+        after = rows[-1]['id']
+
+
+def copy_new_rows(repo, old_conn, new_conn, table: Table, chunk: int) -> int:
+    start_after = get_checkpoint(new_conn, table)
+    copied, started = 0, time.perf_counter()
+    for rows in iter_chunks(old_conn, table.name, start_after, chunk):
+        ref = resolve_refs(new_conn, table, rows)
+        values = [table.build(r, ref) for r in rows]
+        columns = list(values[0])
+        if table.name == 'soportes':
+            # Reserved outside the chunk transaction; a failed chunk only leaves a gap.
+            numbers = repo.reserve_ticket_numbers(len(rows))
+
+        new_conn.execute("BEGIN IMMEDIATE")
+        try:
+            if table.mapped:
+                new_ids = [str(uuid.uuid4()) for _ in rows]
+                columns = ['id'] + columns
+                params = [(new_id,) + tuple(v.values()) for new_id, v in zip(new_ids, values)]
+                if table.name == 'soportes':
+                    # Legacy ids are creation order; numbers come from the same sequence
+                    # the new app uses, so they never collide during a parallel run.
+                    columns.append('numero_ticket')
+                    params = [p + (n,) for p, n in zip(params, numbers)]
+                new_conn.executemany("INSERT INTO legacy_migration_map (old_id, new_uuid, table_name) VALUES (?, ?, ?)",
+                                     [(r['id'], new_id, table.name) for r, new_id in zip(rows, new_ids)])
+            else:
+                params = [tuple(v.values()) for v in values]
+            new_conn.executemany(
+                f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", params)
+            set_checkpoint(new_conn, table, rows[-1]['id'])
+            new_conn.commit()
+        except Exception:
+            new_conn.rollback()
+            raise
+
+        copied += len(rows)
+        elapsed = time.perf_counter() - started
+        print(f"  {table.name}: {copied} rows copied (up to legacy id {rows[-1]['id']}, "
+              f"{copied / max(elapsed, 1e-9):,.0f} rows/s)")
+    return copied
+
+
+def sync_changes(old_conn, new_conn, table: Table, chunk: int) -> int:
+    """--delta: rewrites migrated rows whose legacy copy changed since they were copied."""
+    upto = get_checkpoint(new_conn, table)
+    updated = 0
+    for rows in iter_chunks(old_conn, table.name, 0, chunk, upto=upto):
+        new_ids = lookup_map(new_conn, table.name, (r['id'] for r in rows))
+        ref = resolve_refs(new_conn, table, rows)
+        params = []
+        for r in rows:
+            if r['id'] not in new_ids:
+                continue
+            values = {k: v for k, v in table.build(r, ref).items() if k not in table.keep}
+            params.append(tuple(values.values()) + (new_ids[r['id']],) + tuple(values.values()))
+        if not params:
+            continue
+        columns = [k for k in table.build(rows[0], ref) if k not in table.keep]
+        # Only rows that actually differ are written, so triggers (FTS, counters) fire only for real changes.
+        sql = (f"UPDATE {table.name} SET {', '.join(f'{c} = ?' for c in columns)} "
+               f"WHERE id = ? AND ({' OR '.join(f'{c} IS NOT ?' for c in columns)})")
+        new_conn.execute("BEGIN IMMEDIATE")
+        try:
+            updated += new_conn.executemany(sql, params).rowcount
+            new_conn.commit()
+        except Exception:
+            new_conn.rollback()
+            raise
+    if updated:
+        print(f"  {table.name}: {updated} changed rows synced")
+    return updated
+
+
+def migrate(old_db: str = OLD_DB, new_db: str = NEW_DB, chunk: int = CHUNK_SIZE,
+            delta: bool = False, fresh: bool = False) -> None:
+    print(f"--- 🚀 Starting Migration: {old_db} -> {new_db} ---")
+
+    if fresh:
+        for path in (new_db, new_db + '-wal', new_db + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+        print(f"🧹 Removed existing {new_db} for a clean start.")
+
+    old_conn = sqlite3.connect(old_db)
+    old_conn.row_factory = sqlite3.Row
+    repo = SQLiteRepository(new_db)
+    repo.init_schema()
+    started = time.perf_counter()
+
+    with repo.pool.connection() as new_conn:
+        adopt_one_shot_migration(old_conn, new_conn)
+        copied = sum(copy_new_rows(repo, old_conn, new_conn, table, chunk) for table in TABLES)
+        synced = 0
+        if delta:
+            print("Syncing changes to already migrated rows...")
+            synced = sum(sync_changes(old_conn, new_conn, table, chunk) for table in TABLES if table.mapped)
+
     old_conn.close()
-    new_conn.close()
-    print("--- ✅ Migration Completed Successfully! ---")
-    print(f"New database created: {NEW_DB}")
+    repo.pool.close()
+    print(f"--- ✅ Migration Completed: {copied} new rows, {synced} updated rows "
+          f"in {time.perf_counter() - started:.1f}s ---")
+
 
 if __name__ == "__main__":
-    migrate()
+    parser = argparse.ArgumentParser(description="Migrates the legacy integer-id database to the UUID schema.")
+    parser.add_argument('--old', default=OLD_DB, help="Legacy database")
+    parser.add_argument('--new', default=NEW_DB, help="UUID-schema database (created if missing)")
+    parser.add_argument('--chunk', type=int, default=CHUNK_SIZE, help="Legacy rows per transaction")
+    parser.add_argument('--delta', action='store_true', help="Also copy changes to already migrated rows")
+    parser.add_argument('--fresh', action='store_true', help="Delete the target database first")
+    args = parser.parse_args()
+    migrate(args.old, args.new, args.chunk, args.delta, args.fresh)
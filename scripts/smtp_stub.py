@@ -0,0 +1,153 @@
+"""
+Servidor SMTP de prueba (no entrega nada, solo registra).
+
+Sirve para probar el outbox y los benchmarks de correo sin un servidor real:
+cuenta conexiones y mensajes, y puede simular latencia o fallos.
+
+Uso como script:
+    python scripts/smtp_stub.py --port 2525 [--latency 0.2]
+    (luego en Email Config: servidor 127.0.0.1, puerto 2525, sin TLS)
+
+Uso desde Python:
+    from scripts.smtp_stub import StubSMTPServer
+    with StubSMTPServer(latency=0.1) as smtp:
+        ...  # MAIL_SERVER='127.0.0.1', MAIL_PORT=smtp.port
+        print(smtp.connections, len(smtp.messages))
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode('ascii'))
+
+    def handle(self):
+        server = self.server.stub
+        server._record_connection()
+        self.reply("220 stub ESMTP")
+        mail_from, rcpts = None, []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode('utf-8', 'replace').rstrip("\r\n")
+            verb = line[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                server._sleep()
+                if verb == 'EHLO':
+                    self.reply("250-stub")
+                    self.reply("250 8BITMIME")
+                else:
+                    self.reply("250 stub")
+            elif verb == 'MAIL':
+                mail_from, rcpts = line[10:].strip(), []
+                self.reply("250 OK")
+            elif verb == 'RCPT':
+                rcpts.append(line[8:].strip().split()[0].strip('<>'))
+                self.reply("250 OK")
+            elif verb == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data)
+                server._sleep()
+                if server._should_fail():
+                    self.reply("451 Fallo simulado")
+                else:
+                    server._record_message(mail_from, rcpts, b"".join(lines))
+                    self.reply("250 OK queued")
+            elif verb == 'RSET':
+                mail_from, rcpts = None, []
+                self.reply("250 OK")
+            elif verb == 'NOOP':
+                self.reply("250 OK")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class StubSMTPServer:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, fail_every=0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.connections = 0
+        self.attempts = 0
+        self.messages = []
+        self._lock = threading.Lock()
+        self._server = _ThreadingServer((host, port), _SMTPHandler)
+        self._server.stub = self
+        self.host, self.port = self._server.server_address
+        self._thread = None
+
+    def _sleep(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def _should_fail(self):
+        with self._lock:
+            self.attempts += 1
+            return bool(self.fail_every) and self.attempts % self.fail_every == 0
+
+    def _record_message(self, mail_from, rcpts, data):
+        with self._lock:
+            self.messages.append({'from': mail_from, 'to': rcpts, 'data': data})
+
+    @property
+    def recipients(self):
+        with self._lock:
+            return [r for m in self.messages for r in m['to']]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2525)
+    parser.add_argument('--latency', type=float, default=0.0, help="segundos por handshake y por DATA")
+    parser.add_argument('--fail-every', type=int, default=0, help="rechaza 1 de cada N mensajes")
+    args = parser.parse_args()
+
+    server = StubSMTPServer(args.host, args.port, args.latency, args.fail_every)
+    print(f"📭 SMTP de prueba escuchando en {server.host}:{server.port} (Ctrl+C para salir)")
+    server.start()
+    try:
+        while True:
+            time.sleep(5)
+            print(f"   conexiones={server.connections} mensajes={len(server.messages)}")
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Prueba de estrés: numeración de tickets con muchos hilos escribiendo a la vez.
+
+Compara el create_ticket anterior (SELECT MAX(numero_ticket) + 1 y luego
+INSERT, en sentencias separadas) con la secuencia (UPDATE ... RETURNING en la
+misma transacción BEGIN IMMEDIATE que el INSERT). Cuenta los tickets que
+fallan por UNIQUE y verifica que no haya números duplicados.
+
+Uso: python scripts/stress_ticket_numbers.py [--hilos 16] [--tickets 200]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import config_dict
+from domain.models import Ticket, TicketPriority, TicketStatus
+from infrastructure.persistence.connection_pool import ConnectionPool, enable_foreign_keys
+from infrastructure.persistence.repository import SQLiteRepository
+from infrastructure.persistence.storage_profile import StorageProfile
+
+
+class LegacyRepository(SQLiteRepository):
+    """Reproduce el create_ticket original: MAX + 1 fuera de la transacción del INSERT."""
+
+    def create_ticket(self, ticket: Ticket) -> Ticket:
+        with self._get_connection() as conn:
+            row = conn.execute("SELECT MAX(numero_ticket) as max_num FROM soportes").fetchone()
+            ticket.numero_ticket = (row['max_num'] or 0) + 1
+            conn.execute("""
+                INSERT INTO soportes (id, numero_ticket, usuario_id, problema, estado, prioridad, categoria)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (str(ticket.id), ticket.numero_ticket, str(ticket.usuario_id), ticket.problema,
+                  ticket.estado.value, ticket.prioridad.value, ticket.categoria))
+            conn.commit()
+        return ticket
+
+
+def crear_repo(cls, db_path, hilos):
+    profile = StorageProfile.from_config(config_dict['development'])
+    pool = ConnectionPool(db_path, max_size=hilos, setup=[enable_foreign_keys, profile.apply])
+    repo = cls(db_path, pool=pool)
+    repo.init_schema()
+    user_id = uuid.uuid4()
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO usuarios (id, username, password_hash) VALUES (?, 'stress', 'x')", (str(user_id),))
+        conn.commit()
+    return repo, user_id
+
+
+def run(label, cls, hilos, tickets):
+    with tempfile.TemporaryDirectory() as tmp:
+        repo, user_id = crear_repo(cls, os.path.join(tmp, 'stress.db'), hilos)
+        fallos = []
+        barrera = threading.Barrier(hilos)
+
+        def escritor():
+            barrera.wait()
+            for _ in range(tickets):
+                ticket = Ticket(id=uuid.uuid4(), usuario_id=user_id, problema="stress",
+                                categoria="Otro", prioridad=TicketPriority.MEDIA, estado=TicketStatus.ABIERTO)
+                try:
+                    repo.create_ticket(ticket)
+                except sqlite3.Error as e:
+                    fallos.append(e)
+
+        workers = [threading.Thread(target=escritor) for _ in range(hilos)]
+        start = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        with repo.pool.connection() as conn:
+            total, distintos, maximo = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT numero_ticket), MAX(numero_ticket) FROM soportes").fetchone()
+        repo.pool.close()
+
+    tipos = sorted({type(e).__name__ + ': ' + str(e) for e in fallos})[:2]
+    print(f"{label:<12} {total:6d} creados  {len(fallos):5d} fallos  "
+          f"{total - distintos} duplicados  max={maximo}  {total / elapsed:8.0f} tickets/s")
+    for t in tipos:
+        print(f"             ej.: {t}")
+    return len(fallos)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hilos', type=int, default=16)
+    parser.add_argument('--tickets', type=int, default=200, help="Tickets por hilo")
+    args = parser.parse_args()
+
+    print(f"{args.hilos} hilos x {args.tickets} tickets")
+    run("MAX + 1", LegacyRepository, args.hilos, args.tickets)
+    fallos = run("secuencia", SQLiteRepository, args.hilos, args.tickets)
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
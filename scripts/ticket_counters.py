@@ -0,0 +1,48 @@
+"""
+Verifica o reconstruye los contadores materializados del dashboard
+(tabla soportes_contadores).
+
+Uso:
+    python scripts/ticket_counters.py --verify   # reporta desvíos, exit 1 si los hay
+    python scripts/ticket_counters.py --rebuild  # recalcula desde soportes
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from infrastructure.persistence.repository import SQLiteRepository
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db', default=Config.DB_FILE)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--verify', action='store_true')
+    group.add_argument('--rebuild', action='store_true')
+    args = parser.parse_args()
+
+    repo = SQLiteRepository(args.db)
+    repo.init_schema()
+
+    if args.rebuild:
+        grupos = repo.rebuild_ticket_counters()
+        print(f"✅ Contadores reconstruidos: {grupos} grupos (usuario, estado, categoría).")
+        return
+
+    drift = repo.verify_ticket_counters()
+    if not drift:
+        print("✅ Contadores consistentes con la tabla soportes.")
+        return
+    print(f"❌ {len(drift)} grupos con desvío:")
+    for d in drift:
+        print(f"   {d['usuario_id']} | {d['estado']} | {d['categoria']}: "
+              f"esperado={d['esperado']} materializado={d['materializado']}")
+    print("   Ejecuta con --rebuild para corregirlos.")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
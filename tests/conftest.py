@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from domain.models import Ticket, User, UserRole  # noqa: E402
+from infrastructure.persistence.repository import SQLiteRepository  # noqa: E402
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """SQLiteRepository on a fresh database with the full schema (triggers, FTS, counters)."""
+    repo = SQLiteRepository(str(tmp_path / 'soportes.db'))
+    repo.init_schema()
+    yield repo
+    repo.pool.close()
+
+
+@pytest.fixture
+def make_user(repo):
+    def make(username, role=UserRole.USER):
+        return repo.create_user(User(username=username, email=f'{username}@example.com',
+                                     password_hash='x', role=role))
+    return make
+
+
+@pytest.fixture
+def make_ticket(repo):
+    def make(user, problema='No enciende', **fields):
+        return repo.create_ticket(Ticket(usuario_id=user.id, problema=problema, **fields))
+    return make
@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from infrastructure.persistence.connection_pool import ConnectionPool, PoolTimeoutError
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), max_size=2, timeout=0.2)
+    yield pool
+    pool.close()
+
+
+def test_nested_leases_share_one_connection(pool):
+    with pool.connection() as outer:
+        assert pool.holds_connection()
+        with pool.connection() as inner:
+            assert inner is outer
+    assert not pool.holds_connection()
+    s = pool.stats()
+    assert s['acquired'] == 1 and s['created'] == 1 and s['idle'] == 1
+
+
+def test_released_connection_is_reused(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    assert pool.stats()['reused'] == 1
+
+
+def test_threads_get_distinct_connections(pool):
+    seen = []
+    barrier = threading.Barrier(2)
+
+    def worker():
+        with pool.connection() as conn:
+            seen.append(conn)
+            barrier.wait(timeout=2)
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(seen) == 2 and seen[0] is not seen[1]
+    assert pool.stats()['created'] == 2
+
+
+def test_exhausted_pool_times_out(pool):
+    held = threading.Event()
+    done = threading.Event()
+
+    def holder():
+        with pool.connection():
+            held.set()
+            done.wait(2)
+
+    threads = [threading.Thread(target=holder) for _ in range(2)]
+    for t in threads:
+        t.start()
+    try:
+        assert held.wait(2)
+        while pool.stats()['idle'] or pool.stats()['size'] < 2:
+            time.sleep(0.01)
+        start = time.monotonic()
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+        assert time.monotonic() - start >= 0.15
+        assert pool.stats()['waits'] >= 1
+    finally:
+        done.set()
+        for t in threads:
+            t.join()
+
+
+def test_checkin_rolls_back_open_transaction(pool):
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+        assert conn.in_transaction
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_unhealthy_idle_connection_is_replaced(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), health_check_interval=0)
+    with pool.connection() as conn:
+        pass
+    conn.close()  # Simulates a connection broken while idle
+    time.sleep(0.01)
+    with pool.connection() as fresh:
+        assert fresh is not conn
+        assert fresh.execute("SELECT 1").fetchone()[0] == 1
+    s = pool.stats()
+    assert s['discarded'] == 1 and s['created'] == 2
+    pool.close()
+
+
+def test_setup_hooks_run_on_new_connections(tmp_path):
+    def hook(conn):
+        conn.execute("PRAGMA user_version = 7")
+
+    pool = ConnectionPool(str(tmp_path / 'pool.db'))
+    pool.add_setup(hook)
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 7
+        assert isinstance(conn.execute("SELECT 1 AS uno").fetchone(), sqlite3.Row)
+    pool.close()
+
+
+def test_repository_calls_reuse_an_outer_lease(repo):
+    before = repo.pool.stats()['acquired']
+    with repo.pool.connection():
+        repo.list_users()
+        repo.count_tickets_by_status()
+    assert repo.pool.stats()['acquired'] - before == 1
@@ -0,0 +1,137 @@
+import time
+
+import pytest
+from flask import Flask
+from flask_mail import Message
+
+from domain.models import OutboxEmail
+from infrastructure.mail.mail_transport import MailTransport
+from infrastructure.mail.outbox_worker import EmailOutboxWorker
+from scripts.smtp_stub import StubSMTPServer
+
+
+@pytest.fixture
+def smtp():
+    with StubSMTPServer() as server:
+        yield server
+
+
+@pytest.fixture
+def make_worker(repo, smtp):
+    app = Flask(__name__)
+    transport = MailTransport(repo, {'MAIL_SERVER': smtp.host, 'MAIL_PORT': smtp.port, 'MAIL_USE_TLS': 'False',
+                                     'MAIL_DEFAULT_SENDER': 'soporte@example.com'})
+    transport.init_app(app)
+
+    def deliver(emails):
+        # Same shape as app._entregar_correos: one SMTP session for the whole batch.
+        with app.app_context():
+            messages = [Message(e.asunto, sender=transport.sender, recipients=e.destinatarios, html=e.cuerpo_html)
+                        for e in emails]
+            errors = {id(msg): error for msg, error in transport.send_batch(messages)}
+        return [(email, errors[id(msg)]) for email, msg in zip(emails, messages) if id(msg) in errors]
+
+    workers = []
+
+    def make(**options):
+        options.setdefault('workers', 0)
+        worker = EmailOutboxWorker(repo, deliver, **options)
+        workers.append(worker)
+        return worker
+
+    yield make
+    for worker in workers:
+        worker.stop()
+    transport.close()
+
+
+def _enqueue(repo, count=1):
+    repo.enqueue_emails([OutboxEmail(destinatarios=[f'user{i}@example.com'], asunto=f'Ticket {i}',
+                                     cuerpo_html='<p>hola</p>') for i in range(count)])
+
+
+def _rows(repo):
+    with repo.pool.connection() as conn:
+        return conn.execute("SELECT id, estado, intentos, ultimo_error, "
+                            "CAST(strftime('%s', proximo_intento) - strftime('%s', 'now') AS INTEGER) AS espera "
+                            "FROM email_outbox ORDER BY id").fetchall()
+
+
+def test_batch_is_delivered_over_one_session(repo, smtp, make_worker):
+    _enqueue(repo, 3)
+    worker = make_worker()
+    assert worker.process_batch() == 3
+    assert [r['estado'] for r in _rows(repo)] == ['Enviado'] * 3
+    assert sorted(smtp.recipients) == ['user0@example.com', 'user1@example.com', 'user2@example.com']
+    assert smtp.connections == 1
+    assert worker.stats()['sent'] == 3
+    assert worker.process_batch() == 0
+
+
+def test_transient_failure_is_retried_with_backoff(repo, smtp, make_worker):
+    _enqueue(repo)
+    worker = make_worker(backoff_base=30, max_retries=3)
+    smtp.fail_every = 1
+    assert worker.process_batch() == 1
+    row = _rows(repo)[0]
+    assert row['estado'] == 'Pendiente' and row['intentos'] == 1
+    assert '451' in row['ultimo_error']
+    assert 25 <= row['espera'] <= 30
+    # Not due yet: nothing to claim until the backoff elapses
+    assert worker.process_batch() == 0
+
+    smtp.fail_every = 0
+    with repo.pool.connection() as conn:
+        conn.execute("UPDATE email_outbox SET proximo_intento = datetime('now', '-1 seconds')")
+        conn.commit()
+    assert worker.process_batch() == 1
+    row = _rows(repo)[0]
+    assert row['estado'] == 'Enviado' and row['intentos'] == 2 and row['ultimo_error'] is None
+    assert worker.stats()['retried'] == 1 and worker.stats()['sent'] == 1
+
+
+def test_backoff_grows_exponentially_and_caps(make_worker):
+    worker = make_worker(backoff_base=30, backoff_max=100)
+    assert [worker.backoff(n) for n in (1, 2, 3, 4)] == [30, 60, 100, 100]
+
+
+def test_gives_up_after_max_retries(repo, smtp, make_worker):
+    _enqueue(repo)
+    worker = make_worker(max_retries=2)
+    smtp.fail_every = 1
+    for _ in range(2):
+        assert worker.process_batch() == 1
+        with repo.pool.connection() as conn:
+            conn.execute("UPDATE email_outbox SET proximo_intento = datetime('now', '-1 seconds')")
+            conn.commit()
+    row = _rows(repo)[0]
+    assert row['estado'] == 'Fallido' and row['intentos'] == 2
+    assert worker.process_batch() == 0
+    assert smtp.messages == []
+
+
+def test_stale_claims_are_requeued_only_when_old(repo, make_worker):
+    _enqueue(repo)
+    repo.claim_emails(10)  # A process died after claiming
+    assert make_worker(stale_after=600).requeue_stale() == 0
+    assert _rows(repo)[0]['estado'] == 'Enviando'
+
+    with repo.pool.connection() as conn:
+        conn.execute("UPDATE email_outbox SET reclamado_en = datetime('now', '-601 seconds')")
+        conn.commit()
+    assert make_worker(stale_after=600).requeue_stale() == 1
+    assert _rows(repo)[0]['estado'] == 'Pendiente'
+
+
+def test_running_worker_requeues_claims_left_after_a_quick_restart(repo, smtp, make_worker):
+    _enqueue(repo)
+    repo.claim_emails(10)  # Claimed by the previous process moments before it died
+    worker = make_worker(workers=1, poll_interval=0.05, stale_after=1, requeue_interval=0.2)
+    worker.start()
+    assert worker.stats()['requeued'] == 0  # Too recent for the start-up check
+    deadline = time.monotonic() + 5
+    while _rows(repo)[0]['estado'] != 'Enviado' and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _rows(repo)[0]['estado'] == 'Enviado'
+    assert worker.stats()['requeued'] == 1
+    assert len(smtp.messages) == 1
@@ -0,0 +1,68 @@
+from domain.models import TicketStatus
+
+
+def _count(repo, user, estado):
+    return repo.count_tickets_by_status({'usuario_id': user.id}).get(estado, 0)
+
+
+def test_insert_update_delete_keep_counters_in_sync(repo, make_user, make_ticket):
+    ana = make_user('ana')
+    first = make_ticket(ana, categoria='Hardware')
+    make_ticket(ana, categoria='Red')
+    assert _count(repo, ana, 'Abierto') == 2
+
+    first.estado = TicketStatus.EN_PROCESO
+    first.categoria = 'Software'
+    repo.update_ticket(first)
+    assert _count(repo, ana, 'Abierto') == 1
+    assert _count(repo, ana, 'En Proceso') == 1
+
+    repo.delete_ticket(first.id)
+    assert _count(repo, ana, 'En Proceso') == 0
+    assert repo.verify_ticket_counters() == []
+
+
+def test_empty_groups_are_removed(repo, make_user, make_ticket):
+    ana = make_user('ana')
+    ticket = make_ticket(ana)
+    repo.delete_ticket(ticket.id)
+    with repo.pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM soportes_contadores").fetchone()[0] == 0
+
+
+def test_user_delete_cascade_updates_counters(repo, make_user, make_ticket):
+    ana, beto = make_user('ana'), make_user('beto')
+    make_ticket(ana)
+    make_ticket(beto)
+    repo.delete_user(ana.id)
+    assert repo.count_tickets_by_status() == {'Abierto': 1}
+    assert repo.verify_ticket_counters() == []
+
+
+def test_dashboard_reads_counters_by_role(repo, make_user, make_ticket):
+    ana, beto = make_user('ana'), make_user('beto')
+    make_ticket(ana)
+    make_ticket(beto, categoria='Red')
+    done = make_ticket(beto)
+    done.estado = TicketStatus.EN_PROCESO
+    repo.update_ticket(done)
+
+    kpis = repo.get_dashboard_kpis('admin', ana.id)
+    assert kpis['total_abiertos'] == 2 and kpis['total_en_proceso'] == 1
+    assert repo.get_dashboard_kpis('user', ana.id)['total_abiertos'] == 1
+    assert repo.get_dashboard_kpis('user', beto.id)['mis_tickets'] == 2
+    status = repo.get_status_distribution('user', beto.id)
+    assert dict(zip(status['labels'], status['datos'])) == {'Abierto': 1, 'En Proceso': 1}
+
+
+def test_verify_detects_drift_and_rebuild_repairs_it(repo, make_user, make_ticket):
+    ana = make_user('ana')
+    make_ticket(ana)
+    make_ticket(ana)
+    with repo.pool.connection() as conn:
+        conn.execute("UPDATE soportes_contadores SET cantidad = 5")
+        conn.commit()
+    drift = repo.verify_ticket_counters()
+    assert [(d['esperado'], d['materializado']) for d in drift] == [(2, 5)]
+    assert repo.rebuild_ticket_counters() == 1
+    assert repo.verify_ticket_counters() == []
@@ -0,0 +1,63 @@
+import io
+
+from openpyxl import load_workbook
+
+from domain.models import TicketRowView
+from infrastructure.export.ticket_export import iter_csv, neutralize, write_xlsx
+
+PAYLOAD = '=HYPERLINK("http://x","click")'
+
+
+def _ticket(**overrides):
+    row = {
+        'id': '3f2b8c1e-0000-4000-8000-000000000001', 'usuario_id': '3f2b8c1e-0000-4000-8000-000000000002',
+        'tecnico_id': None, 'equipo_id': None, 'prioridad': 'Media', 'estado': 'Abierto',
+        'numero_ticket': 7, 'problema': 'No enciende', 'categoria': 'Hardware', 'solucion': None,
+        'fecha_creacion': '2025-01-02 10:00:00', 'fecha_finalizacion': None,
+        'nombre_usuario': 'ana', 'nombre_tecnico': None, 'nombre_equipo': None,
+    }
+    row.update(overrides)
+    return TicketRowView(row)
+
+
+def test_neutralize_prefixes_formula_starts():
+    for value in ('=1+1', '+1', '-1', '@SUM(A1)', '\t=1', '\r=1'):
+        assert neutralize(value) == "'" + value
+    assert neutralize('No enciende') == 'No enciende'
+    assert neutralize(7) == 7
+    assert neutralize(None) is None
+
+
+def test_csv_does_not_export_formulas():
+    ticket = _ticket(problema=PAYLOAD, solucion='+cmd', nombre_usuario='@admin')
+    content = ''.join(iter_csv([ticket]))
+    assert "'" + PAYLOAD.replace('"', '""') in content
+    assert "'+cmd" in content
+    assert "'@admin" in content
+    assert ',=HYPERLINK' not in content and ',"=HYPERLINK' not in content
+
+
+def test_xlsx_writes_text_cells_only():
+    ticket = _ticket(problema=PAYLOAD, solucion='-1', nombre_usuario='=ana')
+    buffer = io.BytesIO()
+    assert write_xlsx([ticket], buffer) == 1
+    buffer.seek(0)
+    sheet = load_workbook(buffer)['Soportes']
+    row = [cell for cell in sheet[2]]
+    assert all(cell.data_type != 'f' for cell in row)
+    values = {cell.value for cell in row}
+    assert "'" + PAYLOAD in values
+    assert "'-1" in values
+    assert "'=ana" in values
+    assert sheet['A2'].value == 7
+
+
+def test_iter_tickets_pages_without_holding_a_connection(repo, make_user, make_ticket):
+    ana = make_user('ana')
+    created = {make_ticket(ana, problema=f'ticket {i}').id for i in range(7)}
+    exported = []
+    for ticket in repo.iter_tickets(batch_size=3):
+        # Between rows the generator is suspended: no lease, no open read snapshot
+        assert not repo.pool.holds_connection()
+        exported.append(ticket.id)
+    assert len(exported) == 7 and set(exported) == created
@@ -0,0 +1,79 @@
+from domain.models import Equipment
+from infrastructure.persistence.repository import HIGHLIGHT_END, HIGHLIGHT_START, build_match_query
+
+
+def _numbers(page):
+    return [hit.numero_ticket for hit in page.items]
+
+
+def test_build_match_query_quotes_every_word_as_prefix():
+    assert build_match_query('impre red') == '"impre"* "red"*'
+    assert build_match_query('a"b OR') == '"ab"* "OR"*'
+    assert build_match_query('  "" ') is None
+
+
+def test_prefix_search_ignores_accents_and_highlights(repo, make_user, make_ticket):
+    ana = make_user('ana')
+    hit = make_ticket(ana, problema='La impresora no imprime')
+    make_ticket(ana, problema='Sin acceso a la red')
+    page = repo.search_tickets('impre')
+    assert _numbers(page) == [hit.numero_ticket] and page.total == 1
+    assert f'{HIGHLIGHT_START}impresora{HIGHLIGHT_END}' in page.items[0].problema_resaltado
+    assert _numbers(repo.search_tickets('actualizacion')) == []
+    make_ticket(ana, problema='Actualización pendiente')
+    assert repo.search_tickets('actualizacion').total == 1
+
+
+def test_problema_ranks_above_solucion(repo, make_user, make_ticket):
+    ana = make_user('ana')
+    in_solution = make_ticket(ana, problema='Equipo lento', solucion='Se cambió el toner')
+    in_problem = make_ticket(ana, problema='Falta toner en la impresora')
+    assert _numbers(repo.search_tickets('toner')) == [in_problem.numero_ticket, in_solution.numero_ticket]
+
+
+def test_search_respects_visibility_filters_and_pages(repo, make_user, make_ticket):
+    ana, beto = make_user('ana'), make_user('beto')
+    for _ in range(3):
+        make_ticket(ana, problema='vpn caida')
+    make_ticket(beto, problema='vpn caida')
+    assert repo.search_tickets('vpn').total == 4
+    mine = repo.search_tickets('vpn', filters={'usuario_id': beto.id})
+    assert mine.total == 1 and mine.items[0].usuario_id == beto.id
+    second = repo.search_tickets('vpn', page=2, per_page=3)
+    assert len(second.items) == 1 and second.pages == 2 and not second.has_next
+
+
+def test_triggers_follow_updates_deletes_and_renames(repo, make_user, make_ticket):
+    ana = make_user('ana')
+    equipo = repo.create_equipment(Equipment(nombre_equipo='PC-CONTA-01'))
+    ticket = make_ticket(ana, problema='pantalla azul', equipo_id=equipo.id)
+    assert repo.search_tickets('conta').total == 1
+
+    ticket.problema = 'teclado roto'
+    repo.update_ticket(ticket)
+    assert repo.search_tickets('pantalla').total == 0
+    assert repo.search_tickets('teclado').total == 1
+
+    equipo.nombre_equipo = 'PC-VENTAS-02'
+    repo.update_equipment(equipo)
+    assert repo.search_tickets('ventas').total == 1
+    assert repo.search_tickets('conta').total == 0
+
+    with repo.pool.connection() as conn:
+        conn.execute("UPDATE usuarios SET username = 'anabel' WHERE id = ?", (str(ana.id),))
+        conn.commit()
+    assert repo.search_tickets('anabel').total == 1
+
+    repo.delete_ticket(ticket.id)
+    assert repo.search_tickets('teclado').total == 0
+
+
+def test_rebuild_search_index(repo, make_user, make_ticket):
+    ana = make_user('ana')
+    make_ticket(ana, problema='correo outlook')
+    with repo.pool.connection() as conn:
+        conn.execute("DELETE FROM soportes_fts")
+        conn.commit()
+    assert repo.search_tickets('outlook').total == 0
+    assert repo.rebuild_search_index() == 1
+    assert repo.search_tickets('outlook').total == 1
@@ -0,0 +1,73 @@
+import threading
+
+from domain.models import Ticket
+
+
+def test_numbers_are_consecutive_from_one(repo, make_user, make_ticket):
+    ana = make_user('ana')
+    assert [make_ticket(ana).numero_ticket for _ in range(3)] == [1, 2, 3]
+
+
+def test_concurrent_creates_get_unique_numbers(repo, make_user):
+    ana = make_user('ana')
+    threads, per_thread = 8, 25
+    numbers, errors = [], []
+    start = threading.Barrier(threads)
+
+    def worker():
+        start.wait()
+        for _ in range(per_thread):
+            try:
+                numbers.append(repo.create_ticket(Ticket(usuario_id=ana.id, problema='x')).numero_ticket)
+            except Exception as e:
+                errors.append(e)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    assert errors == []
+    # Every create committed, so the sequence has no gaps either.
+    assert sorted(numbers) == list(range(1, threads * per_thread + 1))
+    assert repo.sync_ticket_sequence() == threads * per_thread
+
+
+def test_reserved_blocks_do_not_overlap_with_creates(repo, make_user, make_ticket):
+    ana = make_user('ana')
+    make_ticket(ana)
+    block = repo.reserve_ticket_numbers(10)
+    assert block == range(2, 12)
+    # Unused reserved numbers are left as gaps.
+    assert make_ticket(ana).numero_ticket == 12
+
+
+def test_explicit_number_advances_the_sequence(repo, make_user, make_ticket):
+    ana = make_user('ana')
+    make_ticket(ana, numero_ticket=50)
+    assert make_ticket(ana).numero_ticket == 51
+    # A lower explicit number does not move it back.
+    make_ticket(ana, numero_ticket=10)
+    assert make_ticket(ana).numero_ticket == 52
+
+
+def test_sync_moves_past_numbers_written_without_the_sequence(repo, make_user, make_ticket):
+    ana = make_user('ana')
+    make_ticket(ana)
+    with repo.pool.connection() as conn:
+        conn.execute("INSERT INTO soportes (id, numero_ticket, usuario_id, problema) VALUES ('legacy', 99, ?, 'x')",
+                     (str(ana.id),))
+        conn.commit()
+    assert repo.sync_ticket_sequence() == 99
+    assert make_ticket(ana).numero_ticket == 100
+
+
+def test_sync_creates_a_missing_sequence(repo, make_user, make_ticket):
+    ana = make_user('ana')
+    make_ticket(ana, numero_ticket=7)
+    with repo.pool.connection() as conn:
+        conn.execute("DELETE FROM secuencias")
+        conn.commit()
+    assert repo.sync_ticket_sequence() == 7
+    assert make_ticket(ana).numero_ticket == 8